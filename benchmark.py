@@ -0,0 +1,233 @@
+"""Benchmark offline dos fluxos CW e TA do bot contra o portal simulado (mock_portal.py).
+
+Cada repetição sobe um PortalBot headless apontado para o portal simulado (PORTAL_URL_BASE),
+faz login, entra no curso e processa todas as disciplinas no modo pedido, medindo o tempo
+total, as fases do MedidorFases e os comandos WebDriver. O resultado vai para um histórico
+JSON-lines com o commit do git, e é comparado com a última execução com os mesmos parâmetros.
+
+Uso:
+    python benchmark.py
+    python benchmark.py --modos CW --latencia-ms 150 --cw 5 --secoes 8 --paragrafos 120
+    python benchmark.py --modos TA --repeticoes 3 --historico benchmarks/historico.jsonl
+    python benchmark.py --modos CW,TA,TODOS   # TODOS: CW e TA numa só passada por disciplina
+    python benchmark.py --modos CW,CW-HTTP    # CW-HTTP: seções pelo MotorEngajamentoHTTP
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from mock_portal import argumentos_portal, portal_dos_argumentos
+
+# Fases do MedidorFases guardadas no histórico (as demais ficam só no relatório do bot)
+FASES_HISTORICO = (
+    'login', 'entrar_curso', 'listar_disciplinas', 'acessar_disciplina', 'filtro',
+    'snapshot_timeline', 'abrir_atividade', 'descobrir_secoes', 'secoes_material', 'secao',
+    'rolagem', 'videos_teleaula', 'video', 'seek_video', 'registro_video', 'voltar_timeline',
+)
+
+# Modo do benchmark -> modos passados a processar_disciplina
+MODOS_BENCHMARK = {'CW': ['CW'], 'TA': ['TA'], 'TODOS': ['CW', 'TA'], 'CW-HTTP': ['CW']}
+
+
+def commit_atual():
+    """Hash curto do HEAD e se a árvore tem alterações não commitadas
+
+    Returns:
+        tuple: (commit ou None fora de um repositório git, sujo)
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        sujo = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        ).stdout.strip())
+        return commit, sujo
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def executar_fluxo(portal, modo, pasta_sessao, headless=True):
+    """Roda uma vez o fluxo completo do bot (login → curso → disciplinas) em um modo
+
+    'TODOS' processa CW e TA juntos, numa só passada pela timeline de cada disciplina.
+    'CW-HTTP' processa as CWs com PORTAL_ENGAJAMENTO_HTTP=1 (engajamento sem abrir guias).
+
+    Returns:
+        dict: {'modo', 'ok', 'completo', 'duracao_s', 'fases', 'comandos', 'comandos_ms', 'portal'}
+    """
+    # Importado aqui: bot.py carrega o .env na importação e o ambiente abaixo tem de prevalecer
+    from bot import PortalBot, processar_disciplina
+
+    modos = MODOS_BENCHMARK[modo]
+
+    portal.reiniciar_estado()
+    os.environ.update({
+        'PORTAL_URL_BASE': portal.url_base,
+        'PORTAL_USERNAME': 'benchmark',
+        'PORTAL_PASSWORD': 'benchmark',
+        'PORTAL_REGISTRO': '0',
+        'PORTAL_ENGAJAMENTO_HTTP': '1' if modo == 'CW-HTTP' else '0',
+        'PORTAL_ARQUIVO_SESSAO': os.path.join(pasta_sessao, f"cookies_{modo}.json"),
+    })
+    os.environ.setdefault('PORTAL_PROGRESSO_SAIDAS', 'log')
+
+    inicio = time.monotonic()
+    bot = PortalBot(headless=headless)
+    ok = False
+    try:
+        if bot.iniciar_sessao() and bot.entrar_curso_agronomia():
+            disciplinas = bot.listar_disciplinas()
+            ok = bool(disciplinas)
+            for disciplina in disciplinas:
+                ok = processar_disciplina(bot, {'nome': disciplina['nome'], 'url': disciplina['url']}, modos) and ok
+        duracao = time.monotonic() - inicio
+        relatorio = bot.fases.relatorio()
+        comandos = bot.comandos.relatorio() if bot.comandos else None
+    finally:
+        bot.fechar()
+
+    estatisticas = portal.estatisticas()
+    # Conjuntos de ids, não contagens: ids repetidos ou inventados não passam por completos
+    completo = all((
+        'CW' not in modos or estatisticas['secoes_completas'],
+        'TA' not in modos or estatisticas['videos_completos'],
+    ))
+
+    return {
+        'modo': modo,
+        'ok': ok,
+        'completo': completo,
+        'duracao_s': round(duracao, 3),
+        'fases': {
+            nome: {'n': f['quantidade'], 'total_s': f['total_s'], 'p50_s': f['p50_s']}
+            for nome, f in relatorio['fases'].items() if nome in FASES_HISTORICO
+        },
+        'comandos': comandos['total_comandos'] if comandos else None,
+        'comandos_ms': comandos['total_ms'] if comandos else None,
+        'portal': {k: estatisticas[k] for k in ('total_requisicoes', 'secoes_engajadas', 'videos_registrados')},
+    }
+
+
+def agregar(execucoes):
+    """Resume as repetições de um modo: mediana/mínimo do tempo e a mediana dos comandos"""
+    duracoes = [e['duracao_s'] for e in execucoes]
+    comandos = [e['comandos'] for e in execucoes if e['comandos'] is not None]
+    return {
+        'repeticoes': len(execucoes),
+        'ok': all(e['ok'] and e['completo'] for e in execucoes),
+        'mediana_s': round(statistics.median(duracoes), 3),
+        'min_s': round(min(duracoes), 3),
+        'max_s': round(max(duracoes), 3),
+        'comandos': int(statistics.median(comandos)) if comandos else None,
+        # Fases da execução mediana (a mais representativa)
+        'fases': sorted(execucoes, key=lambda e: e['duracao_s'])[len(execucoes) // 2]['fases'],
+    }
+
+
+def ler_historico(caminho):
+    """Entradas do histórico, da mais antiga para a mais recente (linhas inválidas são ignoradas)"""
+    if not os.path.exists(caminho):
+        return []
+    entradas = []
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                entradas.append(json.loads(linha))
+            except ValueError:
+                continue
+    return entradas
+
+
+def registrar_historico(caminho, entrada):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+
+
+def comparar(atual, anterior):
+    """Linhas de texto com a variação de tempo e comandos por modo em relação a `anterior`"""
+    linhas = [f"📊 Comparação com {anterior.get('commit') or '?'} ({anterior['data']}):"]
+    for modo, r in atual['resultados'].items():
+        a = anterior['resultados'].get(modo)
+        if not a:
+            continue
+        variacao = (r['mediana_s'] - a['mediana_s']) / a['mediana_s'] * 100 if a['mediana_s'] else 0
+        linha = f"  {modo}: {a['mediana_s']:.1f}s → {r['mediana_s']:.1f}s ({variacao:+.1f}%)"
+        if r.get('comandos') is not None and a.get('comandos') is not None:
+            linha += f" | comandos {a['comandos']} → {r['comandos']} ({r['comandos'] - a['comandos']:+d})"
+        linhas.append(linha)
+    return linhas
+
+
+def main(argv=None):
+    parser = argumentos_portal(argparse.ArgumentParser(description="Benchmark offline do bot contra o portal simulado"))
+    parser.add_argument("--modos", default="CW,TA", help=f"Fluxos medidos, separados por vírgula ({', '.join(MODOS_BENCHMARK)})")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Execuções por modo (o histórico guarda a mediana)")
+    parser.add_argument("--historico", default=os.path.join('benchmarks', 'historico.jsonl'),
+                        help="Arquivo JSON-lines com os resultados por commit")
+    parser.add_argument("--sem-historico", action="store_true", help="Não grava o resultado no histórico")
+    parser.add_argument("--janela", action="store_true", help="Abre o navegador (sem headless)")
+    parser.add_argument("-v", "--verbose", action="store_const", const="DEBUG", dest="log_nivel")
+    parser.add_argument("-q", "--quiet", action="store_const", const="WARNING", dest="log_nivel")
+    args = parser.parse_args(argv)
+
+    from bot import configurar_logging
+    configurar_logging(args.log_nivel)
+
+    modos = [m.strip().upper() for m in args.modos.split(',') if m.strip()]
+    invalidos = [m for m in modos if m not in MODOS_BENCHMARK]
+    if invalidos or not modos:
+        parser.error(f"modos inválidos: {invalidos or args.modos}")
+
+    commit, sujo = commit_atual()
+    resultados = {}
+    with portal_dos_argumentos(args) as portal, tempfile.TemporaryDirectory(prefix="benchmark_sessao_") as pasta_sessao:
+        print(f"🧪 Portal simulado em {portal.url_base} | {portal.parametros()}")
+        for modo in modos:
+            execucoes = []
+            for n in range(1, args.repeticoes + 1):
+                print(f"\n⏱ Benchmark {modo} {n}/{args.repeticoes}...")
+                execucao = executar_fluxo(portal, modo, pasta_sessao, headless=not args.janela)
+                execucoes.append(execucao)
+                simbolo = "✓" if execucao['ok'] and execucao['completo'] else "✗"
+                print(f"{simbolo} {modo} {n}: {execucao['duracao_s']:.1f}s, {execucao['comandos']} comandos, "
+                      f"{execucao['portal']['total_requisicoes']} requisições ao portal")
+            resultados[modo] = agregar(execucoes)
+        parametros = portal.parametros()
+
+    entrada = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'sujo': sujo,
+        'parametros': parametros,
+        'resultados': resultados,
+    }
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK ({commit or 'sem git'}{', com alterações locais' if sujo else ''})")
+    print("=" * 60)
+    for modo, r in resultados.items():
+        print(f"  {modo}: mediana {r['mediana_s']:.1f}s (min {r['min_s']:.1f}s, max {r['max_s']:.1f}s), "
+              f"{r['comandos']} comandos {'✓' if r['ok'] else '✗ incompleto'}")
+
+    anteriores = [e for e in ler_historico(args.historico) if e.get('parametros') == parametros]
+    if anteriores:
+        print("\n".join(comparar(entrada, anteriores[-1])))
+
+    if not args.sem_historico:
+        registrar_historico(args.historico, entrada)
+        print(f"📄 Resultado acrescentado a {args.historico}")
+
+    return 0 if all(r['ok'] for r in resultados.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,22 @@
 import os
+import sys
 import time
+import bisect
+import signal
+import weakref
 import logging
+import logging.handlers
+import atexit
+import gzip
+import shutil
 import re
+import queue
+import argparse
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager
+import functools
+from abc import ABC, abstractmethod
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -12,82 +27,2199 @@ from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from dotenv import load_dotenv
 import math
+import json
+import sqlite3
+import psutil
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+import asyncio
+
+try:
+    from telegram import Update
+    from telegram.error import BadRequest, RetryAfter, TelegramError
+    from telegram.ext import Application, CommandHandler
+except ImportError:  # Sem python-telegram-bot só o modo Telegram fica indisponível
+    Application = None
 
 load_dotenv()
 
 
+# Coleta todos os cards visíveis da timeline em uma única ida ao navegador.
+_JS_SNAPSHOT_TIMELINE = """
+var cards = document.querySelectorAll("li.atividades[data-show='true']");
+var out = [];
+for (var i = 0; i < cards.length; i++) {
+    var li = cards[i];
+    if (window.getComputedStyle(li).display === 'none') continue;
+
+    var tituloEl = li.querySelector('.timeline-title');
+    var smallEl = li.querySelector('.timeline-title small');
+
+    var percent = null;
+    var smalls = li.querySelectorAll('small');
+    for (var j = 0; j < smalls.length; j++) {
+        var m = (smalls[j].innerText || '').match(/(\\d{1,3})\\s*%/);
+        if (m) {
+            var v = parseInt(m[1], 10);
+            if (v >= 0 && v <= 100 && (percent === null || v > percent)) percent = v;
+        }
+    }
+
+    var btnAtividade = li.querySelector("a.btn.btn-primary[title*='Atividade']");
+    var btnVideo = li.querySelector("a.colorVideos[href*='videoAnotacao/index']")
+        || li.querySelector("a[href*='videoAnotacao/index']");
+    var hrefAtividade = btnAtividade ? btnAtividade.href : null;
+    var hrefVideo = btnVideo ? btnVideo.href : null;
+
+    out.push({
+        id: li.id || li.getAttribute('data-id') || hrefAtividade || hrefVideo || ('card-' + i),
+        titulo: tituloEl ? tituloEl.innerText : li.innerText,
+        titulo_curto: smallEl ? smallEl.innerText : '',
+        percent: percent,
+        href_atividade: hrefAtividade,
+        href_video: hrefVideo,
+        elemento: li
+    });
+}
+return out;
+"""
+
+# Assinatura dos cards visíveis da timeline (quantidade + ids), usada para
+# detectar quando a lista foi re-renderizada após um filtro.
+_JS_FN_ASSINATURA_TIMELINE = """
+function assinaturaTimeline() {
+    var cards = document.querySelectorAll("li.atividades[data-show='true']");
+    var ids = [];
+    for (var i = 0; i < cards.length; i++) {
+        if (window.getComputedStyle(cards[i]).display === 'none') continue;
+        ids.push(cards[i].id || cards[i].getAttribute('data-id') || i);
+    }
+    return ids.length + ':' + ids.join(',');
+}
+"""
+
+_JS_ASSINATURA_TIMELINE = _JS_FN_ASSINATURA_TIMELINE + "return assinaturaTimeline();"
+
+
+# Motor de filtros da timeline (execute_async_script). Argumentos: tipos pedidos (trechos
+# do rótulo do filtro ou o data-filter, sem diferenciar maiúsculas/acentos), janela de
+# estabilidade (s), espera máxima pela primeira mudança (s) e limite total (s). Lê os rótulos
+# e os checkboxes dentro da página; se já estão no estado pedido, não faz nada. Senão
+# desmarca "todos", acerta cada tipo com click() (dispara os handlers do portal) e resolve
+# quando a assinatura dos cards mudou e a lista de cards parou de mudar (MutationObserver só
+# no contêiner dos cards: a troca de estilo do próprio checkbox não conta), sem pausas fixas.
+_JS_APLICAR_FILTROS = _JS_FN_ASSINATURA_TIMELINE + """
+var concluir = arguments[arguments.length - 1];
+var pedidos = arguments[0].map(normalizar), janela = arguments[1] * 1000;
+var semMudanca = arguments[2] * 1000, limite = arguments[3] * 1000;
+
+function normalizar(t) {
+    return String(t || '').normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase().trim();
+}
+
+var todos = document.getElementById('todos');
+var tipos = Array.prototype.map.call(
+    document.querySelectorAll("input.filters-tipo[data-filter^='tipo-']"),
+    function (el) {
+        var label = el.closest('label') || el.parentElement;
+        var rotulo = ((label && label.innerText) || '').split('\\n')[0].trim();
+        return {el: el, rotulo: rotulo, chave: normalizar(rotulo), filtro: normalizar(el.getAttribute('data-filter'))};
+    }
+);
+if (!tipos.length) return concluir({ok: false, motivo: 'filtros não encontrados'});
+
+function atende(t, p) { return t.filtro === p || (p && t.chave.indexOf(p) >= 0); }
+function desejado(t) { return pedidos.some(function (p) { return atende(t, p); }); }
+
+var faltando = pedidos.filter(function (p) { return !tipos.some(function (t) { return atende(t, p); }); });
+var disponiveis = tipos.map(function (t) { return t.rotulo; });
+if (faltando.length) return concluir({ok: false, motivo: 'tipos não encontrados', faltando: faltando, disponiveis: disponiveis});
+
+var todosDesejado = tipos.every(desejado);
+var marcados = tipos.filter(desejado).map(function (t) { return t.rotulo; });
+function noEstado() {
+    if (todos && todos.checked !== todosDesejado) return false;
+    return tipos.every(function (t) { return t.el.checked === desejado(t); });
+}
+if (noEstado()) return concluir({ok: true, mudou: false, marcados: marcados});
+
+var inicio = performance.now(), ultimaMudanca = null;
+var antes = assinaturaTimeline(), atual = antes;
+// A mudança só conta depois que a assinatura dos cards saiu da de antes dos cliques
+function lerAssinatura() {
+    var assinatura = assinaturaTimeline();
+    if (assinatura !== atual) { atual = assinatura; ultimaMudanca = performance.now(); }
+}
+var primeiro = document.querySelector('li.atividades');
+var lista = (primeiro && (primeiro.closest('ul, ol') || primeiro.parentElement)) || document.body;
+var mo = new MutationObserver(function () {
+    lerAssinatura();
+    // Já re-renderizou: qualquer mudança seguinte nos cards reinicia a janela de estabilidade
+    if (atual !== antes) ultimaMudanca = performance.now();
+});
+mo.observe(lista, {subtree: true, childList: true, attributes: true, attributeFilter: ['style', 'class', 'data-show']});
+
+if (todos && todos.checked !== todosDesejado) todos.click();
+tipos.forEach(function (t) { if (t.el.checked !== desejado(t)) t.el.click(); });
+
+(function esperar() {
+    lerAssinatura();
+    var agora = performance.now(), sinal = null;
+    if (ultimaMudanca !== null && agora - ultimaMudanca >= janela) sinal = 'rerenderizada';
+    else if (ultimaMudanca === null && agora - inicio >= semMudanca) sinal = 'sem_mudanca';
+    else if (agora - inicio >= limite) sinal = 'limite';
+    if (sinal === null) return setTimeout(esperar, 50);
+    mo.disconnect();
+    concluir({ok: noEstado(), mudou: true, sinal: sinal, ms: agora - inicio, marcados: marcados, disponiveis: disponiveis});
+})();
+"""
+
+# Rótulo do filtro da timeline de cada tipo de atividade conhecido (outros tipos são
+# pedidos pelo próprio rótulo, ex.: configurar_filtros('Avaliação Virtual'))
+ROTULOS_FILTRO = {'CW': 'Conteúdo WEB', 'TA': 'Teleaula'}
+
+
+# Um passo de rolagem: se o viewport já encostou no fim, força o scroll no "bottom"
+# real e retorna true; senão rola `arguments[0]` px e retorna false.
+_JS_PASSO_ROLAGEM = """
+var altura = Math.max(document.body.scrollHeight, document.documentElement.scrollHeight);
+if (window.pageYOffset + window.innerHeight >= altura - 2) {
+    window.scrollTo(0, altura);
+    window.dispatchEvent(new Event('scroll'));
+    document.dispatchEvent(new Event('scroll'));
+    return {fim: true, percent: 100};
+}
+window.scrollBy(0, arguments[0]);
+window.dispatchEvent(new Event('scroll'));
+return {fim: false, percent: altura > 0 ? Math.min(100, Math.floor((window.pageYOffset + window.innerHeight) / altura * 100)) : 100};
+"""
+
+# Rolagem completa dentro da página (execute_async_script). Argumentos: passo (px),
+# pausa (s), estabilidade no fim (s) e limite total (s). Quando a altura cresce
+# (conteúdo lazy) o passo diminui e a pausa aumenta; com a altura estável, acelera.
+# Resolve quando o fim foi alcançado e a altura ficou estável pela janela pedida.
+_JS_ROLAGEM_ASSINCRONA = """
+var concluir = arguments[arguments.length - 1];
+var passoBase = arguments[0], pausaBase = arguments[1] * 1000;
+var estabilidade = arguments[2] * 1000, limite = arguments[3] * 1000;
+
+function altura() {
+    return Math.max(document.body.scrollHeight, document.documentElement.scrollHeight);
+}
+function avisarScroll() {
+    window.dispatchEvent(new Event('scroll'));
+    document.dispatchEvent(new Event('scroll'));
+}
+
+var inicio = performance.now();
+var passos = 0, cresceu = 0;
+var passo = passoBase, pausa = pausaBase;
+var ultimaAltura = altura(), fimDesde = null;
+
+function tick() {
+    var agora = performance.now();
+    var h = altura();
+
+    if (h > ultimaAltura) {
+        cresceu++;
+        passo = Math.max(passoBase / 2, 100);
+        pausa = Math.min(pausa * 1.5, pausaBase * 3);
+        fimDesde = null;
+    } else {
+        passo = Math.min(passo * 1.25, passoBase * 2);
+        pausa = Math.max(pausa * 0.8, pausaBase / 2);
+    }
+    ultimaAltura = h;
+
+    if (window.pageYOffset + window.innerHeight >= h - 2) {
+        window.scrollTo(0, h);
+        avisarScroll();
+        if (fimDesde === null) {
+            fimDesde = agora;
+        } else if (agora - fimDesde >= estabilidade) {
+            return concluir({ok: true, passos: passos, altura: h, cresceu: cresceu, ms: agora - inicio});
+        }
+    } else {
+        window.scrollBy(0, passo);
+        avisarScroll();
+        passos++;
+    }
+
+    if (agora - inicio > limite) {
+        return concluir({ok: false, passos: passos, altura: h, cresceu: cresceu, ms: agora - inicio, motivo: 'limite'});
+    }
+    setTimeout(tick, fimDesde === null ? pausa : Math.min(pausa, estabilidade / 4));
+}
+tick();
+"""
+
+# Seek de vídeo dentro do iframe do player (execute_async_script). Argumentos:
+# passo em segundos para o <video>, número de cliques do fallback por botões e
+# intervalo entre comandos (s). Prefere o <video>; sem ele, clica em lote no forward.
+_JS_SEEK_VIDEO = """
+var concluir = arguments[arguments.length - 1];
+var passo = arguments[0], maxCliques = arguments[1], intervalo = arguments[2] * 1000;
+var seletorForward = "button#forward, button.controls__btn--forward, button[aria-label*='Forward']";
+var inicio = performance.now();
+
+function fim(r) {
+    r.ms = performance.now() - inicio;
+    concluir(r);
+}
+
+function porVideo(video) {
+    var alvo = Math.max(0, video.duration - 5);
+    var passos = 0;
+    (function seek() {
+        if (video.currentTime >= alvo) {
+            return fim({ok: true, modo: 'video', passos: passos, posicao: video.currentTime, duracao: video.duration});
+        }
+        video.currentTime = Math.min(video.currentTime + passo, alvo);
+        passos++;
+        if (video.paused) {
+            try { video.play(); } catch (e) {}
+        }
+        setTimeout(seek, intervalo);
+    })();
+}
+
+function porBotoes() {
+    var n = 0;
+    (function clicar() {
+        if (n >= maxCliques) return fim({ok: true, modo: 'botoes', passos: n});
+        var botao = document.querySelector(seletorForward);
+        // Seek parcial não é sucesso: o Python retoma pelos cliques a partir de `passos`
+        if (!botao) return fim({ok: false, modo: 'botoes', passos: n, motivo: 'forward indisponível'});
+        botao.click();
+        n++;
+        setTimeout(clicar, n % 20 === 0 ? intervalo + 800 : intervalo);
+    })();
+}
+
+var video = document.querySelector('video');
+if (!video) return porBotoes();
+if (isFinite(video.duration) && video.duration > 0) return porVideo(video);
+
+// Metadados ainda não carregados: espera um pouco antes de escolher o modo
+var decidido = false;
+video.addEventListener('loadedmetadata', function () {
+    if (decidido) return;
+    decidido = true;
+    porVideo(video);
+}, {once: true});
+setTimeout(function () {
+    if (decidido) return;
+    decidido = true;
+    porBotoes();
+}, 5000);
+"""
+
+# Espera o registro do vídeo nos campos hidden do portal (execute_async_script).
+# Argumentos: duração em segundos (ou null) e timeout (s). Observa os campos com
+# MutationObserver, eventos input/change e um hook no setter de `value` (o portal
+# altera .value via JS, o que não gera mutação nem evento); uma verificação local a
+# cada segundo cobre campos criados depois. Resolve com o sinal que disparou.
+_JS_AGUARDAR_REGISTRO_VIDEO = """
+var concluir = arguments[arguments.length - 1];
+var duracao = arguments[0], timeout = arguments[1] * 1000;
+var ids = ['current-time-video', 'current-time-video-em-tempo'];
+var inicio = performance.now();
+var terminado = false, observadores = [], restaurar = [], temporizadores = [];
+
+function registrado() {
+    var flag = document.getElementById(ids[0]);
+    var tempo = document.getElementById(ids[1]);
+    if (flag && String(flag.value).toLowerCase() === 'true') return true;
+    if (duracao !== null && tempo) {
+        var ct = parseInt(String(tempo.value).trim() || '0', 10);
+        if (!isNaN(ct) && ct >= Math.max(duracao - 2, 1)) return true;
+    }
+    return false;
+}
+
+function finalizar(ok, sinal) {
+    if (terminado) return;
+    terminado = true;
+    observadores.forEach(function (o) { o.disconnect(); });
+    restaurar.forEach(function (r) { r(); });
+    temporizadores.forEach(function (t) { clearTimeout(t); clearInterval(t); });
+    concluir({ok: ok, sinal: sinal, ms: performance.now() - inicio});
+}
+
+function verificar(sinal) {
+    if (registrado()) finalizar(true, sinal);
+}
+
+if (registrado()) return finalizar(true, 'ja_registrado');
+
+var descritor = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value');
+ids.forEach(function (id) {
+    var el = document.getElementById(id);
+    if (!el) return;
+
+    var mo = new MutationObserver(function () { verificar('mutation'); });
+    mo.observe(el, {attributes: true, attributeFilter: ['value']});
+    observadores.push(mo);
+
+    var aoEvento = function () { verificar('evento'); };
+    el.addEventListener('input', aoEvento);
+    el.addEventListener('change', aoEvento);
+    restaurar.push(function () {
+        el.removeEventListener('input', aoEvento);
+        el.removeEventListener('change', aoEvento);
+    });
+
+    Object.defineProperty(el, 'value', {
+        configurable: true,
+        get: function () { return descritor.get.call(this); },
+        set: function (v) {
+            descritor.set.call(this, v);
+            setTimeout(function () { verificar('setter'); }, 0);
+        }
+    });
+    restaurar.push(function () { delete el.value; });
+});
+
+temporizadores.push(setInterval(function () { verificar('verificacao'); }, 1000));
+temporizadores.push(setTimeout(function () { finalizar(false, 'timeout'); }, timeout));
+"""
+
+
+# ============================================================
+# PRONTIDÃO (condições de espera nomeadas para WebDriverWait)
+# ============================================================
+
+def documento_pronto():
+    """O documento atual terminou de carregar (readyState == 'complete')"""
+    def _condicao(driver):
+        return driver.execute_script("return document.readyState;") == "complete"
+    return _condicao
+
+
+def url_mudou(url_anterior):
+    """A URL atual é diferente de `url_anterior` (navegação concluída)"""
+    def _condicao(driver):
+        url = driver.current_url
+        return url if url != url_anterior else False
+    return _condicao
+
+
+def nova_janela(handles_antes):
+    """Uma nova guia/janela apareceu; retorna o handle dela"""
+    handles_antes = set(handles_antes)
+
+    def _condicao(driver):
+        novas = [h for h in driver.window_handles if h not in handles_antes]
+        return novas[0] if novas else False
+    return _condicao
+
+
+def iframe_carregado(css="iframe"):
+    """Existe um iframe com `src` definido e, se for do mesmo domínio, já carregado.
+
+    Retorna o elemento do iframe.
+    """
+    def _condicao(driver):
+        return driver.execute_script(
+            "var f = document.querySelector(arguments[0]);"
+            "if (!f || !f.getAttribute('src')) return null;"
+            "try {"
+            "  var doc = f.contentDocument;"
+            "  if (doc && doc.readyState !== 'complete') return null;"
+            "} catch (e) {}"
+            "return f;",
+            css
+        ) or False
+    return _condicao
+
+
+def atributo_mudou(css, atributo, valor_anterior):
+    """O atributo `atributo` do primeiro elemento `css` mudou de valor"""
+    def _condicao(driver):
+        valor = driver.execute_script(
+            "var e = document.querySelector(arguments[0]);"
+            "return e ? e.getAttribute(arguments[1]) : null;",
+            css, atributo
+        )
+        return valor is not None and valor != valor_anterior
+    return _condicao
+
+
+def video_registrado(duration_seg=None):
+    """Os campos hidden do portal indicam que o vídeo foi registrado"""
+    def _condicao(driver):
+        try:
+            done_flag = driver.execute_script(
+                "return document.getElementById('current-time-video')?.value || null;"
+            )
+            current_time = driver.execute_script(
+                "return document.getElementById('current-time-video-em-tempo')?.value || '';"
+            )
+        except Exception:
+            return False
+
+        if done_flag and str(done_flag).lower() == 'true':
+            return True
+
+        if duration_seg is not None:
+            try:
+                ct = int(str(current_time).strip() or '0')
+                return ct >= max(int(duration_seg) - 2, 1)
+            except Exception:
+                pass
+        return False
+    return _condicao
+
+
+def assinatura_timeline(driver):
+    """Retorna a assinatura atual dos cards visíveis da timeline"""
+    return driver.execute_script(_JS_ASSINATURA_TIMELINE)
+
+
+class lista_cards_estavel:
+    """A lista de cards visíveis da timeline parou de mudar.
+
+    Considera estável quando a mesma assinatura é observada por pelo menos
+    `janela` segundos. Se `assinatura_anterior` for informada, exige também
+    que a lista seja diferente dela (timeline re-renderizada após um filtro).
+    """
+
+    def __init__(self, janela=0.4, assinatura_anterior=None):
+        self.janela = janela
+        self.assinatura_anterior = assinatura_anterior
+        self._ultima = None
+        self._desde = None
+
+    def __call__(self, driver):
+        assinatura = assinatura_timeline(driver)
+        agora = time.monotonic()
+
+        if self.assinatura_anterior is not None and assinatura == self.assinatura_anterior:
+            return False
+
+        if assinatura != self._ultima:
+            self._ultima = assinatura
+            self._desde = agora
+            return False
+
+        return assinatura if agora - self._desde >= self.janela else False
+
+
+# ============================================================
+# ENGAJAMENTO VIA HTTP (requests.Session)
+# ============================================================
+
+# Diz se um link de seção do material externo já aparece como concluído no portal.
+# Só com `seletor` (PORTAL_SELETOR_SECAO_CONCLUIDA): sem ele, nenhuma seção é dada como
+# concluída pela página, porque um falso positivo pularia a seção sem engajamento. Olha o
+# próprio <a> e o item de lista/linha que contém só ele. Retorna o motivo (string) ou null.
+_JS_FN_SECAO_CONCLUIDA = """
+function secaoConcluida(link, seletor) {
+    if (!seletor) return null;
+    var alvos = [link];
+    var item = link.closest('li, tr');
+    if (item && item.querySelectorAll("a[target='_blank']").length === 1) alvos.push(item);
+    for (var j = 0; j < alvos.length; j++) {
+        if (alvos[j].matches(seletor) || alvos[j].querySelector(seletor)) return 'seletor ' + seletor;
+    }
+    return null;
+}
+"""
+
+# Links das seções do material externo com o estado de conclusão de cada um.
+# Argumento: seletor extra de conclusão (ou null).
+_JS_SECOES_MATERIAL = _JS_FN_SECAO_CONCLUIDA + """
+var links = document.querySelectorAll("details#detalhe a[target='_blank']");
+var secoes = [];
+for (var i = 0; i < links.length; i++) {
+    var nome = (links[i].innerText || '').trim();
+    if (!nome) continue;
+    secoes.push({nome: nome, elemento: links[i], concluida: secaoConcluida(links[i], arguments[0])});
+}
+return secoes;
+"""
+
+# Coleta, em uma única chamada, os links das seções do material externo com o
+# onclick de cada um, o estado de conclusão e o código-fonte de saveProgressoEngajamento.
+_JS_SECOES_ENGAJAMENTO = _JS_FN_SECAO_CONCLUIDA + """
+var links = document.querySelectorAll("details#detalhe a[target='_blank']");
+var secoes = [];
+for (var i = 0; i < links.length; i++) {
+    var nome = (links[i].innerText || '').trim();
+    if (!nome) continue;
+    secoes.push({
+        nome: nome, href: links[i].href, onclick: links[i].getAttribute('onclick') || '',
+        concluida: secaoConcluida(links[i], arguments[0])
+    });
+}
+var fn = window.saveProgressoEngajamento;
+return {secoes: secoes, fonte: fn ? fn.toString() : null, url_base: window.location.href};
+"""
+
+# Clica no link da seção com o target trocado pela guia (nomeada) já preparada; o onclick
+# roda normalmente e o href carrega nela. O target original é restaurado em seguida.
+_JS_CLICAR_NA_GUIA = """
+var link = arguments[0], alvo = link.getAttribute('target');
+link.setAttribute('target', arguments[1]);
+try { link.click(); } finally {
+    if (alvo === null) link.removeAttribute('target'); else link.setAttribute('target', alvo);
+}
+"""
+
+
+def parse_args_onclick(onclick, funcao="saveProgressoEngajamento"):
+    """Extrai os argumentos literais de uma chamada `funcao(...)` em um atributo onclick
+
+    Ex.: "saveProgressoEngajamento(123, 'abc', true); return true;" -> ['123', 'abc', 'true']
+
+    Returns:
+        list: Argumentos como strings, ou None se a chamada não foi encontrada
+    """
+    m = re.search(re.escape(funcao) + r"\s*\((.*?)\)\s*(?:;|$)", onclick or "", re.S)
+    if not m:
+        return None
+    args = []
+    for simples, dupla, literal in re.findall(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"|([^,\s][^,]*)", m.group(1)):
+        args.append(simples or dupla or literal.strip())
+    return args
+
+
+def parse_fonte_engajamento(fonte):
+    """Extrai URL, método HTTP e nomes dos parâmetros do código-fonte de saveProgressoEngajamento
+
+    Returns:
+        dict: {'url', 'metodo', 'parametros'} ou None se a URL não foi encontrada
+    """
+    if not fonte:
+        return None
+    url = re.search(r"url\s*:\s*['\"]([^'\"]+)['\"]", fonte) or \
+        re.search(r"\$\.(?:post|get|ajax)\(\s*['\"]([^'\"]+)['\"]", fonte) or \
+        re.search(r"fetch\(\s*['\"]([^'\"]+)['\"]", fonte)
+    if not url:
+        return None
+
+    metodo = re.search(r"(?:type|method)\s*:\s*['\"](\w+)['\"]", fonte)
+    if metodo:
+        metodo = metodo.group(1).upper()
+    elif re.search(r"\$\.get\(", fonte):
+        metodo = "GET"
+    else:
+        metodo = "POST"
+
+    assinatura = re.search(r"function\s*\w*\s*\(([^)]*)\)", fonte)
+    parametros = [p.strip() for p in assinatura.group(1).split(",") if p.strip()] if assinatura else []
+
+    return {'url': url.group(1), 'metodo': metodo, 'parametros': parametros}
+
+
+class MotorEngajamentoHTTP:
+    """Registra o engajamento das seções do material externo só com HTTP.
+
+    O navegador fica apenas com login e descoberta: os cookies da sessão Selenium são
+    copiados para um `requests.Session` com pool de conexões, e cada seção faz a chamada
+    equivalente ao onclick (`saveProgressoEngajamento`) e o GET do conteúdo, em paralelo
+    numa thread pool. Funciona contra qualquer servidor HTTP (inclusive um servidor local
+    de testes), já que URLs e cookies vêm de fora.
+    """
+
+    def __init__(self, engajamento=None, cookies=None, user_agent=None, max_workers=4, timeout=15, sessao=None):
+        """
+        Args:
+            engajamento (dict): {'url', 'metodo', 'parametros'} da chamada de engajamento;
+                None faz apenas o GET do conteúdo de cada seção
+            cookies (list): Cookies no formato de driver.get_cookies()
+            user_agent (str): User-Agent do navegador (mantém o servidor vendo o mesmo cliente)
+            max_workers (int): Seções processadas em paralelo (e tamanho do pool de conexões)
+            timeout (float): Timeout de cada requisição em segundos
+            sessao (requests.Session): Sessão já configurada (opcional)
+        """
+        self.engajamento = engajamento
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.logger = logging.getLogger('PortalBot')
+
+        self.sessao = sessao or requests.Session()
+        adaptador = requests.adapters.HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+        if user_agent:
+            self.sessao.headers['User-Agent'] = user_agent
+        for cookie in cookies or []:
+            self.sessao.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    @classmethod
+    def a_partir_do_driver(cls, driver, engajamento=None, **kwargs):
+        """Cria o motor copiando cookies e User-Agent da sessão Selenium"""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        return cls(engajamento=engajamento, cookies=driver.get_cookies(), user_agent=user_agent, **kwargs)
+
+    def engajar_secao(self, secao):
+        """Faz a chamada de engajamento e o GET do conteúdo de uma seção
+
+        Args:
+            secao (dict): {'nome', 'href', 'args'} ('args' = argumentos do onclick)
+
+        Returns:
+            dict: {'nome', 'ok', 'status', 'latencia_ms', 'erro'}
+        """
+        inicio = time.monotonic()
+        status = []
+        try:
+            if self.engajamento and secao.get('args') is not None:
+                nomes = self.engajamento['parametros']
+                dados = {
+                    (nomes[i] if i < len(nomes) else f"arg{i}"): valor
+                    for i, valor in enumerate(secao['args'])
+                }
+                if self.engajamento['metodo'] == "GET":
+                    r = self.sessao.get(self.engajamento['url'], params=dados, timeout=self.timeout)
+                else:
+                    r = self.sessao.post(self.engajamento['url'], data=dados, timeout=self.timeout)
+                status.append(r.status_code)
+                r.raise_for_status()
+
+            if secao.get('href'):
+                r = self.sessao.get(secao['href'], timeout=self.timeout)
+                status.append(r.status_code)
+                r.raise_for_status()
+
+            return {'nome': secao['nome'], 'ok': True, 'status': status,
+                    'latencia_ms': (time.monotonic() - inicio) * 1000, 'erro': None}
+
+        except Exception as e:
+            return {'nome': secao['nome'], 'ok': False, 'status': status,
+                    'latencia_ms': (time.monotonic() - inicio) * 1000, 'erro': str(e)}
+
+    def engajar(self, secoes):
+        """Processa todas as seções em paralelo e registra a latência de cada uma
+
+        Returns:
+            list: Resultados de `engajar_secao`, na ordem das seções
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            resultados = list(executor.map(self.engajar_secao, secoes))
+
+        for r in resultados:
+            if r['ok']:
+                self.logger.info(f"Engajamento HTTP: {r['nome']} -> {r['status']} em {r['latencia_ms']:.0f}ms")
+            else:
+                self.logger.warning(f"Engajamento HTTP falhou: {r['nome']} ({r['latencia_ms']:.0f}ms): {r['erro']}")
+        return resultados
+
+# ============================================================
+# REGISTRO DE EXECUÇÃO (SQLite em modo WAL)
+# ============================================================
+
+class RegistroExecucao:
+    """Registro persistente do que já foi processado: disciplinas, atividades, seções e vídeos.
+
+    Cada unidade tem uma chave estável (`RegistroExecucao.chave`), status, tentativas e
+    tempos. Ao reiniciar, o bot pula tudo que está 'concluida' e recomeça na primeira
+    unidade pendente. O banco usa WAL e busy_timeout, então vários workers (threads ou
+    processos, cada um com a sua conexão) podem gravar no mesmo arquivo. Chave None é
+    ignorada (unidade fora de uma disciplina/atividade registrada).
+    """
+
+    _ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS unidades (
+            chave TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            pai TEXT,
+            titulo TEXT,
+            status TEXT NOT NULL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            inicio REAL,
+            fim REAL,
+            duracao_s REAL,
+            erro TEXT,
+            atualizado_em TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS unidades_pai ON unidades (pai);
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str): Arquivo do banco (':memory:' = registro só desta execução)
+        """
+        self.caminho = caminho
+        self.logger = logging.getLogger('PortalBot')
+        self._lock = threading.Lock()
+        if caminho != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute("PRAGMA busy_timeout=30000")
+        self._conexao.executescript(self._ESQUEMA)
+
+    @staticmethod
+    def chave(*partes):
+        """Monta a chave estável de uma unidade (ex.: 'CW|Disciplina|CW1 - Título|secao:Seção 2')"""
+        return "|".join(str(p).strip() for p in partes)
+
+    def _executar(self, sql, parametros=()):
+        with self._lock, self._conexao:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def status(self, chave):
+        """Status gravado da unidade ('em_andamento', 'concluida', 'falhou') ou None"""
+        if chave is None:
+            return None
+        linhas = self._executar("SELECT status FROM unidades WHERE chave = ?", (chave,))
+        return linhas[0][0] if linhas else None
+
+    def concluida(self, chave, validade_s=None):
+        """True se a unidade está concluída (e, com `validade_s`, concluída há menos que isso)"""
+        if validade_s is None or chave is None:
+            return self.status(chave) == 'concluida'
+        linhas = self._executar("SELECT status, fim FROM unidades WHERE chave = ?", (chave,))
+        return bool(linhas) and linhas[0][0] == 'concluida' and time.time() - (linhas[0][1] or 0) < validade_s
+
+    def iniciar(self, chave, tipo, titulo=None, pai=None):
+        """Marca a unidade como em andamento e conta mais uma tentativa"""
+        if chave is None:
+            return
+        agora = time.time()
+        self._executar(
+            """
+            INSERT INTO unidades (chave, tipo, pai, titulo, status, tentativas, inicio, atualizado_em)
+            VALUES (?, ?, ?, ?, 'em_andamento', 1, ?, ?)
+            ON CONFLICT(chave) DO UPDATE SET
+                status = 'em_andamento', tentativas = tentativas + 1, inicio = excluded.inicio,
+                fim = NULL, duracao_s = NULL, erro = NULL, atualizado_em = excluded.atualizado_em
+            """,
+            (chave, tipo, pai, titulo, agora, datetime.now().isoformat(timespec='seconds'))
+        )
+
+    def _finalizar(self, chave, status, erro=None, tipo=None, titulo=None, pai=None):
+        if chave is None:
+            return
+        agora = time.time()
+        self._executar(
+            """
+            INSERT INTO unidades (chave, tipo, pai, titulo, status, fim, duracao_s, erro, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)
+            ON CONFLICT(chave) DO UPDATE SET
+                status = excluded.status, fim = excluded.fim, erro = excluded.erro,
+                duracao_s = CASE WHEN inicio IS NULL THEN 0 ELSE excluded.fim - inicio END,
+                atualizado_em = excluded.atualizado_em
+            """,
+            (chave, tipo or 'desconhecido', pai, titulo, status, agora, erro, datetime.now().isoformat(timespec='seconds'))
+        )
+
+    def concluir(self, chave, tipo=None, titulo=None, pai=None, erro=None):
+        """Marca a unidade como concluída (cria o registro se ela nunca foi iniciada)
+
+        `erro` aqui é só uma observação (ex.: 'já estava 100% no portal').
+        """
+        self._finalizar(chave, 'concluida', erro=erro, tipo=tipo, titulo=titulo, pai=pai)
+
+    def falhar(self, chave, erro=None):
+        """Marca a unidade como falha; ela é tentada de novo na próxima execução"""
+        self._finalizar(chave, 'falhou', erro=erro)
+
+    def resumo(self, pai=None, recursivo=False):
+        """Contagem por status (das unidades filhas de `pai`, ou de todas)
+
+        Args:
+            recursivo (bool): Conta também os netos (seções e vídeos das atividades...)
+
+        Returns:
+            dict: {status: quantidade}
+        """
+        if pai is None:
+            linhas = self._executar("SELECT status, COUNT(*) FROM unidades GROUP BY status")
+        elif recursivo:
+            linhas = self._executar(
+                """
+                WITH RECURSIVE descendentes(chave, status) AS (
+                    SELECT chave, status FROM unidades WHERE pai = ?
+                    UNION ALL
+                    SELECT u.chave, u.status FROM unidades u JOIN descendentes d ON u.pai = d.chave
+                )
+                SELECT status, COUNT(*) FROM descendentes GROUP BY status
+                """,
+                (pai,)
+            )
+        else:
+            linhas = self._executar("SELECT status, COUNT(*) FROM unidades WHERE pai = ? GROUP BY status", (pai,))
+        return dict(linhas)
+
+    def duracao_media(self, tipo, prefixo=None):
+        """Duração média (s) das unidades concluídas do tipo, opcionalmente com chave começando por `prefixo`
+
+        Ignora as concluídas sem tempo medido (ex.: já estavam 100% no portal).
+
+        Returns:
+            float: Média em segundos, ou None se não há histórico
+        """
+        sql = "SELECT AVG(duracao_s) FROM unidades WHERE tipo = ? AND status = 'concluida' AND duracao_s > 0"
+        parametros = [tipo]
+        if prefixo:
+            sql += " AND chave LIKE ?"
+            parametros.append(prefixo.replace('%', '') + '%')
+        return self._executar(sql, parametros)[0][0]
+
+    def pendente(self, chave):
+        """True se alguma unidade abaixo de `chave` falhou ou ficou em andamento"""
+        resumo = self.resumo(pai=chave, recursivo=True)
+        return bool(resumo.get('falhou') or resumo.get('em_andamento'))
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+# ============================================================
+# PROGRESSO (barramento de eventos com saídas plugáveis)
+# ============================================================
+
+# Tipos de evento de progresso e os campos esperados em `dados`
+TIPOS_EVENTO = {
+    'disciplina_iniciada': ('disciplina', 'modo'),
+    'disciplina_concluida': ('disciplina', 'modo', 'ok'),
+    'atividade_iniciada': ('titulo', 'indice', 'total'),
+    'atividade_concluida': ('titulo', 'ok'),
+    'atividade_pulada': ('titulo', 'motivo'),
+    'secao_iniciada': ('secao', 'indice', 'total'),
+    'secao_progresso': ('secao', 'percent'),
+    'secao_concluida': ('secao', 'indice', 'ok'),
+    'rolagem': ('rolagem', 'percent'),
+    'video_registrado': ('indice', 'total', 'registrado'),
+    'mensagem': ('texto',),
+}
+
+EventoProgresso = namedtuple('EventoProgresso', 'tipo dados momento')
+
+
+class SaidaProgresso:
+    """Saída (sink) do barramento de progresso, com throttling e coalescência próprios.
+
+    Eventos dos tipos em `coalescer` não são entregues um a um: só o mais recente de cada
+    chave (tipo + seção) fica pendente e sai no máximo a cada `intervalo` segundos. Os
+    demais tipos são entregues na hora. `tipos` restringe os eventos aceitos (None = todos).
+    Subclasses implementam `entregar(evento)`.
+    """
+
+    def __init__(self, intervalo=0.0, coalescer=('rolagem', 'secao_progresso'), tipos=None):
+        self.intervalo = intervalo
+        self.coalescer = set(coalescer or ())
+        self.tipos = set(tipos) if tipos else None
+        self._pendentes = {}
+        self._ultima_entrega = {}
+
+    def receber(self, evento):
+        if self.tipos is not None and evento.tipo not in self.tipos:
+            return
+        if evento.tipo in self.coalescer:
+            self._pendentes[(evento.tipo, evento.dados.get('secao'))] = evento
+            self.descarregar()
+        else:
+            # Mantém a ordem: o último passo coalescido sai antes do evento seguinte
+            self.descarregar(tudo=True)
+            self.entregar(evento)
+
+    def descarregar(self, tudo=False):
+        """Entrega os eventos coalescidos cujo intervalo já passou (todos, se `tudo`)"""
+        agora = time.monotonic()
+        for chave, evento in list(self._pendentes.items()):
+            if tudo or agora - self._ultima_entrega.get(chave, 0) >= self.intervalo:
+                del self._pendentes[chave]
+                self._ultima_entrega[chave] = agora
+                self.entregar(evento)
+
+    def entregar(self, evento):
+        raise NotImplementedError
+
+    def fechar(self):
+        self.descarregar(tudo=True)
+
+
+def formatar_evento(evento):
+    """Texto legível de um evento de progresso (console, log e chat)"""
+    d = evento.dados
+    if evento.tipo == 'disciplina_iniciada':
+        return f"📚 {d['disciplina']} [{d['modo']}] iniciada"
+    if evento.tipo == 'disciplina_concluida':
+        return f"{'✅' if d['ok'] else '⚠'} {d['disciplina']} [{d['modo']}] {'concluída' if d['ok'] else 'incompleta'}"
+    if evento.tipo == 'atividade_iniciada':
+        return f"▶ Atividade {d['indice']}/{d['total']}: {d['titulo']}"
+    if evento.tipo == 'atividade_concluida':
+        return f"{'✓' if d['ok'] else '⚠'} {d['titulo']} {'concluída' if d['ok'] else 'com problemas'}"
+    if evento.tipo == 'atividade_pulada':
+        return f"⏭ {d['titulo']} pulada ({d['motivo']})"
+    if evento.tipo == 'secao_iniciada':
+        return f"📖 Seção {d['indice']}/{d['total']}: {d['secao']}"
+    if evento.tipo == 'secao_progresso':
+        return f"  ↓ {d['secao']}: {d['percent']}%"
+    if evento.tipo == 'secao_concluida':
+        return f"{'✓' if d['ok'] else '✗'} Seção {d['indice']} {'concluída' if d['ok'] else 'falhou'}: {d['secao']}"
+    if evento.tipo == 'rolagem':
+        return f"  ✓ Rolagem #{d['rolagem']} - {d['percent']}%"
+    if evento.tipo == 'video_registrado':
+        return f"{'✓' if d['registrado'] else '⚠'} Vídeo {d['indice']}/{d['total']} {'registrado' if d['registrado'] else 'sem confirmação'}"
+    if evento.tipo == 'mensagem':
+        return d['texto']
+    return f"{evento.tipo}: {d}"
+
+
+class SaidaConsole(SaidaProgresso):
+    """Imprime os eventos no terminal; passos de rolagem saem no máximo 1x por segundo"""
+
+    def __init__(self, intervalo=1.0, **kwargs):
+        super().__init__(intervalo=intervalo, **kwargs)
+
+    def entregar(self, evento):
+        print(formatar_evento(evento))
+
+
+class SaidaLog(SaidaProgresso):
+    """Grava os eventos no logger 'PortalBot' (passos de rolagem/progresso e mensagens em DEBUG)"""
+
+    def __init__(self, intervalo=5.0, **kwargs):
+        super().__init__(intervalo=intervalo, **kwargs)
+        self.logger = logging.getLogger('PortalBot')
+
+    def entregar(self, evento):
+        # Mensagens ao usuário já têm a sua linha própria no log, gravada por quem as emitiu
+        nivel = logging.DEBUG if evento.tipo in ('rolagem', 'secao_progresso', 'mensagem') else logging.INFO
+        self.logger.log(nivel, formatar_evento(evento))
+
+
+class SaidaJsonl(SaidaProgresso):
+    """Acrescenta cada evento como uma linha JSON (para análise posterior)"""
+
+    def __init__(self, caminho, intervalo=0.0, **kwargs):
+        super().__init__(intervalo=intervalo, **kwargs)
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def entregar(self, evento):
+        linha = {'tipo': evento.tipo, 'momento': round(evento.momento, 3), **evento.dados}
+        self._arquivo.write(json.dumps(linha, ensure_ascii=False, default=str) + "\n")
+
+    def descarregar(self, tudo=False):
+        super().descarregar(tudo)
+        self._arquivo.flush()
+
+    def fechar(self):
+        super().fechar()
+        self._arquivo.close()
+
+
+class SaidaChat(SaidaProgresso):
+    """Repassa um resumo ao chat (ex.: Telegram) por `enviar(texto)`.
+
+    Todos os eventos são coalescidos num único estado: só o mais recente sai, no máximo a
+    cada `intervalo` segundos, respeitando o limite de mensagens do chat.
+    """
+
+    def __init__(self, enviar, intervalo=3.0, **kwargs):
+        super().__init__(intervalo=intervalo, **kwargs)
+        self.enviar = enviar
+
+    def receber(self, evento):
+        if self.tipos is not None and evento.tipo not in self.tipos:
+            return
+        self._pendentes[None] = evento
+        self.descarregar()
+
+    def entregar(self, evento):
+        self.enviar(formatar_evento(evento))
+
+
+class BarramentoProgresso:
+    """Barramento de eventos de progresso que nunca bloqueia quem emite.
+
+    `emitir` só coloca o evento numa fila (se a fila estiver cheia o evento é descartado e
+    contado); uma thread em segundo plano repassa os eventos para cada saída e, a cada
+    `tick` segundos, descarrega os eventos coalescidos. Uma saída com erro é registrada
+    no log e não derruba as outras.
+    """
+
+    def __init__(self, saidas=(), max_fila=10000, tick=0.5):
+        self.saidas = list(saidas)
+        self.tick = tick
+        self.descartados = 0
+        self.logger = logging.getLogger('PortalBot')
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = threading.Thread(target=self._laco, name="progresso", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def a_partir_do_ambiente(cls):
+        """Saídas de PORTAL_PROGRESSO_SAIDAS ('console,log,jsonl'; padrão 'console,log');
+        o JSON-lines vai para PORTAL_PROGRESSO_JSONL (padrão logs/progresso.jsonl)"""
+        nomes = [n.strip().lower() for n in os.getenv('PORTAL_PROGRESSO_SAIDAS', 'console,log').split(',') if n.strip()]
+        saidas = []
+        if 'console' in nomes:
+            saidas.append(SaidaConsole())
+        if 'log' in nomes:
+            saidas.append(SaidaLog())
+        if 'jsonl' in nomes:
+            saidas.append(SaidaJsonl(os.getenv('PORTAL_PROGRESSO_JSONL', os.path.join('logs', 'progresso.jsonl'))))
+        return cls(saidas)
+
+    def adicionar_saida(self, saida):
+        self._fila.put(('saida', saida))
+
+    def remover_saida(self, saida):
+        self._fila.put(('remover', saida))
+
+    def emitir(self, tipo, **dados):
+        """Publica um evento sem bloquear (tipos em TIPOS_EVENTO)"""
+        if tipo not in TIPOS_EVENTO:
+            raise ValueError(f"Tipo de evento de progresso desconhecido: {tipo}")
+        try:
+            self._fila.put_nowait(('evento', EventoProgresso(tipo, dados, time.time())))
+        except queue.Full:
+            self.descartados += 1
+
+    def esvaziar(self, timeout=2):
+        """Espera as saídas entregarem tudo o que já foi emitido (ex.: antes de um input())"""
+        entregue = threading.Event()
+        self._fila.put(('marco', entregue))
+        entregue.wait(timeout)
+
+    def _repassar(self, metodo, *args):
+        for saida in list(self.saidas):
+            try:
+                getattr(saida, metodo)(*args)
+            except Exception as e:
+                self.logger.warning(f"Saída de progresso {type(saida).__name__} falhou: {e}")
+
+    def _laco(self):
+        while True:
+            try:
+                comando, valor = self._fila.get(timeout=self.tick)
+            except queue.Empty:
+                self._repassar('descarregar')
+                continue
+
+            if comando == 'evento':
+                self._repassar('receber', valor)
+            elif comando == 'saida':
+                self.saidas.append(valor)
+            elif comando == 'marco':
+                self._repassar('descarregar', True)
+                valor.set()
+            elif comando == 'remover':
+                if valor in self.saidas:
+                    self.saidas.remove(valor)
+                    valor.fechar()
+            elif comando == 'fim':
+                self._repassar('fechar')
+                return
+
+    def fechar(self, timeout=5):
+        """Entrega o que está pendente em todas as saídas e encerra a thread"""
+        self._fila.put(('fim', None))
+        self._thread.join(timeout)
+        if self.descartados:
+            self.logger.warning(f"Barramento de progresso descartou {self.descartados} evento(s) (fila cheia)")
+
+
+# ============================================================
+# FASES (spans de tempo aninhados e relatório de desempenho)
+# ============================================================
+
+def _percentil(valores, p):
+    """Percentil por posição mais próxima (valores já ordenados)"""
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, max(0, math.ceil(p / 100 * len(valores)) - 1))]
+
+
+class MedidorFases:
+    """Mede fases aninhadas (login, filtros, atividade, seção, rolagem, vídeo...) de um PortalBot.
+
+    Cada thread tem a sua pilha de fases abertas, então os workers do pool não se misturam.
+    Fases estruturadas usam `fase()` (context manager) ou o decorador `medir_fase`; os
+    laços de atividades/seções, que têm várias saídas, usam `abrir_fase`/`fechar_fase`.
+    O relatório agrega por nome de fase (total, média, percentis), lista as unidades mais
+    lentas e traz os spans no formato Trace Event (abre em chrome://tracing ou Perfetto).
+    """
+
+    UNIDADES = ('atividade', 'secao', 'video')
+
+    def __init__(self):
+        self.inicio = datetime.now()
+        self._t0 = time.perf_counter()
+        self.spans = []
+        self._abertos = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _pilha(self):
+        if not hasattr(self._local, 'pilha'):
+            self._local.pilha = []
+        return self._local.pilha
+
+    def _agora(self):
+        return time.perf_counter() - self._t0
+
+    def abrir_fase(self, nome, **rotulos):
+        """Abre uma fase dentro da fase em andamento nesta thread"""
+        pilha = self._pilha()
+        span = {
+            'nome': nome, 'caminho': "/".join([s['nome'] for s in pilha] + [nome]), 'rotulos': rotulos,
+            'thread': threading.current_thread().name, 'inicio': self._agora(), 'duracao': None, 'ok': None,
+        }
+        pilha.append(span)
+        with self._lock:
+            self._abertos[id(span)] = span
+        return span
+
+    def _finalizar(self, span, ok=None, abortado=False):
+        span['duracao'] = self._agora() - span['inicio']
+        if ok is not None:
+            span['ok'] = ok
+        if abortado:
+            span['abortado'] = True
+        with self._lock:
+            self._abertos.pop(id(span), None)
+            self.spans.append(span)
+
+    def fechar_fase(self, nome=None, ok=None):
+        """Fecha a fase `nome` (e as filhas que ficaram abertas) ou, sem nome, a do topo
+
+        Returns:
+            dict: O span fechado, ou None se não havia fase com esse nome aberta
+        """
+        pilha = self._pilha()
+        if not pilha or (nome is not None and all(s['nome'] != nome for s in pilha)):
+            return None
+        while pilha:
+            span = pilha.pop()
+            if nome is None or span['nome'] == nome:
+                self._finalizar(span, ok)
+                return span
+            self._finalizar(span)
+
+    @contextmanager
+    def fase(self, nome, **rotulos):
+        """Context manager de uma fase; exceção marca ok=False"""
+        span = self.abrir_fase(nome, **rotulos)
+        try:
+            yield span
+        except BaseException:
+            span['ok'] = False
+            raise
+        finally:
+            pilha = self._pilha()
+            while span in pilha:
+                topo = pilha.pop()
+                self._finalizar(topo)
+
+    def registrar_fase(self, nome, duracao, ok=None, **rotulos):
+        """Registra uma fase já medida (ex.: seções intercaladas do modo concorrente)"""
+        pilha = self._pilha()
+        span = {
+            'nome': nome, 'caminho': "/".join([s['nome'] for s in pilha] + [nome]), 'rotulos': rotulos,
+            'thread': threading.current_thread().name, 'inicio': self._agora() - duracao,
+            'duracao': duracao, 'ok': ok,
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def relatorio(self):
+        """Monta o relatório; fases ainda abertas entram com a duração até agora e 'abortado'"""
+        agora = self._agora()
+        with self._lock:
+            abertos = [dict(s, duracao=agora - s['inicio'], abortado=True) for s in self._abertos.values()]
+            spans = self.spans + abertos
+
+        por_fase = {}
+        for s in spans:
+            por_fase.setdefault(s['nome'], []).append(s['duracao'])
+        fases = {}
+        for nome, duracoes in por_fase.items():
+            duracoes.sort()
+            fases[nome] = {
+                'quantidade': len(duracoes), 'total_s': round(sum(duracoes), 3),
+                'media_s': round(sum(duracoes) / len(duracoes), 3),
+                'p50_s': round(_percentil(duracoes, 50), 3), 'p90_s': round(_percentil(duracoes, 90), 3),
+                'p99_s': round(_percentil(duracoes, 99), 3), 'max_s': round(duracoes[-1], 3),
+            }
+
+        unidades = sorted((s for s in spans if s['nome'] in self.UNIDADES), key=lambda s: s['duracao'], reverse=True)
+        return {
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'duracao_s': round(agora, 3),
+            'abortado': bool(abertos),
+            'fases': dict(sorted(fases.items(), key=lambda f: f[1]['total_s'], reverse=True)),
+            'mais_lentas': [
+                {'fase': s['nome'], 'duracao_s': round(s['duracao'], 3), 'ok': s['ok'], **s['rotulos']}
+                for s in unidades[:10]
+            ],
+            'traceEvents': [
+                {
+                    'name': s['nome'], 'cat': s['caminho'], 'ph': 'X', 'pid': os.getpid(), 'tid': s['thread'],
+                    'ts': round(s['inicio'] * 1e6), 'dur': round(s['duracao'] * 1e6),
+                    'args': dict(s['rotulos'], ok=s['ok'], abortado=s.get('abortado', False)),
+                }
+                for s in sorted(spans, key=lambda s: s['inicio'])
+            ],
+        }
+
+    def resumo_texto(self, relatorio=None):
+        """Resumo legível: totais e percentis por fase e as unidades mais lentas"""
+        r = relatorio or self.relatorio()
+        linhas = [
+            f"⏱ Desempenho da execução ({r['duracao_s'] / 60:.1f} min{', ABORTADA' if r['abortado'] else ''})",
+            f"  {'fase':<28}{'n':>5}{'total':>10}{'média':>9}{'p50':>9}{'p90':>9}{'max':>9}",
+        ]
+        for nome, f in r['fases'].items():
+            linhas.append(
+                f"  {nome:<28}{f['quantidade']:>5}{f['total_s']:>9.1f}s{f['media_s']:>8.2f}s"
+                f"{f['p50_s']:>8.2f}s{f['p90_s']:>8.2f}s{f['max_s']:>8.2f}s"
+            )
+        if r['mais_lentas']:
+            linhas.append("  Unidades mais lentas:")
+            for u in r['mais_lentas']:
+                nome = u.get('titulo') or u.get('secao') or u.get('indice') or ''
+                linhas.append(f"    {u['duracao_s']:>8.1f}s  {u['fase']}: {nome}")
+        return "\n".join(linhas)
+
+    def salvar_relatorio(self, caminho, imprimir=True, informar=print):
+        """Grava o relatório JSON (de forma atômica) e, opcionalmente, mostra o resumo
+
+        `informar` recebe o texto a mostrar (o PortalBot passa o barramento de progresso).
+        """
+        relatorio = self.relatorio()
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, default=str)
+        os.replace(temporario, caminho)
+        if imprimir:
+            resumo = self.resumo_texto(relatorio)
+            informar("\n" + resumo)
+            logging.getLogger('PortalBot').info(resumo)
+            informar(f"📈 Relatório de desempenho: {caminho}")
+        return caminho
+
+
+def medir_fase(nome, capturar_falha=True):
+    """Decorador de métodos do PortalBot: mede a chamada como a fase `nome`
+
+    Retorno booleano vira o 'ok' da fase. Ao fim, a fase passa por `PortalBot._fim_de_fase`
+    (impressão da página no anel de capturas; captura completa se falhou). Use
+    `capturar_falha=False` em fases cujo False é um resultado normal.
+    """
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def medido(self, *args, **kwargs):
+            fases = getattr(self, 'fases', None)
+            if fases is None:
+                return metodo(self, *args, **kwargs)
+            try:
+                with fases.fase(nome) as span:
+                    resultado = metodo(self, *args, **kwargs)
+                    if isinstance(resultado, bool):
+                        span['ok'] = resultado
+            except Exception as e:
+                self._fim_de_fase(nome, False, erro=e, capturar_falha=capturar_falha)
+                raise
+            self._fim_de_fase(nome, resultado if isinstance(resultado, bool) else None, capturar_falha=capturar_falha)
+            return resultado
+        return medido
+    return decorador
+
+
+# ============================================================
+# COMANDOS DO WEBDRIVER (contagem e histogramas de latência)
+# ============================================================
+
+_CODIGOS_PORTALBOT = None
+
+
+def _codigos_portalbot():
+    """Code objects dos métodos do PortalBot (desembrulhando decoradores e properties), menos os auxiliares"""
+    global _CODIGOS_PORTALBOT
+    if _CODIGOS_PORTALBOT is None:
+        codigos = set()
+        for atributo in vars(PortalBot).values():
+            if isinstance(atributo, property):
+                atributo = atributo.fget
+            elif isinstance(atributo, (staticmethod, classmethod)):
+                atributo = atributo.__func__
+            while hasattr(atributo, '__wrapped__'):
+                atributo = atributo.__wrapped__
+            codigo = getattr(atributo, '__code__', None)
+            if codigo is not None and codigo.co_name not in ContadorComandos.IGNORAR:
+                codigos.add(codigo)
+        _CODIGOS_PORTALBOT = frozenset(codigos)
+    return _CODIGOS_PORTALBOT
+
+
+def _metodo_chamador():
+    """Nome do método do PortalBot (ou função deste arquivo) que originou o comando atual
+
+    Auxiliares (aguardar, pausar, tempo_limite_script...) são pulados: o comando é
+    atribuído ao primeiro método "de verdade" acima deles na pilha.
+    """
+    metodos = _codigos_portalbot()
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        codigo = frame.f_code
+        if codigo in metodos:
+            return codigo.co_name
+        if fallback is None and codigo.co_filename == __file__ and codigo.co_name not in ContadorComandos.IGNORAR:
+            fallback = codigo.co_name
+        frame = frame.f_back
+    return fallback or '?'
+
+
+class ContadorComandos:
+    """Conta todos os comandos WebDriver (ida e volta ao navegador) e mede a latência de cada um.
+
+    `instrumentar(driver)` envolve `driver.execute`, por onde passam todos os comandos,
+    inclusive os de WebElement (.text, get_attribute, click...). Cada comando é contado
+    por tipo ('findElement', 'getElementText', 'executeScript', 'getWindowHandles'...) e
+    pelo método do PortalBot que o chamou, com histograma de latência em faixas de ms.
+    """
+
+    LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+    IGNORAR = frozenset((
+        'execute', 'medido', 'driver', 'wait', '_metodo_chamador', '<lambda>', '<genexpr>', '<listcomp>',
+        'aguardar', 'pausar', 'tempo_limite_script', '_condicao',
+    ))
+    _instancias = weakref.WeakSet()
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.por_comando = {}
+        self.por_metodo = {}
+        self._lock = threading.Lock()
+        ContadorComandos._instancias.add(self)
+
+    def instrumentar(self, driver):
+        """Passa a contar os comandos de `driver` (idempotente)"""
+        if getattr(driver, '_contador_comandos', None) is self:
+            return driver
+        original = driver.execute
+        contador = self
+
+        def execute(driver_command, params=None):
+            inicio = time.perf_counter()
+            try:
+                return original(driver_command, params)
+            finally:
+                contador.registrar(driver_command, (time.perf_counter() - inicio) * 1000, _metodo_chamador())
+
+        driver.execute = execute
+        driver._contador_comandos = self
+        return driver
+
+    def registrar(self, comando, ms, metodo):
+        faixa = bisect.bisect_left(self.LIMITES_MS, ms)
+        with self._lock:
+            c = self.por_comando.get(comando)
+            if c is None:
+                c = self.por_comando[comando] = {'n': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'hist': [0] * (len(self.LIMITES_MS) + 1)}
+            c['n'] += 1
+            c['total_ms'] += ms
+            c['max_ms'] = max(c['max_ms'], ms)
+            c['hist'][faixa] += 1
+
+            m = self.por_metodo.setdefault(metodo, {})
+            mc = m.setdefault(comando, {'n': 0, 'total_ms': 0.0})
+            mc['n'] += 1
+            mc['total_ms'] += ms
+
+    def relatorio(self):
+        """Contagens por comando (com histograma) e por método, ordenadas pelo tempo gasto"""
+        rotulos = [f"<={l}ms" for l in self.LIMITES_MS] + [f">{self.LIMITES_MS[-1]}ms"]
+        with self._lock:
+            comandos = {
+                nome: {
+                    'n': c['n'], 'total_ms': round(c['total_ms'], 1), 'media_ms': round(c['total_ms'] / c['n'], 2),
+                    'max_ms': round(c['max_ms'], 1),
+                    'histograma': {r: q for r, q in zip(rotulos, c['hist']) if q},
+                }
+                for nome, c in self.por_comando.items()
+            }
+            metodos = {
+                nome: {
+                    'n': sum(c['n'] for c in cmds.values()),
+                    'total_ms': round(sum(c['total_ms'] for c in cmds.values()), 1),
+                    'comandos': {k: v['n'] for k, v in sorted(cmds.items(), key=lambda kv: -kv[1]['n'])},
+                }
+                for nome, cmds in self.por_metodo.items()
+            }
+        return {
+            'duracao_s': round(time.monotonic() - self.inicio, 1),
+            'total_comandos': sum(c['n'] for c in comandos.values()),
+            'total_ms': round(sum(c['total_ms'] for c in comandos.values()), 1),
+            'por_comando': dict(sorted(comandos.items(), key=lambda kv: -kv[1]['total_ms'])),
+            'por_metodo': dict(sorted(metodos.items(), key=lambda kv: -kv[1]['total_ms'])),
+        }
+
+    def resumo_texto(self, relatorio=None, limite=12):
+        r = relatorio or self.relatorio()
+        linhas = [
+            f"🔁 Comandos WebDriver: {r['total_comandos']} em {r['total_ms'] / 1000:.1f}s de ida e volta "
+            f"({r['duracao_s']:.0f}s de execução)",
+            f"  {'comando':<32}{'n':>7}{'total':>10}{'média':>10}{'max':>10}",
+        ]
+        for nome, c in list(r['por_comando'].items())[:limite]:
+            linhas.append(
+                f"  {nome:<32}{c['n']:>7}{c['total_ms'] / 1000:>9.1f}s{c['media_ms']:>8.1f}ms{c['max_ms']:>8.0f}ms"
+            )
+        linhas.append("  Por método:")
+        for nome, m in list(r['por_metodo'].items())[:limite]:
+            principais = ", ".join(f"{k} {v}" for k, v in list(m['comandos'].items())[:3])
+            linhas.append(f"    {nome:<40}{m['n']:>7}{m['total_ms'] / 1000:>9.1f}s  ({principais})")
+        return "\n".join(linhas)
+
+    def salvar(self, caminho, imprimir=True, informar=print):
+        """Grava o relatório JSON e, opcionalmente, mostra o resumo (texto vai para `informar`)"""
+        relatorio = self.relatorio()
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=1)
+        if imprimir:
+            resumo = self.resumo_texto(relatorio)
+            informar("\n" + resumo)
+            logging.getLogger('PortalBot').info(resumo)
+            informar(f"📈 Comandos WebDriver: {caminho}")
+        return caminho
+
+    @classmethod
+    def despejar_todos(cls, *_):
+        """Mostra o resumo de todos os contadores ativos no log (handler de SIGUSR1)"""
+        for contador in list(cls._instancias):
+            logging.getLogger('PortalBot').info("\n" + contador.resumo_texto())
+
+
+# ============================================================
+# CAPTURAS DE DEPURAÇÃO (anel de impressões + HTML/screenshot em falhas)
+# ============================================================
+
+# Impressão leve da página atual, em um único execute_script (sem page_source).
+_JS_IMPRESSAO_PAGINA = """
+var corpo = document.body;
+return {
+    url: location.href,
+    titulo: document.title,
+    pronto: document.readyState,
+    altura: Math.max(corpo ? corpo.scrollHeight : 0, document.documentElement.scrollHeight),
+    cards: document.querySelectorAll("li.atividades[data-show='true']").length,
+    secoes: document.querySelectorAll("details#detalhe a[target='_blank']").length,
+    iframes: document.querySelectorAll('iframe').length,
+    texto: corpo ? corpo.textContent.length : 0
+};
+"""
+
+
+class CapturasDepuracao:
+    """Capturas de depuração sob demanda, gravadas em segundo plano com cota de disco.
+
+    Ao fim das fases de disciplina/atividade (FASES_IMPRESSAO), uma impressão leve da página
+    (URL, título, readyState, altura, cards, seções, iframes) entra num anel em memória de
+    tamanho fixo; nada vai para o disco. Fases frequentes (vídeo, seek, rolagem, seção) não
+    pagam essa ida ao navegador.
+    Só quando uma fase falha, ou num pedido explícito (`capturar`), o HTML e o screenshot são
+    lidos do navegador (na thread do bot, dona do driver) e entregues a uma thread própria,
+    que grava o HTML e o rastro de impressões com gzip e apaga as capturas mais antigas
+    quando a pasta passa da cota.
+    """
+
+    # Fases (de `medir_fase`) que deixam uma impressão no anel ao terminar
+    FASES_IMPRESSAO = frozenset({
+        'login', 'entrar_curso', 'listar_disciplinas', 'acessar_disciplina', 'estimar_disciplina',
+        'filtro', 'abrir_atividade', 'secoes_material', 'secoes_http', 'videos_teleaula',
+        'voltar_timeline', 'recuperar_sessao', 'reciclar_driver',
+    })
+
+    def __init__(self, pasta, max_impressoes=50, cota_mb=50, screenshot=True, intervalo_min=5.0, max_fila=8):
+        """
+        Args:
+            pasta (str): Pasta das capturas (só delas: a poda apaga os arquivos mais antigos)
+            max_impressoes (int): Tamanho do anel de impressões (0 = não registra impressões)
+            cota_mb (float): Espaço máximo da pasta em MB
+            screenshot (bool): Também salva o screenshot (PNG) em cada captura
+            intervalo_min (float): Falhas em cascata na mesma URL dentro deste intervalo (s)
+                geram uma única captura
+            max_fila (int): Capturas aguardando gravação; acima disso são descartadas
+        """
+        self.pasta = pasta
+        self.max_impressoes = max(0, max_impressoes)
+        self.impressoes = deque(maxlen=max(1, self.max_impressoes))
+        self.cota_bytes = int(cota_mb * 1024 * 1024)
+        self.screenshot = screenshot
+        self.intervalo_min = intervalo_min
+        self.gravadas = 0
+        self.descartadas = 0
+        self.logger = logging.getLogger('PortalBot')
+        self._ultima_captura = (None, 0.0)
+        self._fila = queue.Queue(maxsize=max(1, max_fila))
+        self._thread = threading.Thread(
+            target=self._laco, name=f"capturas-{threading.current_thread().name}", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def a_partir_do_ambiente(cls):
+        """Configuração por PORTAL_CAPTURAS_PASTA, _MAX_MB, _IMPRESSOES e _SCREENSHOT"""
+        return cls(
+            pasta=os.getenv('PORTAL_CAPTURAS_PASTA', os.path.join('logs', 'capturas')),
+            max_impressoes=_env_int('PORTAL_CAPTURAS_IMPRESSOES', 50),
+            cota_mb=_env_int('PORTAL_CAPTURAS_MAX_MB', 50),
+            screenshot=_env_bool('PORTAL_CAPTURAS_SCREENSHOT', True),
+        )
+
+    def registrar(self, driver, contexto, ok=None):
+        """Acrescenta ao anel uma impressão da página atual de `driver`
+
+        Returns:
+            dict: A impressão registrada, ou None se o anel está desligado
+        """
+        if driver is None or not self.max_impressoes:
+            return None
+        try:
+            impressao = driver.execute_script(_JS_IMPRESSAO_PAGINA) or {}
+        except Exception as e:
+            impressao = {'erro_impressao': str(e).splitlines()[0][:200] if str(e) else type(e).__name__}
+        impressao.update(contexto=contexto, ok=ok, quando=datetime.now().isoformat(timespec='milliseconds'))
+        self.impressoes.append(impressao)
+        return impressao
+
+    def capturar(self, driver, motivo, erro=None, forcar=False):
+        """Lê HTML e screenshot da página atual e agenda a gravação em segundo plano
+
+        Args:
+            motivo (str): Fase que falhou ou nome do pedido explícito (vai no nome dos arquivos)
+            erro (Exception|str): Erro que motivou a captura, se houver
+            forcar (bool): Ignora o intervalo mínimo entre capturas da mesma URL
+
+        Returns:
+            str: Caminho base dos arquivos (sem extensão), ou None se a captura foi pulada
+        """
+        if driver is None:
+            return None
+        impressao = self.registrar(driver, motivo, ok=False) or {}
+        url = impressao.get('url')
+        agora = time.monotonic()
+        ultima_url, ultima_em = self._ultima_captura
+        if not forcar and url == ultima_url and agora - ultima_em < self.intervalo_min:
+            self.logger.debug(f"Captura de '{motivo}' pulada (mesma página capturada há {agora - ultima_em:.1f}s)")
+            return None
+        self._ultima_captura = (url, agora)
+
+        html = png = None
+        try:
+            html = driver.page_source
+        except Exception as e:
+            self.logger.debug(f"Captura sem HTML: {e}")
+        if self.screenshot:
+            try:
+                png = driver.get_screenshot_as_png()
+            except Exception as e:
+                self.logger.debug(f"Captura sem screenshot: {e}")
+
+        nome = re.sub(r"[^\w.-]+", "_", motivo).strip("_") or "captura"
+        prefixo = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{threading.current_thread().name}_{nome}"
+        dados = {
+            'motivo': motivo, 'erro': str(erro) if erro is not None else None, 'url': url,
+            'impressoes': list(self.impressoes),
+        }
+        try:
+            self._fila.put_nowait((prefixo, html, png, dados))
+        except queue.Full:
+            self.descartadas += 1
+            self.logger.warning(f"Captura de depuração descartada (gravação atrasada): {motivo}")
+            return None
+        return os.path.join(self.pasta, prefixo)
+
+    def _laco(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                break
+            try:
+                self._gravar(*item)
+            except Exception as e:
+                self.logger.warning(f"Não foi possível gravar a captura de depuração: {e}")
+
+    def _gravar(self, prefixo, html, png, dados):
+        os.makedirs(self.pasta, exist_ok=True)
+        base = os.path.join(self.pasta, prefixo)
+        if html is not None:
+            with gzip.open(base + '.html.gz', 'wt', encoding='utf-8', compresslevel=6) as f:
+                f.write(html)
+        if png:
+            # PNG já é comprimido; gzip não ganharia nada
+            with open(base + '.png', 'wb') as f:
+                f.write(png)
+        with gzip.open(base + '.json.gz', 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(dados, f, ensure_ascii=False, default=str)
+        self.gravadas += 1
+        self.logger.info(f"📸 Captura de depuração ({dados['motivo']}): {base}.*")
+        self._podar()
+
+    def _podar(self):
+        """Apaga os arquivos mais antigos da pasta até caber na cota"""
+        arquivos = []
+        for nome in os.listdir(self.pasta):
+            caminho = os.path.join(self.pasta, nome)
+            try:
+                st = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            arquivos.append((st.st_mtime, st.st_size, caminho))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        removidos = 0
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.cota_bytes:
+                break
+            try:
+                os.remove(caminho)
+                removidos += 1
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+        if removidos:
+            self.logger.debug(f"Capturas de depuração: {removidos} arquivo(s) antigo(s) removido(s) pela cota")
+
+    def fechar(self, timeout=10):
+        """Espera as capturas pendentes serem gravadas e encerra a thread"""
+        self._fila.put(None)
+        self._thread.join(timeout)
+
+
+# Padrões de URL bloqueados via CDP (Network.setBlockedURLs), por tipo de página.
+# O bot só precisa do DOM e das chamadas de engajamento; imagens, fontes e
+# rastreadores só gastam banda e memória do renderer.
+PERFIS_BLOQUEIO = {
+    'comum': [
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*',
+        '*newrelic.com*', '*nr-data.net*',
+    ],
+    'timeline': [],
+    'secao': ['*.mp4', '*.webm', '*.mp3', '*youtube.com/embed*', '*vimeo.com*'],
+    # Na Teleaula o player (mdstrm) precisa de scripts, manifestos e segmentos de vídeo
+    'teleaula': [],
+}
+
+
+def _env_bool(nome, padrao=False):
+    """Lê uma variável de ambiente booleana ('1', 'true', 'sim', 'yes', 'on')"""
+    valor = os.getenv(nome)
+    if valor is None or not valor.strip():
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'sim', 's', 'yes', 'y', 'on')
+
+
+def _env_int(nome, padrao):
+    """Lê uma variável de ambiente inteira, usando `padrao` se ausente ou inválida"""
+    try:
+        return int(os.getenv(nome, '').strip())
+    except ValueError:
+        return padrao
+
+# ============================================================
+# LOGGING (QueueHandler + QueueListener, rotação com gzip)
+# ============================================================
+
+_LOG_LOCK = threading.Lock()
+_LOG_LISTENER = None
+_LOG_ARQUIVO = None
+
+
+def _comprimir_log_rotacionado(origem, destino):
+    """Rotator do RotatingFileHandler: grava o arquivo rotacionado como .gz"""
+    with open(origem, 'rb') as f_in, gzip.open(destino, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(origem)
+
+
+def configurar_logging(nivel=None):
+    """Configura o logger 'PortalBot' uma única vez por processo (idempotente)
+
+    O logger só recebe um QueueHandler; arquivo e console ficam num QueueListener em
+    thread própria, então gravar/rotacionar/comprimir não atrasa o bot. O arquivo
+    logs/bot_portal.log rotaciona por tamanho (PORTAL_LOG_MAX_MB, padrão 10) e guarda
+    PORTAL_LOG_ARQUIVOS cópias comprimidas (padrão 5). Cada linha leva o nome da thread,
+    o que separa os workers do pool no mesmo arquivo.
+
+    Args:
+        nivel (str|int): Nível do logger (padrão: env PORTAL_LOG_NIVEL ou INFO). Em DEBUG
+            aparecem as esperas, passos de rolagem e detalhes de cada guia; chamadas
+            seguintes só ajustam o nível, e sem `nivel` não mudam nada.
+
+    Returns:
+        str: Caminho do arquivo de log
+    """
+    global _LOG_LISTENER, _LOG_ARQUIVO
+
+    logger = logging.getLogger('PortalBot')
+    with _LOG_LOCK:
+        if nivel is None and _LOG_LISTENER is not None:
+            return _LOG_ARQUIVO
+
+        nivel = nivel or os.getenv('PORTAL_LOG_NIVEL', 'INFO')
+        if isinstance(nivel, str):
+            nivel = logging.getLevelName(nivel.strip().upper())
+            if not isinstance(nivel, int):
+                nivel = logging.INFO
+        logger.setLevel(nivel)
+        if _LOG_LISTENER is not None:
+            return _LOG_ARQUIVO
+
+        os.makedirs('logs', exist_ok=True)
+        _LOG_ARQUIVO = os.path.join('logs', 'bot_portal.log')
+
+        formatter = logging.Formatter('%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            _LOG_ARQUIVO, maxBytes=_env_int('PORTAL_LOG_MAX_MB', 10) * 1024 * 1024,
+            backupCount=_env_int('PORTAL_LOG_ARQUIVOS', 5), encoding='utf-8'
+        )
+        file_handler.namer = lambda nome: nome + '.gz'
+        file_handler.rotator = _comprimir_log_rotacionado
+        file_handler.setFormatter(formatter)
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        fila = queue.Queue(-1)
+        logger.handlers = [logging.handlers.QueueHandler(fila)]
+        logger.propagate = False
+
+        _LOG_LISTENER = logging.handlers.QueueListener(
+            fila, file_handler, console_handler, respect_handler_level=True
+        )
+        _LOG_LISTENER.start()
+        atexit.register(_LOG_LISTENER.stop)
+        return _LOG_ARQUIVO
+
+
+class NavegadorPerdido(RuntimeError):
+    """O navegador foi trocado e o novo não conseguiu refazer a sessão: a unidade em
+    andamento (disciplina) não tem como continuar"""
+
+
 class PortalBot:
     """Bot para automação do portal ColaboraRead"""
 
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, navegacao_direta=None, max_abas_secoes=None, progresso=None):
         """
         Inicializa o bot
 
         Args:
             headless (bool): Se True, executa sem abrir janela do navegador
+            navegacao_direta (bool): Se True, abre cada atividade pela URL do seu botão
+                (lida da timeline uma única vez) em vez de voltar para a timeline e
+                reaplicar filtros entre atividades. Padrão: env PORTAL_NAVEGACAO_DIRETA
+            max_abas_secoes (int): Quantas guias de seção do material externo abrir e rolar
+                ao mesmo tempo (1 = sequencial). Padrão: env PORTAL_SECOES_CONCORRENTES
+            progresso (BarramentoProgresso): Barramento compartilhado (ex.: workers do pool);
+                None cria um próprio, encerrado em `fechar`
         """
-        self.url_login = "https://www.colaboraread.com.br/login/auth"
+        # PORTAL_URL_BASE aponta o bot para outro servidor (ex.: o portal simulado do benchmark)
+        self.url_base = os.getenv('PORTAL_URL_BASE', 'https://www.colaboraread.com.br').rstrip('/')
+        self.url_login = urljoin(self.url_base + '/', 'login/auth')
         self.username = os.getenv('PORTAL_USERNAME')
         self.password = os.getenv('PORTAL_PASSWORD')
-
-        # Configurar sistema de logs
-        self._configurar_logs()
-
-        # Validar credenciais
+        # Validar credenciais antes de qualquer navegador ser iniciado
         if not self.username or not self.password:
             raise ValueError(
                 "Credenciais não encontradas! Configure as variáveis de ambiente:\n"
                 "PORTAL_USERNAME e PORTAL_PASSWORD"
             )
+        if navegacao_direta is None:
+            navegacao_direta = _env_bool('PORTAL_NAVEGACAO_DIRETA')
+        self.navegacao_direta = navegacao_direta
+        self.engajamento_http = _env_bool('PORTAL_ENGAJAMENTO_HTTP')
+        self.arquivo_sessao = os.getenv('PORTAL_ARQUIVO_SESSAO', os.path.join('sessao', 'cookies.json'))
+        if max_abas_secoes is None:
+            max_abas_secoes = _env_int('PORTAL_SECOES_CONCORRENTES', 1)
+        self.max_abas_secoes = max(1, max_abas_secoes)
+
+        # Bloqueio de rede (imagens, fontes, rastreadores) via CDP
+        self.headless = headless
+        self.bloqueio_rede = _env_bool('PORTAL_BLOQUEIO_REDE', True)
+        self.bloqueio_extra = [p.strip() for p in os.getenv('PORTAL_BLOQUEIO_EXTRA', '').split(',') if p.strip()]
+        # Contagem de requisições bloqueadas x permitidas: liga o log de performance do driver,
+        # que acumula eventos de rede até ser lido (drenado a cada atividade)
+        self.contar_rede = self.bloqueio_rede and _env_bool('PORTAL_CONTAR_REDE', False)
+        self.estatisticas_rede = {'bloqueadas': 0, 'permitidas': 0}
+
+        # Inicializar driver em segundo plano (já na página de login) enquanto o resto é configurado;
+        # com PORTAL_DRIVER_RESERVA=1 um segundo navegador fica pronto para recuperar_sessao
+        self._inicio = time.monotonic()
+        self.latencias = {'inicializacao': None, 'recuperacoes': []}
+        self.fases = MedidorFases()
+        self.comandos = ContadorComandos() if _env_bool('PORTAL_CONTAR_COMANDOS', True) else None
+        # Capturas de depuração: HTML/screenshot só quando uma fase falha (PORTAL_CAPTURAS=0 desliga tudo)
+        self.capturas = CapturasDepuracao.a_partir_do_ambiente() if _env_bool('PORTAL_CAPTURAS', True) else None
+        self.usar_driver_reserva = _env_bool('PORTAL_DRIVER_RESERVA')
+        self._executor_driver = ThreadPoolExecutor(max_workers=2, thread_name_prefix="driver")
+        self._driver = None
+        self._wait = None
+        self._wait_driver = None  # driver para o qual `_wait` foi criado
+        self._driver_reserva = None
+        self._driver_futuro = self._executor_driver.submit(self._novo_driver, True)
 
-        # Configurar opções do Edge
-        edge_options = Options()
-        if headless:
-            edge_options.add_argument('--headless')
-        edge_options.add_argument('--no-sandbox')
-        edge_options.add_argument('--disable-dev-shm-usage')
+        # Configurar sistema de logs
+        self._configurar_logs()
 
-        # Inicializar driver
-        self.driver = webdriver.Edge(options=edge_options)
-        self.wait = WebDriverWait(self.driver, 10)  # Reduzido de 15 para 10 segundos
+        # Barramento de progresso: eventos saem numa thread própria (console, log, JSON-lines, chat)
+        self._progresso_proprio = progresso is None
+        self.progresso = progresso if progresso is not None else BarramentoProgresso.a_partir_do_ambiente()
+
+        # Relatório de fases, regravado ao fim de cada disciplina e no encerramento
+        self.arquivo_relatorio = os.path.join(
+            'logs', f"desempenho_{self.fases.inicio:%Y%m%d_%H%M%S}_{threading.current_thread().name}.json"
+        )
+
+        # Governador de memória (0 = desligado)
+        self.memoria_max_mb = _env_int('PORTAL_MEMORIA_MAX_MB', 0)
+
+        # Registro de execução (SQLite): o que já foi concluído é pulado ao reiniciar
+        caminho_registro = os.getenv('PORTAL_REGISTRO', os.path.join('sessao', 'registro.sqlite3')).strip()
+        self.registro = RegistroExecucao(caminho_registro if caminho_registro not in ('', '0') else ':memory:')
+        self.chave_disciplina = None
+        self.chaves_disciplina = {}  # tipo -> chave da disciplina (execução com vários tipos)
+        self.chave_atividade = None
+        self.seletor_secao_concluida = os.getenv('PORTAL_SELETOR_SECAO_CONCLUIDA') or None
+        # Disciplina concluída só é pulada por esse tempo; depois a timeline é relida (atividades novas)
+        self.validade_disciplina_s = _env_int('PORTAL_REVALIDAR_DISCIPLINA_H', 12) * 3600
+
+        # Pedido de cancelamento vindo de fora (ex.: /cancelar no Telegram), checado entre atividades
+        self.cancelamento = threading.Event()
 
         # NOVO: Rastreamento de progresso (Baby Step 2)
         self.disciplina_atual = None
         self.atividade_atual_index = 0
         self.total_atividades = 0
+        self.atividade_atual = None
+
+        # Snapshot da timeline (lista de cards), relido quando a timeline muda
+        self._snapshot_timeline = None
+
+        # Métricas de cada vídeo assistido (modo de seek, tempo e comandos)
+        self.estatisticas_videos = []
 
         self.logger.info("Bot inicializado com sucesso!")
-        print("✓ Bot inicializado com sucesso!")
+        self.informar("✓ Bot inicializado com sucesso!")
+
+    def informar(self, texto):
+        """Mensagem ao usuário, pelo barramento de progresso (não se mistura com os eventos no console)"""
+        self.progresso.emitir('mensagem', texto=texto)
+
+    @property
+    def driver(self):
+        """WebDriver atual; no primeiro acesso aguarda o navegador iniciado em segundo plano"""
+        if self._driver is None and self._driver_futuro is not None:
+            futuro, self._driver_futuro = self._driver_futuro, None
+            self._adotar_driver(futuro.result())
+            self.latencias['inicializacao'] = time.monotonic() - self._inicio
+            self.logger.info(f"⏱ Navegador pronto na página de login {self.latencias['inicializacao']:.2f}s após o início")
+        return self._driver
+
+    @property
+    def wait(self):
+        """WebDriverWait padrão (10s) do driver atual"""
+        driver = self.driver
+        if self._wait is None or self._wait_driver is not driver:
+            self._wait = WebDriverWait(driver, 10)  # Reduzido de 15 para 10 segundos
+            self._wait_driver = driver
+        return self._wait
+
+    def _novo_driver(self, ir_para_login=False):
+        """Cria um WebDriver do Edge com as opções do bot e o bloqueio de rede 'comum'
+
+        Pode rodar numa thread em segundo plano (inicialização e driver reserva).
 
-    def _configurar_logs(self):
-        """Configura o sistema de logging"""
-        # Criar pasta de logs se não existir
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
+        Args:
+            ir_para_login (bool): Já deixa o navegador carregado na página de login
+        """
+        edge_options = Options()
+        if self.headless:
+            edge_options.add_argument('--headless')
+        edge_options.add_argument('--no-sandbox')
+        edge_options.add_argument('--disable-dev-shm-usage')
+        if self.contar_rede:
+            # Log de performance: de onde saem as contagens de requisições bloqueadas/permitidas
+            edge_options.set_capability('ms:loggingPrefs', {'performance': 'ALL'})
+
+        driver = webdriver.Edge(options=edge_options)
+        if self.bloqueio_rede:
+            try:
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': PERFIS_BLOQUEIO['comum'] + self.bloqueio_extra})
+            except Exception as e:
+                logging.getLogger('PortalBot').warning(f"Não foi possível aplicar o bloqueio de rede 'comum': {e}")
+        if ir_para_login:
+            driver.get(self.url_login)
+        return driver
+
+    def _adotar_driver(self, driver):
+        """Passa a usar `driver` como navegador do bot e agenda um novo reserva, se configurado"""
+        self._driver = self.comandos.instrumentar(driver) if self.comandos else driver
+        self._wait = None
+        self._perfil_por_guia = {}
+        if self.bloqueio_rede:
+            try:
+                self._perfil_por_guia[driver.current_window_handle] = 'comum'
+            except Exception:
+                pass
+        self._agendar_driver_reserva()
+
+    def _agendar_driver_reserva(self):
+        """Inicia em segundo plano um navegador reserva, já na página de login (PORTAL_DRIVER_RESERVA)"""
+        if self.usar_driver_reserva and self._driver_reserva is None:
+            self._driver_reserva = self._executor_driver.submit(self._novo_driver, True)
+            self.logger.info("Navegador reserva sendo preparado em segundo plano")
+
+    def _criar_driver(self):
+        """Troca o navegador atual por um novo: usa o reserva quente se houver, senão cria na hora"""
+        driver = None
+        if self._driver_reserva is not None:
+            futuro, self._driver_reserva = self._driver_reserva, None
+            try:
+                driver = futuro.result()
+                self.logger.info("Usando o navegador reserva pré-aquecido")
+            except Exception as e:
+                self.logger.warning(f"Navegador reserva falhou ao iniciar: {e}")
 
-        # Nome do arquivo com timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_filename = f"logs/bot_portal_{timestamp}.log"
+        if driver is None:
+            driver = self._novo_driver()
+        self._adotar_driver(driver)
 
-        # Configurar logging
+    def aplicar_perfil_bloqueio(self, tipo_pagina):
+        """Aplica na guia atual os padrões de bloqueio de rede do tipo de página
+
+        Args:
+            tipo_pagina (str): 'comum', 'timeline', 'secao' ou 'teleaula' (ver PERFIS_BLOQUEIO)
+        """
+        if not self.bloqueio_rede:
+            return
+        try:
+            guia = self.driver.current_window_handle
+            if self._perfil_por_guia.get(guia) == tipo_pagina:
+                return
+
+            padroes = PERFIS_BLOQUEIO['comum'] + PERFIS_BLOQUEIO.get(tipo_pagina, []) + self.bloqueio_extra
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': padroes})
+            self._perfil_por_guia[guia] = tipo_pagina
+            self.logger.debug(f"Perfil de bloqueio '{tipo_pagina}' aplicado ({len(padroes)} padrões)")
+            self.contar_requisicoes_rede()
+        except Exception as e:
+            self.logger.warning(f"Não foi possível aplicar o bloqueio de rede '{tipo_pagina}': {e}")
+
+    def abrir_guia_secao(self, elemento):
+        """Clica no link de uma seção e retorna a guia nova, já com o perfil 'secao'
+
+        O bloqueio do CDP vale por guia, e a guia aberta pelo clique é outra: aplicar o
+        perfil depois do switch_to perderia a primeira carga. Com o bloqueio ligado, uma
+        guia vazia e nomeada é aberta antes, recebe o perfil, e o link é clicado com o
+        target apontando para ela (o onclick com saveProgressoEngajamento roda igual).
+
+        Args:
+            elemento: Link <a target="_blank"> da seção
+
+        Returns:
+            str: Handle da guia da seção, ou None se nenhuma abriu
+        """
+        handles_antes = set(self.driver.window_handles)
+        if self.bloqueio_rede:
+            guia_origem = self.driver.current_window_handle
+            nome = f"secao_{int(time.monotonic() * 1000)}"
+            self.driver.execute_script("window.open('about:blank', arguments[0]);", nome)
+            guia = self.aguardar(nova_janela(handles_antes), "guia vazia da seção", timeout=3, intervalo=0.1)
+            if guia:
+                self.driver.switch_to.window(guia)
+                self.aplicar_perfil_bloqueio('secao')
+                self.driver.switch_to.window(guia_origem)
+                self.driver.execute_script(_JS_CLICAR_NA_GUIA, elemento, nome)
+                return guia
+            self.logger.debug("Guia vazia da seção não abriu; clicando direto (perfil aplicado depois)")
+
+        self.driver.execute_script("arguments[0].click();", elemento)
+        return self.aguardar(nova_janela(handles_antes), "nova guia da seção", intervalo=0.25)
+
+    def contar_requisicoes_rede(self):
+        """Consome o log de performance e acumula requisições bloqueadas x permitidas
+
+        Returns:
+            dict: {'bloqueadas', 'permitidas'} acumulados desde o início
+        """
+        if not self.contar_rede:
+            return self.estatisticas_rede
+        try:
+            for entrada in self.driver.get_log('performance'):
+                mensagem = json.loads(entrada['message'])['message']
+                metodo = mensagem.get('method')
+                if metodo == 'Network.requestWillBeSent':
+                    self.estatisticas_rede['permitidas'] += 1
+                elif metodo == 'Network.loadingFailed' and mensagem['params'].get('blockedReason'):
+                    # Requisições bloqueadas também geram requestWillBeSent
+                    self.estatisticas_rede['bloqueadas'] += 1
+                    self.estatisticas_rede['permitidas'] -= 1
+        except Exception as e:
+            self.logger.debug(f"Log de performance indisponível: {e}")
+        return self.estatisticas_rede
+
+    def _configurar_logs(self):
+        """Configura o sistema de logging (uma vez por processo; ver `configurar_logging`)"""
         self.logger = logging.getLogger('PortalBot')
-        self.logger.setLevel(logging.INFO)
+        self.log_filename = configurar_logging()
 
-        # Formato dos logs
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    def aguardar(self, condicao, descricao, timeout=10, intervalo=0.2):
+        """Aguarda uma condição de prontidão via WebDriverWait e registra quanto tempo levou.
 
-        # Handler para arquivo
-        file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-        file_handler.setFormatter(formatter)
+        Args:
+            condicao (callable): Predicado que recebe o driver (ex.: url_mudou(...))
+            descricao (str): Nome da espera, usado no log
+            timeout (float): Tempo máximo em segundos
+            intervalo (float): Intervalo entre as verificações
 
-        # Handler para console
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
+        Returns:
+            O valor retornado pela condição, ou None se estourou o timeout
+        """
+        inicio = time.monotonic()
+        try:
+            resultado = WebDriverWait(self.driver, timeout, poll_frequency=intervalo).until(condicao)
+            self.logger.debug(f"⏱ Espera '{descricao}': {time.monotonic() - inicio:.2f}s")
+            return resultado
+        except TimeoutException:
+            self.logger.warning(f"⏱ Espera '{descricao}' estourou o timeout ({timeout}s)")
+            return None
+
+    @contextmanager
+    def tempo_limite_script(self, segundos):
+        """Usa `segundos` como timeout de execute_async_script e restaura o valor anterior ao sair"""
+        anterior = self.driver.timeouts.script
+        self.driver.set_script_timeout(segundos)
+        try:
+            yield
+        finally:
+            self.driver.set_script_timeout(anterior)
+
+    def pausar(self, segundos, motivo):
+        """Pausa intencional (tempo de permanência exigido pelo portal/player), registrada no log"""
+        self.logger.debug(f"⏱ Pausa '{motivo}': {segundos:.2f}s")
+        time.sleep(segundos)
 
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+    def _pids_navegador(self):
+        """PIDs do driver (msedgedriver) e de toda a árvore de processos do navegador"""
+        try:
+            raiz = psutil.Process(self.driver.service.process.pid)
+            return [raiz.pid] + [p.pid for p in raiz.children(recursive=True)]
+        except Exception:
+            return []
 
-        self.log_filename = log_filename
+    def medir_memoria_navegador(self):
+        """Soma o RSS (em MB) do driver e de todos os processos do navegador"""
+        total = 0
+        for pid in self._pids_navegador():
+            try:
+                total += psutil.Process(pid).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / 1024 ** 2
+
+    def _encerrar_driver(self):
+        """Fecha o driver e mata processos do navegador que sobreviverem ao quit()"""
+        pids = self._pids_navegador()
+        self.contar_requisicoes_rede()
+        try:
+            self.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"driver.quit() falhou: {e}")
+
+        processos = []
+        for pid in pids:
+            try:
+                processos.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                continue
+        _, vivos = psutil.wait_procs(processos, timeout=3)
+        for p in vivos:
+            try:
+                p.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        if vivos:
+            self.logger.warning(f"{len(vivos)} processo(s) órfão(s) do navegador encerrados à força")
+
+    def verificar_memoria(self, contexto=""):
+        """Governador de memória: recicla o driver se o navegador passou do limite
+
+        O limite vem de PORTAL_MEMORIA_MAX_MB (0 = desligado). Chamado entre atividades e
+        entre seções.
+
+        Returns:
+            bool: True se o driver foi reciclado (o chamador deve refazer o estado da página)
+
+        Raises:
+            NavegadorPerdido: Se a reciclagem não conseguiu um navegador logado
+        """
+        if not self.memoria_max_mb:
+            return False
+
+        uso = self.medir_memoria_navegador()
+        self.logger.info(f"Memória do navegador {contexto}: {uso:.0f}MB (limite {self.memoria_max_mb}MB)")
+        if uso <= self.memoria_max_mb:
+            return False
+
+        self.logger.warning(f"Navegador com {uso:.0f}MB > {self.memoria_max_mb}MB; reciclando o driver")
+        self.informar(f"♻ Navegador usando {uso:.0f}MB (limite {self.memoria_max_mb}MB) - reciclando...")
+        return self.reciclar_driver()
+
+    @medir_fase('reciclar_driver')
+    def reciclar_driver(self, tentativas=2):
+        """Troca o navegador por um novo e volta para a página atual, mantendo o progresso
+
+        Args:
+            tentativas (int): Navegadores novos tentados antes de desistir
+
+        Returns:
+            bool: True (o novo driver está logado e na mesma página)
+
+        Raises:
+            NavegadorPerdido: Se nenhuma tentativa refez a sessão; o driver antigo já foi
+                encerrado, então o chamador não pode seguir com ele
+        """
+        try:
+            url_retorno = self.driver.current_url
+        except Exception:
+            url_retorno = getattr(self, "timeline_url", None)
+
+        self.salvar_progresso()
+        for tentativa in range(1, tentativas + 1):
+            self._encerrar_driver()
+            self._criar_driver()
+            self.invalidar_snapshot_timeline()
+            if self.iniciar_sessao() and self.entrar_curso_agronomia():
+                break
+            self.logger.error(f"Falha ao refazer a sessão após reciclar o driver (tentativa {tentativa}/{tentativas})")
+        else:
+            raise NavegadorPerdido(f"navegador reciclado não refez a sessão após {tentativas} tentativa(s)")
+
+        if url_retorno:
+            self.driver.get(url_retorno)
+            self.aguardar(documento_pronto(), "página restaurada após reciclagem")
+
+        self.logger.info(
+            f"Driver reciclado; retomando em {self.disciplina_atual} - "
+            f"atividade {self.atividade_atual_index + 1}/{self.total_atividades} "
+            f"({self.medir_memoria_navegador():.0f}MB)"
+        )
+        self.informar("✓ Navegador reciclado, continuando de onde parou")
+        return True
 
     def verificar_sessao_valida(self):
         """Verifica se a sessão ainda é válida e tenta recuperar se necessário"""
@@ -103,36 +2235,33 @@ class PortalBot:
             self.logger.error(f"Sessão invalidada: {e}")
             return False
 
+    @medir_fase('recuperar_sessao')
     def recuperar_sessao(self):
         """Tenta recuperar a sessão e retomar de onde parou"""
+        inicio = time.monotonic()
         try:
             self.logger.info("Tentando recuperar sessão...")
-            print("\n🔄 Tentando recuperar sessão...")
+            self.informar("\n🔄 Tentando recuperar sessão...")
 
-            # Fechar driver atual se ainda existir
-            try:
-                self.driver.quit()
-            except:
-                pass
+            # Fechar driver atual se ainda existir (e matar processos órfãos)
+            self._encerrar_driver()
 
-            # Reinicializar driver
-            edge_options = Options()
-            edge_options.add_argument('--no-sandbox')
-            edge_options.add_argument('--disable-dev-shm-usage')
-            self.driver = webdriver.Edge(options=edge_options)
-            self.wait = WebDriverWait(self.driver, 10)
+            # Reinicializar driver (mesmas opções do início, inclusive headless)
+            self._criar_driver()
 
-            # Refazer login
-            if self.fazer_login():
+            # Refazer login (reaproveitando os cookies salvos, se ainda válidos)
+            if self.iniciar_sessao():
                 # Tentar voltar para o curso
                 if self.entrar_curso_agronomia():
-                    self.logger.info("Sessão recuperada com sucesso!")
-                    print("✅ Sessão recuperada com sucesso!")
+                    duracao = time.monotonic() - inicio
+                    self.latencias['recuperacoes'].append(duracao)
+                    self.logger.info(f"Sessão recuperada com sucesso! ⏱ {duracao:.2f}s")
+                    self.informar("✅ Sessão recuperada com sucesso!")
 
                     # NOVO: Informar sobre progresso se tivermos
                     if self.disciplina_atual:
-                        print(f"📊 Último progresso: {self.disciplina_atual} - Atividade {self.atividade_atual_index + 1}/{self.total_atividades}")
-                        print("💡 Dica: Reinicie o bot para recomeçar da disciplina")
+                        self.informar(f"📊 Último progresso: {self.disciplina_atual} - Atividade {self.atividade_atual_index + 1}/{self.total_atividades}")
+                        self.informar("💡 Dica: Reinicie o bot para recomeçar da disciplina")
 
                     return True
 
@@ -143,7 +2272,7 @@ class PortalBot:
             return False
 
     def salvar_progresso(self):
-        """Salva o progresso atual para recuperação em caso de falha (em memória e em progresso.json)"""
+        """Salva o progresso atual em memória (o persistente fica no registro de execução)"""
         progresso = {
             'disciplina': self.disciplina_atual,
             'atividade_index': self.atividade_atual_index,
@@ -153,47 +2282,225 @@ class PortalBot:
         }
 
         # Log/console
-        self.logger.info(f"Progresso salvo: {progresso}")
+        self.logger.debug(f"Progresso salvo: {progresso}")
         if self.total_atividades:
-            print(f"📊 Progresso salvo: Atividade {self.atividade_atual_index + 1}/{self.total_atividades}")
+            self.informar(f"📊 Progresso salvo: Atividade {self.atividade_atual_index + 1}/{self.total_atividades}")
         else:
-            print(f"📊 Progresso salvo")
+            self.informar(f"📊 Progresso salvo")
+
+        return progresso
+
+    def atividade_ja_concluida(self, atividade):
+        """Diz se a atividade pode ser pulada: concluída no registro ou já 100% no card
 
-        # Persistir em arquivo (não quebra CW se não existir permissão)
+        Também define `self.chave_disciplina` (a do tipo do card, numa execução com vários
+        tipos) e `self.chave_atividade`, usada para registrar seções e vídeos.
+        """
+        self.chave_disciplina = self.chaves_disciplina.get(atividade.get('tipo'), self.chave_disciplina)
+        self.chave_atividade = RegistroExecucao.chave(self.chave_disciplina, atividade['titulo'])
+
+        if self.registro.concluida(self.chave_atividade):
+            motivo = "já concluída no registro"
+        elif atividade.get('percent') == 100:
+            self.registro.concluir(
+                self.chave_atividade, tipo='atividade', titulo=atividade['titulo'],
+                pai=self.chave_disciplina, erro='100% no portal'
+            )
+            motivo = "já está 100%"
+        else:
+            return False
+
+        self.progresso.emitir('atividade_pulada', titulo=atividade['titulo'], motivo=motivo)
+        return True
+
+    def iniciar_atividade(self, atividade):
+        """Registra o início do processamento da atividade atual (registro, fase e evento)
+
+        A fase 'atividade' vai até `concluir_atividade` ou, se o laço sair antes, até a
+        próxima atividade/fim da disciplina.
+        """
+        self.atividade_atual = atividade
+        self.fases.fechar_fase('atividade')
+        self.fases.abrir_fase('atividade', titulo=atividade['titulo'])
+        self.registro.iniciar(self.chave_atividade, 'atividade', titulo=atividade['titulo'], pai=self.chave_disciplina)
+        self.progresso.emitir(
+            'atividade_iniciada', titulo=atividade['titulo'],
+            indice=self.atividade_atual_index + 1, total=self.total_atividades
+        )
+
+    def concluir_atividade(self, atividade, ok=True):
+        """Fecha a fase da atividade atual, drena o log de rede e publica o evento de conclusão"""
+        self.fases.fechar_fase('atividade', ok=ok)
+        self.contar_requisicoes_rede()
+        self.progresso.emitir('atividade_concluida', titulo=atividade['titulo'], ok=ok)
+
+    def _chave_unidade(self, *partes):
+        """Chave de uma seção/vídeo da atividade atual (None fora de uma atividade registrada)"""
+        if self.chave_atividade is None:
+            return None
+        return RegistroExecucao.chave(self.chave_atividade, *partes)
+
+    def _secoes_pendentes(self, secoes):
+        """Remove as seções já concluídas (no registro ou marcadas no portal), listando as puladas no log"""
+        pendentes = []
+        for s in secoes:
+            chave = self._chave_unidade('secao', s['nome'])
+            if self.registro.concluida(chave):
+                self.logger.info(f"Seção já concluída no registro — pulando: {s['nome']}")
+            elif s.get('concluida'):
+                self.registro.concluir(chave, tipo='secao', titulo=s['nome'], pai=self.chave_atividade,
+                                       erro=f"concluída no portal ({s['concluida']})")
+                self.logger.info(f"Seção marcada como concluída no portal ({s['concluida']}) — pulando: {s['nome']}")
+            else:
+                pendentes.append(s)
+
+        puladas = len(secoes) - len(pendentes)
+        if puladas:
+            self.informar(f"⏭ {puladas} de {len(secoes)} seção(ões) já concluída(s) — pulando")
+        return pendentes
+
+    def indices_pendentes(self, *tipos):
+        """Índices (na ordem da timeline) das atividades dos tipos que ainda precisam ser processadas
+
+        Lê o snapshot uma única vez; as atividades puladas (registro ou 100% no card) são
+        listadas no log, então uma disciplina já concluída é percorrida sem abrir nada.
+        Os índices valem para `_atividades_do_tipo(*tipos)`.
+        """
+        atividades = self._atividades_do_tipo(*tipos)
+        pendentes = [i for i, a in enumerate(atividades) if not self.atividade_ja_concluida(a)]
+        self.chave_atividade = None
+
+        puladas = len(atividades) - len(pendentes)
+        if puladas:
+            rotulo = "+".join(tipos)
+            self.logger.info(f"{puladas} de {len(atividades)} atividades {rotulo} já concluídas — pulando")
+            self.informar(f"⏭ {puladas} de {len(atividades)} atividades {rotulo} já concluídas")
+        return pendentes
+
+    def _fim_de_fase(self, fase, ok, erro=None, capturar_falha=True):
+        """Chamado por `medir_fase` ao fim de cada fase: captura da falha ou, nas fases de
+        FASES_IMPRESSAO, uma impressão no anel"""
+        if self._driver is None or self.capturas is None:
+            return
+        if ok is False and capturar_falha:
+            self.capturas.capturar(self._driver, fase, erro=erro)
+        elif fase in CapturasDepuracao.FASES_IMPRESSAO:
+            self.capturas.registrar(self._driver, fase, ok=ok)
+
+    def capturar_depuracao(self, motivo="manual", erro=None):
+        """Pede uma captura de depuração da página atual (HTML .gz, screenshot e rastro de impressões)
+
+        A gravação acontece em segundo plano (ver `CapturasDepuracao`).
+
+        Returns:
+            str: Caminho base dos arquivos, ou None se não há navegador, as capturas estão
+                 desligadas (PORTAL_CAPTURAS=0) ou a captura foi descartada
+        """
+        if self.capturas is None:
+            return None
+        return self.capturas.capturar(self._driver, motivo, erro=erro, forcar=True)
+
+    def salvar_html_pagina(self, nome_arquivo=None):
+        """Salva o HTML da página atual para debug (via `capturar_depuracao`, comprimido e em segundo plano)"""
+        motivo = os.path.splitext(nome_arquivo)[0] if nome_arquivo else "debug_page"
+        return self.capturar_depuracao(motivo)
+
+    def salvar_cookies(self):
+        """Salva os cookies da sessão autenticada no disco (PORTAL_ARQUIVO_SESSAO)"""
         try:
-            progress_path = os.path.join(os.getcwd(), "progresso.json")
-            with open(progress_path, "w", encoding="utf-8") as f:
-                import json as _json
-                _json.dump(progresso, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"Progresso persistido em: {progress_path}")
+            dados = {
+                'usuario': self.username,
+                'url_pos_login': self.driver.current_url,
+                'salvo_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'cookies': self.driver.get_cookies(),
+            }
+            pasta = os.path.dirname(self.arquivo_sessao)
+            if pasta and not os.path.exists(pasta):
+                os.makedirs(pasta)
+
+            # Escrita atômica: workers do pool podem salvar ao mesmo tempo
+            tmp = f"{self.arquivo_sessao}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.arquivo_sessao)
+
+            self.logger.info(f"Cookies da sessão salvos em: {self.arquivo_sessao} ({len(dados['cookies'])} cookies)")
         except Exception as e:
-            self.logger.warning(f"Não foi possível salvar progresso.json: {e}")
+            self.logger.warning(f"Não foi possível salvar os cookies da sessão: {e}")
 
-        return progresso
+    @medir_fase('restaurar_cookies', capturar_falha=False)
+    def restaurar_cookies(self):
+        """Injeta os cookies salvos e verifica se a sessão ainda é válida
 
-    def salvar_html_pagina(self, nome_arquivo=None):
-        """Salva o HTML da página atual para debug"""
-        if nome_arquivo is None:
-            timestamp = datetime.now().strftime("%H%M%S")
-            nome_arquivo = f"debug_page_{timestamp}.html"
+        Returns:
+            bool: True se a sessão foi restaurada sem passar pelo formulário de login
+        """
+        if not os.path.exists(self.arquivo_sessao):
+            return False
+
+        try:
+            with open(self.arquivo_sessao, encoding="utf-8") as f:
+                dados = json.load(f)
+
+            if dados.get('usuario') != self.username or not dados.get('cookies'):
+                self.logger.info("Cookies salvos pertencem a outro usuário ou estão vazios; ignorando")
+                return False
+
+            self.logger.info(f"Restaurando sessão a partir dos cookies salvos em {dados.get('salvo_em')}")
+            self.informar("\n→ Restaurando sessão salva...")
+
+            # Cookies só podem ser adicionados estando no domínio do portal
+            if not self.driver.current_url.startswith(self.url_login):
+                self.driver.get(self.url_login)
+            self.driver.delete_all_cookies()
+            agora = time.time()
+            for cookie in dados['cookies']:
+                if cookie.get('expiry') and cookie['expiry'] < agora:
+                    continue
+                cookie.pop('sameSite', None)
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as e:
+                    self.logger.debug(f"Cookie ignorado ({cookie.get('name')}): {e}")
 
-        html_content = self.driver.page_source
-        with open(f"logs/{nome_arquivo}", "w", encoding="utf-8") as f:
-            f.write(html_content)
+            url_antes = self.driver.current_url
+            self.driver.get(dados.get('url_pos_login') or self.url_login)
+            self.aguardar(documento_pronto(), "página pós-login carregada")
 
-        self.logger.info(f"HTML salvo em: logs/{nome_arquivo}")
-        return nome_arquivo
+            if self.driver.current_url == url_antes or not self.verificar_sessao_valida():
+                self.logger.info("Cookies salvos expiraram; será necessário refazer o login")
+                self.informar("⚠ Sessão salva expirou, fazendo login...")
+                return False
 
+            self.logger.info("Sessão restaurada via cookies (login pulado)")
+            self.informar("✓ Sessão restaurada (login pulado)!")
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"Erro ao restaurar cookies da sessão: {e}")
+            return False
+
+    @medir_fase('sessao')
+    def iniciar_sessao(self):
+        """Entra no portal reaproveitando os cookies salvos e, se expiraram, pelo formulário de login"""
+        if self.restaurar_cookies():
+            return True
+        return self.fazer_login()
+
+    @medir_fase('login')
     def fazer_login(self):
         """Realiza o login no portal"""
         try:
             self.logger.info(f"Acessando {self.url_login}")
-            print(f"\n→ Acessando {self.url_login}")
-            self.driver.get(self.url_login)
+            self.informar(f"\n→ Acessando {self.url_login}")
+            # O navegador pré-aquecido já está na página de login
+            if not self.driver.current_url.startswith(self.url_login):
+                self.driver.get(self.url_login)
 
             # Aguardar e preencher campo de usuário
             self.logger.info("Preenchendo credenciais...")
-            print("→ Preenchendo credenciais...")
+            self.informar("→ Preenchendo credenciais...")
             username_field = self.wait.until(
                 EC.presence_of_element_located((By.ID, "username"))
             )
@@ -207,37 +2514,40 @@ class PortalBot:
 
             # Clicar no botão de login
             self.logger.info("Efetuando login...")
-            print("→ Efetuando login...")
+            self.informar("→ Efetuando login...")
             login_button = self.driver.find_element(
                 By.CSS_SELECTOR,
                 "button.btn.btn-primary.btn-lg.btn-block"
             )
+            url_antes = self.driver.current_url
             login_button.click()
 
-            # Aguardar redirecionamento (reduzido de 3s para 2s)
-            time.sleep(2)
+            # Aguardar redirecionamento para fora da página de login
+            self.aguardar(url_mudou(url_antes), "redirecionamento pós-login", timeout=15)
+            self.aguardar(documento_pronto(), "página pós-login carregada")
 
             # Verificar se o login foi bem-sucedido
             if "login" not in self.driver.current_url.lower():
                 self.logger.info("Login realizado com sucesso!")
-                print("✓ Login realizado com sucesso!")
+                self.informar("✓ Login realizado com sucesso!")
+                self.salvar_cookies()
                 return True
             else:
                 self.logger.error("Falha no login - verifique as credenciais")
-                print("✗ Falha no login - verifique as credenciais")
+                self.informar("✗ Falha no login - verifique as credenciais")
                 return False
 
         except TimeoutException:
             self.logger.error("Timeout: Página demorou muito para carregar")
-            print("✗ Timeout: Página demorou muito para carregar")
+            self.informar("✗ Timeout: Página demorou muito para carregar")
             return False
         except NoSuchElementException as e:
             self.logger.error(f"Elemento não encontrado: {e}")
-            print(f"✗ Elemento não encontrado: {e}")
+            self.informar(f"✗ Elemento não encontrado: {e}")
             return False
         except Exception as e:
             self.logger.error(f"Erro inesperado no login: {e}")
-            print(f"✗ Erro inesperado: {e}")
+            self.informar(f"✗ Erro inesperado: {e}")
             return False
 
     def obter_titulo_pagina(self):
@@ -248,13 +2558,14 @@ class PortalBot:
         """Salva um screenshot da página atual"""
         self.driver.save_screenshot(nome_arquivo)
         self.logger.info(f"Screenshot salvo: {nome_arquivo}")
-        print(f"✓ Screenshot salvo: {nome_arquivo}")
+        self.informar(f"✓ Screenshot salvo: {nome_arquivo}")
 
+    @medir_fase('entrar_curso')
     def entrar_curso_agronomia(self):
         """Acessa o curso de Agronomia - Bacharelado"""
         try:
             self.logger.info("Procurando curso de Agronomia...")
-            print("\n→ Procurando curso de Agronomia...")
+            self.informar("\n→ Procurando curso de Agronomia...")
 
             # Aguardar o botão "Entrar" aparecer
             entrar_button = self.wait.until(
@@ -262,30 +2573,33 @@ class PortalBot:
             )
 
             self.logger.info("Clicando em 'Entrar' no curso de Agronomia...")
-            print("→ Clicando em 'Entrar' no curso de Agronomia...")
+            self.informar("→ Clicando em 'Entrar' no curso de Agronomia...")
+            url_antes = self.driver.current_url
             entrar_button.click()
 
-            # Aguardar carregamento (reduzido de 3s para 2s)
-            time.sleep(2)
+            # Aguardar navegação para o curso
+            self.aguardar(url_mudou(url_antes), "navegação para o curso")
+            self.aguardar(documento_pronto(), "página do curso carregada")
 
             self.logger.info(f"Curso acessado! URL atual: {self.driver.current_url}")
-            print(f"✓ Curso acessado! URL atual: {self.driver.current_url}")
+            self.informar(f"✓ Curso acessado! URL atual: {self.driver.current_url}")
             return True
 
         except TimeoutException:
             self.logger.error("Timeout: Botão 'Entrar' não encontrado")
-            print("✗ Timeout: Botão 'Entrar' não encontrado")
+            self.informar("✗ Timeout: Botão 'Entrar' não encontrado")
             return False
         except Exception as e:
             self.logger.error(f"Erro ao acessar curso: {e}")
-            print(f"✗ Erro ao acessar curso: {e}")
+            self.informar(f"✗ Erro ao acessar curso: {e}")
             return False
 
+    @medir_fase('listar_disciplinas')
     def listar_disciplinas(self):
         """Lista todas as disciplinas disponíveis e retorna uma lista com seus dados"""
         try:
             self.logger.info("Buscando disciplinas disponíveis...")
-            print("\n→ Buscando disciplinas disponíveis...")
+            self.informar("\n→ Buscando disciplinas disponíveis...")
 
             # Aguardar as disciplinas carregarem
             disciplinas_elements = self.wait.until(
@@ -313,15 +2627,16 @@ class PortalBot:
 
         except TimeoutException:
             self.logger.error("Timeout: Disciplinas não encontradas")
-            print("✗ Timeout: Disciplinas não encontradas")
+            self.informar("✗ Timeout: Disciplinas não encontradas")
             return []
         except Exception as e:
             self.logger.error(f"Erro ao listar disciplinas: {e}")
-            print(f"✗ Erro ao listar disciplinas: {e}")
+            self.informar(f"✗ Erro ao listar disciplinas: {e}")
             return []
 
     def escolher_disciplina(self, disciplinas):
         """Mostra menu para o usuário escolher uma disciplina"""
+        self.progresso.esvaziar()  # o menu e o input() saem direto no terminal
         if not disciplinas:
             self.logger.error("Nenhuma disciplina encontrada!")
             print("✗ Nenhuma disciplina encontrada!")
@@ -360,226 +2675,231 @@ class PortalBot:
                 print("\n✗ Operação cancelada pelo usuário")
                 return None
 
+    @medir_fase('acessar_disciplina')
     def acessar_disciplina(self, disciplina):
-        """Acessa a disciplina escolhida"""
+        """Acessa a disciplina escolhida (pelo link da lista ou, sem 'elemento', pela URL)"""
         try:
             self.logger.info(f"Acessando disciplina: {disciplina['nome']}")
-            print(f"\n→ Acessando disciplina: {disciplina['nome']}")
+            self.informar(f"\n→ Acessando disciplina: {disciplina['nome']}")
 
-            disciplina['elemento'].click()
+            url_antes = self.driver.current_url
+            if disciplina.get('elemento') is not None:
+                disciplina['elemento'].click()
+            else:
+                self.driver.get(disciplina['url'])
+            self.invalidar_snapshot_timeline()
+            self.aplicar_perfil_bloqueio('timeline')
 
-            # Aguardar carregamento (reduzido de 3s para 2s)
-            time.sleep(2)
+            # Aguardar a timeline da disciplina
+            self.aguardar(url_mudou(url_antes), "navegação para a disciplina")
+            self.aguardar(documento_pronto(), "timeline da disciplina carregada")
 
             self.logger.info(f"Disciplina acessada! URL: {self.driver.current_url}")
-            print(f"✓ Disciplina acessada! URL: {self.driver.current_url}")
+            self.informar(f"✓ Disciplina acessada! URL: {self.driver.current_url}")
             return True
 
         except Exception as e:
             self.logger.error(f"Erro ao acessar disciplina: {e}")
-            print(f"✗ Erro ao acessar disciplina: {e}")
+            self.informar(f"✗ Erro ao acessar disciplina: {e}")
             return False
 
-    def configurar_filtros_conteudo_web(self):
-        """Configura os filtros para mostrar apenas Conteúdo WEB"""
-        try:
-            self.logger.info("Configurando filtros para 'Conteúdo WEB'...")
-            print("\n→ Configurando filtros para 'Conteúdo WEB'...")
-
-            # Aguardar os filtros carregarem (reduzido de 2s para 1s)
-            time.sleep(1)
+    @medir_fase('estimar_disciplina')
+    def estimar_disciplina(self, disciplina, modos):
+        """Conta, pela timeline, quantas atividades de cada modo ainda faltam (sem abrir nenhuma)
 
-            # 1. DESMARCAR TODOS primeiro
-            self.logger.info("Desmarcando todos os tipos de atividade...")
-            print("→ Desmarcando todos os tipos de atividade...")
-            marcar_todos = self.driver.find_element(By.ID, "todos")
-
-            if marcar_todos.is_selected():
-                marcar_todos.click()
-                time.sleep(0.5)  # Reduzido de 1s para 0.5s
-
-            # 2. MARCAR apenas "Conteúdo WEB"
-            self.logger.info("Marcando apenas 'Conteúdo WEB'...")
-            print("→ Marcando apenas 'Conteúdo WEB'...")
-            tipos_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "input.filters-tipo[data-filter^='tipo-']"
-            )
+        Aplica antes os filtros dos modos pedidos (o portal lembra o último filtro usado, então
+        a timeline pode estar escondendo um deles); cards com 100% ou concluídos no registro
+        não contam.
 
-            for elem in tipos_elements:
-                label = elem.find_element(By.XPATH, "./parent::label")
-                nome = label.text.strip().split('\n')[0].strip()
+        Returns:
+            dict: modo -> atividades pendentes, ou None se a timeline não mostrou cards do
+                  modo ou os filtros não puderam ser aplicados (a disciplina precisa ser aberta
+                  para saber)
+        """
+        if not self.acessar_disciplina({'nome': disciplina['nome'], 'url': disciplina['url']}):
+            return {modo: None for modo in modos}
+        if not self.configurar_filtros(*modos):
+            self.logger.warning(f"Estimativa de {disciplina['nome']}: filtros não aplicados, contagem desconhecida")
+            return {modo: None for modo in modos}
+
+        snapshot = self.obter_snapshot_timeline(forcar=True)
+        pendentes = {}
+        for modo in modos:
+            cards = [c for c in snapshot if c['tipo'] == modo]
+            chave_disciplina = RegistroExecucao.chave(modo, disciplina['nome'])
+            pendentes[modo] = sum(
+                1 for c in cards
+                if c.get('percent') != 100
+                and not self.registro.concluida(RegistroExecucao.chave(chave_disciplina, c['titulo']))
+            ) if cards else None
+        self.logger.info(f"Estimativa de {disciplina['nome']}: {pendentes}")
+        return pendentes
+
+    @medir_fase('filtro')
+    def configurar_filtros(self, *tipos):
+        """Deixa a timeline mostrando só os tipos de atividade pedidos
+
+        Um único execute_async_script lê os rótulos e os checkboxes dos filtros, não faz
+        nada se eles já estão no estado pedido e, senão, acerta os checkboxes e espera a
+        timeline re-renderizar (ver _JS_APLICAR_FILTROS).
 
-                if "Conteúdo WEB" in nome or "conteúdo web" in nome.lower():
-                    if not elem.is_selected():
-                        elem.click()
-                        self.logger.info(f"Filtro marcado: {nome}")
-                        print(f"  ✓ {nome}")
-                        time.sleep(0.3)  # Reduzido de 0.5s para 0.3s
-                    break
+        Args:
+            *tipos: Códigos de ROTULOS_FILTRO ('CW', 'TA'), trechos do rótulo do filtro
+                ('Avaliação', 'Fórum'...) ou o data-filter ('tipo-...')
 
-            self.logger.info("Filtros configurados com sucesso")
-            print("✓ Filtros configurados!")
-            time.sleep(1)  # Reduzido de 2s para 1s (aguardar atualização da página)
+        Returns:
+            bool: True se a timeline ficou filtrada pelos tipos pedidos
+        """
+        rotulos = [ROTULOS_FILTRO.get(t, t) for t in tipos]
+        descricao = ", ".join(rotulos)
+        try:
+            self.logger.info(f"Configurando filtros para '{descricao}'...")
+            self.informar(f"\n→ Configurando filtros para '{descricao}'...")
+
+            # Os filtros só existem na timeline (não no dashboard nem na página da atividade)
+            if "timeline" not in self.driver.current_url:
+                self.logger.info(f"Não está na timeline ao configurar filtros: {self.driver.current_url}")
+                self.voltar_para_timeline_salva()
+
+            if self.aguardar(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "input.filters-tipo")), "filtros da timeline"
+            ) is None:
+                raise TimeoutException("Filtros da timeline não carregaram")
+
+            limite = 10
+            with self.tempo_limite_script(limite + 5):
+                resultado = self.driver.execute_async_script(_JS_APLICAR_FILTROS, rotulos, 0.4, 1.5, limite) or {}
+
+            if not resultado.get('ok'):
+                self.logger.warning(
+                    f"Filtros '{descricao}' não aplicados: {resultado.get('motivo') or resultado.get('sinal')} "
+                    f"(faltando: {resultado.get('faltando')}, disponíveis: {resultado.get('disponiveis')})"
+                )
+                self.informar(f"⚠ Filtro '{descricao}' não encontrado ou não aplicado.")
+                return False
 
+            if resultado['mudou']:
+                self.invalidar_snapshot_timeline()
+                self.logger.info(
+                    f"Filtros marcados: {resultado['marcados']} (timeline {resultado['sinal']} "
+                    f"em {resultado['ms'] / 1000:.2f}s)"
+                )
+            else:
+                self.logger.info(f"Filtros já estavam em {resultado['marcados']}; nada a fazer")
+            self.informar(f"✓ Filtros configurados: {', '.join(resultado['marcados'])}")
             return True
 
         except Exception as e:
-            self.logger.error(f"Erro ao configurar filtros: {e}")
-            print(f"✗ Erro ao configurar filtros: {e}")
+            self.logger.error(f"Erro ao configurar filtros '{descricao}': {e}")
+            self.informar(f"✗ Erro ao configurar filtros: {e}")
             return False
 
-
+    def configurar_filtros_conteudo_web(self):
+        """Configura os filtros para mostrar apenas Conteúdo WEB"""
+        return self.configurar_filtros('CW')
 
     # ============================================================
-    # TELEAULA (TA)
+    # TIMELINE (snapshot)
     # ============================================================
 
-    def configurar_filtros_teleaula(self):
-        # Garantir que estamos na timeline (filtros existem aqui, não no dashboard/TA)
-        if "timeline" not in self.driver.current_url:
-            self.logger.info(f"Não está na timeline ao configurar Teleaula: {self.driver.current_url}")
-            self.voltar_para_timeline_salva()
-        """Configura os filtros para mostrar apenas Teleaula (TA)"""
-        try:
-            self.logger.info("Configurando filtros para 'Teleaula'...")
-            print("\n→ Configurando filtros para 'Teleaula'...")
-
-            time.sleep(1)
-
-            # 1) Desmarcar todos
-            self.logger.info("Desmarcando todos os tipos de atividade...")
-            print("→ Desmarcando todos os tipos de atividade...")
-            marcar_todos = self.driver.find_element(By.ID, "todos")
-            if marcar_todos.is_selected():
-                marcar_todos.click()
-                time.sleep(0.5)
-
-            # 2) Marcar apenas Teleaula
-            self.logger.info("Marcando apenas 'Teleaula'...")
-            print("→ Marcando apenas 'Teleaula'...")
-            tipos_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "input.filters-tipo[data-filter^='tipo-']"
-            )
+    def obter_snapshot_timeline(self, forcar=False):
+        """Lê todos os cards visíveis da timeline em um único execute_script.
 
-            marcou = False
-            for elem in tipos_elements:
-                try:
-                    label = elem.find_element(By.XPATH, "./parent::label")
-                    nome = label.text.strip().split('\n')[0].strip()
-                except Exception:
-                    continue
-
-                if "Teleaula" in nome or "teleaula" in nome.lower():
-                    if not elem.is_selected():
-                        elem.click()
-                        time.sleep(0.3)
-                    self.logger.info(f"Filtro marcado: {nome}")
-                    print(f"  ✓ {nome}")
-                    marcou = True
-                    break
+        Em vez de percorrer `li.atividades` card a card (value_of_css_property,
+        find_element e .text por card, repetido para cada índice), o navegador
+        devolve de uma vez tipo, título, percentual, href do botão de ação e um
+        id estável de cada card. Contagem, busca por índice e o skip de 100%
+        passam a ser consultas em Python sobre esta lista.
 
-            if not marcou:
-                self.logger.warning("Filtro 'Teleaula' não encontrado na página.")
-                print("⚠ Filtro 'Teleaula' não encontrado.")
-                return False
-
-            self.logger.info("Filtros Teleaula configurados com sucesso")
-            print("✓ Filtros Teleaula configurados!")
-            time.sleep(1)
-            return True
+        Args:
+            forcar (bool): Se True, ignora o snapshot em cache e relê a timeline
 
-        except Exception as e:
-            self.logger.error(f"Erro ao configurar filtros Teleaula: {e}")
-            print(f"✗ Erro ao configurar filtros Teleaula: {e}")
-            return False
+        Returns:
+            list: Lista de dicts {'id', 'tipo', 'indice', 'titulo', 'titulo_curto',
+                  'percent', 'href', 'elemento'} na ordem da timeline
+        """
+        if self._snapshot_timeline is not None and not forcar:
+            return self._snapshot_timeline
 
-    def contar_atividades_ta(self):
-        """Conta quantas atividades TA existem no total"""
         try:
-            time.sleep(1)
-            atividades_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "li.atividades[data-show='true']"
-            )
-
-            count = 0
-            for elem in atividades_elements:
-                if elem.value_of_css_property('display') == 'none':
-                    continue
-                try:
-                    titulo_elem = elem.find_element(By.CSS_SELECTOR, ".timeline-title small")
-                    titulo = titulo_elem.text.strip()
-                    if titulo.lower().startswith('ta'):
-                        count += 1
-                except Exception:
-                    continue
-
-            self.logger.info(f"Total de atividades TA encontradas: {count}")
-            return count
+            with self.fases.fase('snapshot_timeline'):
+                self.aguardar(lista_cards_estavel(), "cards da timeline estáveis", timeout=5)
+                cards = self.driver.execute_script(_JS_SNAPSHOT_TIMELINE) or []
         except Exception as e:
-            self.logger.error(f"Erro ao contar atividades TA: {e}")
-            return 0
-
-    def obter_atividade_ta_por_indice(self, indice):
-        """Obtém a atividade TA pelo índice (0=TA1, 1=TA2, ...)."""
-        try:
-            time.sleep(1)
-            atividades_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "li.atividades[data-show='true']"
-            )
+            self.logger.error(f"Erro ao ler snapshot da timeline: {e}")
+            return []
 
-            self.logger.info(f"Buscando atividade TA índice {indice}. Total de elementos: {len(atividades_elements)}")
+        contadores = {}
+        snapshot = []
+        for card in cards:
+            titulo = (card.get('titulo') or '').strip()
+            titulo_curto = (card.get('titulo_curto') or '').strip()
 
-            ta_count = 0
-            for elem in atividades_elements:
-                if elem.value_of_css_property('display') == 'none':
-                    continue
+            # O primeiro tratador registrado que reconhece o card define o tipo
+            tratador = next(
+                (t for t in TRATADORES_ATIVIDADE.values() if t.reconhece(titulo, titulo_curto)), None
+            )
+            tipo = tratador.tipo if tratador else None
+            href = tratador.href(card) if tratador else card.get('href_atividade') or card.get('href_video')
+
+            indice = None
+            if tipo:
+                indice = contadores.get(tipo, 0)
+                contadores[tipo] = indice + 1
+
+            snapshot.append({
+                'id': card.get('id'),
+                'tipo': tipo,
+                'indice': indice,
+                'titulo': tratador.titulo(titulo, titulo_curto) if tratador else titulo,
+                'titulo_curto': titulo_curto,
+                'percent': card.get('percent'),
+                'href': href,
+                'elemento': card.get('elemento'),
+            })
+
+        self._snapshot_timeline = snapshot
+        self.logger.info(f"Snapshot da timeline: {len(snapshot)} cards visíveis {contadores}")
+        return snapshot
+
+    def invalidar_snapshot_timeline(self):
+        """Descarta o snapshot em cache (chamar sempre que a timeline mudar)"""
+        self._snapshot_timeline = None
+
+    def _atividades_do_tipo(self, *tipos, forcar=False):
+        """Retorna os cards do snapshot dos tipos informados ('CW', 'TA'...), na ordem da timeline"""
+        return [c for c in self.obter_snapshot_timeline(forcar=forcar) if c['tipo'] in tipos]
+
+    def _obter_atividade_por_indice(self, tipo, indice):
+        """Busca no snapshot o card `indice` do tipo informado"""
+        atividades = self._atividades_do_tipo(tipo)
+        if 0 <= indice < len(atividades):
+            atividade = atividades[indice]
+            self.logger.debug(f"Retornando atividade {tipo} índice {indice}: {atividade['titulo']}")
+            return atividade
+
+        self.logger.warning(f"Atividade {tipo} índice {indice} não encontrada. Total {tipo}s encontrados: {len(atividades)}")
+        return None
 
-                try:
-                    # Título completo do card (costuma conter 'Ta1', 'Ta2' etc.)
-                    try:
-                        titulo = elem.find_element(By.CSS_SELECTOR, ".timeline-title").text.strip()
-                    except Exception:
-                        titulo = elem.text.strip()
+    # ============================================================
+    # TELEAULA (TA)
+    # ============================================================
 
-                    # Percentual (procura qualquer <small> com padrão NN%)
-                    percent = None
-                    try:
-                        smalls = elem.find_elements(By.CSS_SELECTOR, "small")
-                        percents = []
-                        for s in smalls:
-                            t = (s.text or "").strip()
-                            mm = re.search(r"(\d{1,3})\s*%", t)
-                            if mm:
-                                v = int(mm.group(1))
-                                if 0 <= v <= 100:
-                                    percents.append(v)
-                        if percents:
-                            percent = max(percents)
-                    except Exception:
-                        percent = None
-
-                    if re.search(r"\bta\s*\d+\b", titulo.lower()):
-                        self.logger.info(f"Encontrada atividade TA #{ta_count}: {titulo}")
-                        if ta_count == indice:
-                            self.logger.info(f"Retornando atividade TA índice {indice}: {titulo}")
-                            return {'titulo': titulo, 'percent': percent, 'elemento': elem}
-                        ta_count += 1
-                except Exception as e:
-                    self.logger.warning(f"Erro ao processar elemento TA: {e}")
-                    continue
+    def configurar_filtros_teleaula(self):
+        """Configura os filtros para mostrar apenas Teleaula (TA)"""
+        return self.configurar_filtros('TA')
 
-            self.logger.warning(f"Atividade TA índice {indice} não encontrada. Total TAs encontrados: {ta_count}")
-            return None
+    def contar_atividades_ta(self):
+        """Conta quantas atividades TA existem no total"""
+        count = len(self._atividades_do_tipo('TA', forcar=True))
+        self.logger.info(f"Total de atividades TA encontradas: {count}")
+        return count
 
-        except Exception as e:
-            self.logger.error(f"Erro ao obter atividade TA por índice: {e}")
-            print(f"✗ Erro ao obter atividade TA por índice: {e}")
-            return None
+    def obter_atividade_ta_por_indice(self, indice):
+        """Obtém a atividade TA pelo índice (0=TA1, 1=TA2, ...)."""
+        return self._obter_atividade_por_indice('TA', indice)
 
+    @medir_fase('video')
     def _assistir_video_mdstrm_por_iframe(self, iframe_css="iframe[src*='mdstrm'], iframe[src*='mediastream']", passo_segundos=10, duration_hint=None, tentativas=3):
         """Assiste (acelerado) um vídeo Mediastream (mdstrm) clicando nos botões do player dentro do iframe.
 
@@ -591,11 +2911,13 @@ class PortalBot:
         1) Encontra o iframe do player.
         2) Entra no iframe.
         3) Dá Play (se estiver parado).
-        4) Clica no botão Forward (pulo fixo de 10s) repetidamente até o fim (estimado pela duração).
-        5) No final, espera alguns segundos para o portal registrar.
+        4) Avança até o fim com o motor de seek em JS (um único comando: direto no <video> ou
+           cliques em lote no Forward). Se ele falhar, clica no Forward (pulo fixo de 10s)
+           repetidamente a partir do Python, até o fim estimado pela duração.
+        5) O registro pelo portal é aguardado depois, por eventos (`_aguardar_registro_video`).
 
         Parâmetros:
-        - passo_segundos: aqui é ignorado se diferente de 10 (o botão forward é 10s). Mantido por compatibilidade.
+        - passo_segundos: tamanho do pulo no seek direto no <video>; nos cliques o forward é sempre 10s.
         - duration_hint: duração em segundos (pega do #duracao-video-mediastream no DOM do portal).
         """
         last_err = None
@@ -627,7 +2949,12 @@ class PortalBot:
                         play_btn.click()
                     except Exception:
                         self.driver.execute_script("arguments[0].click();", play_btn)
-                    time.sleep(1.0)
+                    # Aguardar o player sair do estado "Play"
+                    self.aguardar(
+                        lambda d: "play" not in (play_btn.get_attribute("aria-label") or "").strip().lower(),
+                        "player iniciado",
+                        timeout=3
+                    )
 
                 # Estimar quantos cliques de 10s precisamos
                 clicks_needed = None
@@ -639,37 +2966,74 @@ class PortalBot:
                 forward_selector = "button#forward, button.controls__btn--forward, button[aria-label*='Forward']"
 
                 # Se não temos duração, fazemos um número "seguro" e depois esperamos o registro
+                duracao_conhecida = clicks_needed is not None
                 if clicks_needed is None:
                     clicks_needed = 80  # ~13min; ajuste se suas aulas forem muito longas
 
-                # Clique em forward repetidamente
-                for i in range(clicks_needed):
-                    try:
-                        fwd = self.driver.find_element(By.CSS_SELECTOR, forward_selector)
+                # 1) Motor de seek em JS: um único comando dentro do iframe
+                inicio_seek = time.monotonic()
+                seek = self._seek_video_js(passo_segundos, clicks_needed)
+
+                if seek and seek.get('ok'):
+                    modo = f"js-{seek['modo']}"
+                    comandos = 1
+                    passos = seek.get('passos')
+                    if not duration_hint and seek.get('duracao'):
+                        duration_hint = int(seek['duracao'])
+                else:
+                    # 2) Fallback: clique em forward a partir do Python, retomando de onde o JS parou
+                    modo = "cliques"
+                    comandos = 1 if seek else 0
+                    passos = seek.get('passos', 0) if seek and seek.get('modo') == 'botoes' else 0
+                    if passos:
+                        self.logger.info(f"Seek via JS parou em {passos}/{clicks_needed} ({seek.get('motivo')}); continuando por cliques")
+                    for i in range(passos, clicks_needed):
                         try:
-                            fwd.click()
-                        except Exception:
-                            self.driver.execute_script("arguments[0].click();", fwd)
-                    except Exception as e:
-                        # Se no final o botão some/para de responder, saímos do loop
-                        last_err = {"ok": False, "err": f"forward falhou/indisponível: {e}"}
-                        break
+                            # Os controles do player podem sumir por alguns segundos: espera o botão voltar
+                            fwd = self.aguardar(
+                                EC.element_to_be_clickable((By.CSS_SELECTOR, forward_selector)), "botão forward", timeout=5
+                            )
+                            comandos += 1
+                            if fwd is None:
+                                raise NoSuchElementException("botão forward não apareceu")
+                            try:
+                                fwd.click()
+                            except Exception:
+                                self.driver.execute_script("arguments[0].click();", fwd)
+                                comandos += 1
+                            comandos += 1
+                            passos += 1
+                        except Exception as e:
+                            # Se no final o botão some/para de responder, saímos do loop
+                            last_err = {"ok": False, "err": f"forward falhou/indisponível: {e}"}
+                            break
+
+                        # Pequena pausa entre cliques (evita travar UI)
+                        self.pausar(0.25, "intervalo entre cliques forward")
 
-                    # Pequena pausa entre cliques (evita travar UI)
-                    time.sleep(0.25)
+                        # A cada alguns cliques, dá uma respirada
+                        if (i + 1) % 20 == 0:
+                            self.pausar(0.8, "respiro do player")
 
-                    # A cada alguns cliques, dá uma respirada
-                    if (i + 1) % 20 == 0:
-                        time.sleep(0.8)
+                    if passos < clicks_needed:
+                        if duracao_conhecida:
+                            # Vídeo ficou antes do fim: a próxima tentativa retoma da posição atual
+                            raise RuntimeError(f"seek incompleto: {passos}/{clicks_needed} avanços ({last_err['err']})")
+                        # Sem duração, 'clicks_needed' é só um teto: o forward some quando o vídeo acaba
+                        self.logger.info(f"Forward indisponível após {passos} avanços (duração desconhecida); "
+                                         f"o registro do vídeo confirma o fim")
 
-                # Espera final para registrar
-                time.sleep(6.0)
+                tempo_seek = time.monotonic() - inicio_seek
 
                 # Voltar para o contexto principal
                 self.driver.switch_to.default_content()
 
-                info = {"ok": True, "duration": duration_hint, "clicks": clicks_needed, "step": step}
-                self.logger.info(f"Vídeo mdstrm assistido via clicks (tentativa {tentativa}). Detalhes: {info}")
+                info = {
+                    "ok": True, "duration": duration_hint, "clicks": clicks_needed, "step": step,
+                    "modo": modo, "passos": passos, "comandos": comandos, "tempo_seek": round(tempo_seek, 2),
+                }
+                self.estatisticas_videos.append(info)
+                self.logger.info(f"Vídeo mdstrm assistido via {modo} (tentativa {tentativa}). Detalhes: {info}")
                 return True, info
 
             except Exception as e:
@@ -679,39 +3043,54 @@ class PortalBot:
                 except Exception:
                     pass
                 self.logger.warning(f"Tentativa {tentativa} falhou ao assistir mdstrm via clicks: {e}")
-                time.sleep(1.2)
+                self.pausar(1.2, "nova tentativa mdstrm")
 
         return False, (last_err or {"ok": False, "err": "falhou após tentativas"})
 
-    def _aguardar_registro_video(self, duration_seg=None, timeout=30):
-        """Tenta aguardar o registro do progresso do vídeo no DOM do portal (campos hidden)."""
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            try:
-                done_flag = self.driver.execute_script(
-                    "return document.getElementById('current-time-video')?.value || null;"
-                )
-                current_time = self.driver.execute_script(
-                    "return document.getElementById('current-time-video-em-tempo')?.value || '';"
-                )
+    @medir_fase('seek_video')
+    def _seek_video_js(self, passo_segundos, max_cliques, intervalo=0.25):
+        """Avança o vídeo de dentro do iframe do player em um único execute_async_script.
 
-                if done_flag and str(done_flag).lower() == 'true':
-                    return True
+        Trabalha direto no <video> (currentTime em passos de `passo_segundos`) ou, sem ele,
+        clica no forward em lote dentro da página. Deve ser chamado já dentro do iframe.
 
-                if duration_seg is not None:
-                    try:
-                        ct = int(str(current_time).strip() or '0')
-                        if ct >= max(int(duration_seg) - 2, 1):
-                            return True
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+        Returns:
+            dict: {'ok', 'modo', 'passos', 'ms', ...} ou None se o script falhou
+        """
+        # Tempo máximo: todos os cliques com o respiro a cada 20, mais folga
+        timeout = int(max_cliques * intervalo + (max_cliques // 20) * 0.8) + 60
+        with self.tempo_limite_script(timeout):
+            try:
+                return self.driver.execute_async_script(_JS_SEEK_VIDEO, passo_segundos, max_cliques, intervalo)
+            except Exception as e:
+                self.logger.warning(f"Seek via JS falhou ({e}); usando cliques no forward")
+                return None
 
-            time.sleep(1)
+    @medir_fase('registro_video')
+    def _aguardar_registro_video(self, duration_seg=None, timeout=30):
+        """Aguarda o registro do progresso do vídeo no DOM do portal (campos hidden).
 
-        return False
+        Um único execute_async_script observa os campos e resolve assim que o valor de
+        conclusão aparece, informando o sinal que disparou. Se o script falhar, volta à
+        verificação periódica via WebDriverWait.
+        """
+        duracao = int(duration_seg) if duration_seg is not None else None
+        with self.tempo_limite_script(timeout + 10):
+            try:
+                resultado = self.driver.execute_async_script(_JS_AGUARDAR_REGISTRO_VIDEO, duracao, timeout)
+                if resultado and resultado.get('ok'):
+                    self.logger.info(f"Registro do vídeo detectado via '{resultado['sinal']}' em {resultado['ms'] / 1000:.2f}s")
+                    return True
+                self.logger.warning(f"Registro do vídeo não detectado em {timeout}s")
+                return False
+            except Exception as e:
+                self.logger.warning(f"Espera por eventos do registro falhou ({e}); verificando periodicamente")
+
+        return bool(self.aguardar(
+            video_registrado(duration_seg), "registro do vídeo", timeout=timeout, intervalo=1
+        ))
 
+    @medir_fase('videos_teleaula')
     def processar_videos_teleaula(self, passo_segundos=55):
         """Dentro de uma Teleaula, assiste todos os vídeos (lista 'Vídeo - 1..N').
 
@@ -725,16 +3104,13 @@ class PortalBot:
           4) tenta confirmar o registro via inputs hidden do portal
         """
         try:
-            time.sleep(2)
-
             # 1) Localizar iframe do player (normalmente único)
-            iframe = None
-            iframes = self.driver.find_elements(By.CSS_SELECTOR, "iframe[src*='mdstrm.com/embed']")
-            if iframes:
-                iframe = iframes[0]
+            iframe = self.aguardar(
+                iframe_carregado("iframe[src*='mdstrm.com/embed']"), "iframe mdstrm carregado"
+            )
 
             if not iframe:
-                print("⚠ Não encontrei o iframe do mdstrm nesta Teleaula.")
+                self.informar("⚠ Não encontrei o iframe do mdstrm nesta Teleaula.")
                 self.logger.warning("Iframe mdstrm não encontrado.")
                 return False
 
@@ -745,35 +3121,44 @@ class PortalBot:
                 video_items = self.driver.find_elements(By.XPATH, "//*[contains(@onclick,'playVideosMensagem')]")
 
             if not video_items:
-                print("⚠ Não encontrei a lista de vídeos (playVideosMensagem). Vou assistir o player atual mesmo assim.")
+                self.informar("⚠ Não encontrei a lista de vídeos (playVideosMensagem). Vou assistir o player atual mesmo assim.")
                 self.logger.warning("Lista de vídeos não encontrada; processando apenas o player atual.")
                 ok, info = self._assistir_video_mdstrm_por_iframe( passo_segundos=passo_segundos)
                 if ok:
                     dur = info.get('duration')
                     registrado = self._aguardar_registro_video(duration_seg=dur, timeout=35)
-                    print("✓ Player atual processado" if registrado else "⚠ Player atual terminou, sem confirmação de registro")
-                    return True
-                print(f"⚠ Falha ao controlar player: {info}")
+                    self.informar("✓ Player atual processado" if registrado else "⚠ Player atual terminou, sem confirmação de registro")
+                    return bool(registrado)
+                self.informar(f"⚠ Falha ao controlar player: {info}")
                 return False
 
-            print(f"🎥 Encontrados {len(video_items)} vídeo(s) na lista desta Teleaula")
+            self.informar(f"🎥 Encontrados {len(video_items)} vídeo(s) na lista desta Teleaula")
+            falhas = 0
 
             # 3) Para cada item de vídeo: clicar -> assistir -> confirmar registro
             for idx, item in enumerate(video_items, 1):
+                chave_video = self._chave_unidade('video', idx)
+                if self.registro.concluida(chave_video):
+                    self.informar(f"⏭ Vídeo {idx} já concluído no registro — pulando")
+                    self.logger.info(f"Vídeo {idx} já concluído no registro — pulando")
+                    continue
+                self.registro.iniciar(chave_video, 'video', titulo=f"Vídeo {idx}", pai=self.chave_atividade)
+
                 try:
                     # Scroll e clique "seguro"
                     self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", item)
-                    time.sleep(0.6)
 
                     # Alguns elementos podem estar cobertos; usar JS click
+                    iframe_css = "iframe[src*='mdstrm.com/embed']"
+                    src_antes = self.driver.execute_script(
+                        "var f = document.querySelector(arguments[0]); return f ? f.getAttribute('src') : null;",
+                        iframe_css
+                    )
                     self.driver.execute_script("arguments[0].click();", item)
-                    time.sleep(1.5)
 
                     # Esperar o iframe atualizar (src pode mudar; nem sempre muda, mas tentamos)
-                    try:
-                        self.wait.until(lambda d: d.find_element(By.CSS_SELECTOR, "iframe[src*='mdstrm.com/embed']"))
-                    except Exception:
-                        pass
+                    self.aguardar(atributo_mudou(iframe_css, "src", src_antes), "troca de vídeo no player", timeout=3)
+                    self.aguardar(iframe_carregado(iframe_css), "iframe mdstrm carregado")
 
                     # Duração (hint) via input hidden do portal, se existir
                     duration_hint = None
@@ -785,64 +3170,52 @@ class PortalBot:
                     except Exception:
                         pass
 
-                    print(f"\n▶ Assistindo vídeo {idx}/{len(video_items)} (pulos de {passo_segundos}s)...")
+                    self.informar(f"\n▶ Assistindo vídeo {idx}/{len(video_items)} (pulos de {passo_segundos}s)...")
                     ok, info = self._assistir_video_mdstrm_por_iframe(
                         passo_segundos=passo_segundos,
                         duration_hint=duration_hint
                     )
 
                     if not ok:
-                        print(f"⚠ Não foi possível controlar o vídeo {idx}. Detalhes: {info}")
+                        self.registro.falhar(chave_video, str(info.get('err')))
+                        self.informar(f"⚠ Não foi possível controlar o vídeo {idx}. Detalhes: {info}")
+                        falhas += 1
                         continue
 
                     # Se a API não devolveu duration, usar hint
                     dur = info.get('duration') or duration_hint
                     registrado = self._aguardar_registro_video(duration_seg=dur, timeout=40)
                     if registrado:
-                        print(f"✓ Vídeo {idx} registrado/concluído")
+                        self.registro.concluir(chave_video)
                     else:
-                        print(f"⚠ Vídeo {idx} terminou, mas não consegui confirmar registro no DOM (seguindo mesmo assim).")
-
-                    time.sleep(1)
+                        # Sem confirmação fica como falha: a próxima execução assiste de novo
+                        self.registro.falhar(chave_video, "registro não confirmado")
+                        falhas += 1
+                    self.progresso.emitir('video_registrado', indice=idx, total=len(video_items), registrado=bool(registrado))
 
                 except Exception as e:
+                    self.registro.falhar(chave_video, str(e))
                     self.logger.warning(f"Erro ao processar vídeo {idx}: {e}")
-                    print(f"⚠ Erro ao processar vídeo {idx}: {e}")
+                    self.informar(f"⚠ Erro ao processar vídeo {idx}: {e}")
+                    falhas += 1
                     continue
 
+            if falhas:
+                self.logger.warning(f"{falhas} de {len(video_items)} vídeos sem registro confirmado")
+                self.informar(f"⚠ {falhas} de {len(video_items)} vídeo(s) sem registro confirmado")
+                return False
             return True
 
         except Exception as e:
             self.logger.error(f"Erro ao processar vídeos Teleaula: {e}")
-            print(f"✗ Erro ao processar vídeos Teleaula: {e}")
+            self.informar(f"✗ Erro ao processar vídeos Teleaula: {e}")
             return False
 
     def contar_atividades_cw(self):
         """Conta quantas atividades CW existem no total"""
-        try:
-            time.sleep(1)  # Reduzido de 2s para 1s
-            atividades_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "li.atividades[data-show='true']"
-            )
-
-            count = 0
-            for elem in atividades_elements:
-                if elem.value_of_css_property('display') == 'none':
-                    continue
-                try:
-                    titulo_elem = elem.find_element(By.CSS_SELECTOR, ".timeline-title small")
-                    titulo = titulo_elem.text.strip()
-                    if titulo.lower().startswith('cw'):
-                        count += 1
-                except:
-                    continue
-
-            self.logger.info(f"Total de atividades CW encontradas: {count}")
-            return count
-        except Exception as e:
-            self.logger.error(f"Erro ao contar atividades CW: {e}")
-            return 0
+        count = len(self._atividades_do_tipo('CW', forcar=True))
+        self.logger.info(f"Total de atividades CW encontradas: {count}")
+        return count
 
     def obter_atividade_cw_por_indice(self, indice):
         """
@@ -852,59 +3225,16 @@ class PortalBot:
             indice (int): Índice da atividade (0, 1, 2, 3...)
 
         Returns:
-            dict: {'titulo': str, 'elemento': WebElement} ou None
+            dict: Card do snapshot ({'titulo', 'percent', 'href', 'elemento', ...}) ou None
         """
-        try:
-            time.sleep(1)  # Reduzido de 2s para 1s
-
-            # Buscar todas as atividades visíveis
-            atividades_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "li.atividades[data-show='true']"
-            )
-
-            self.logger.info(f"Buscando atividade CW índice {indice}. Total de elementos: {len(atividades_elements)}")
-
-            cw_count = 0
-
-            for elem in atividades_elements:
-                # Verificar se está visível
-                if elem.value_of_css_property('display') == 'none':
-                    continue
-
-                try:
-                    titulo_elem = elem.find_element(By.CSS_SELECTOR, ".timeline-title small")
-                    titulo = titulo_elem.text.strip()
-
-                    # Se é uma atividade CW
-                    if titulo.lower().startswith('cw'):
-                        self.logger.info(f"Encontrada atividade CW #{cw_count}: {titulo}")
-
-                        # Se é o índice que queremos
-                        if cw_count == indice:
-                            self.logger.info(f"Retornando atividade índice {indice}: {titulo}")
-                            return {
-                                'titulo': titulo,
-                                'elemento': elem
-                            }
-                        cw_count += 1
-                except Exception as e:
-                    self.logger.warning(f"Erro ao processar elemento: {e}")
-                    continue
-
-            self.logger.warning(f"Atividade CW índice {indice} não encontrada. Total CWs encontrados: {cw_count}")
-            return None
-
-        except Exception as e:
-            self.logger.error(f"Erro ao obter atividade por índice: {e}")
-            print(f"✗ Erro ao obter atividade por índice: {e}")
-            return None
+        return self._obter_atividade_por_indice('CW', indice)
 
+    @medir_fase('abrir_atividade')
     def acessar_atividade(self, atividade):
         """Acessa a atividade escolhida clicando no botão apropriado"""
         try:
             self.logger.info(f"Acessando atividade: {atividade['titulo']}")
-            print(f"\n→ Acessando atividade: {atividade['titulo']}")
+            self.informar(f"\n→ Acessando atividade: {atividade['titulo']}")
 
             # Buscar o botão "Atividade"
             botao = atividade['elemento'].find_element(
@@ -914,24 +3244,69 @@ class PortalBot:
 
             # Rolar até o botão
             self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-            time.sleep(0.5)  # Reduzido de 1s para 0.5s
+            self.aguardar(EC.element_to_be_clickable(botao), "botão 'Atividade' clicável", timeout=5)
 
             # Clicar no botão
+            url_antes = self.driver.current_url
             botao.click()
 
-            # Aguardar carregamento (reduzido de 3s para 2s)
-            time.sleep(2)
+            # Aguardar carregamento da atividade
+            self.aguardar(url_mudou(url_antes), "navegação para a atividade")
+            self.aguardar(documento_pronto(), "atividade carregada")
+
+            self.logger.info("Atividade acessada com sucesso")
+            self.informar(f"✓ Atividade acessada!")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Erro ao acessar atividade: {e}")
+            self.informar(f"✗ Erro ao acessar atividade: {e}")
+            return False
+
+
+    def listar_atividades_diretas(self, *tipos):
+        """Lê da timeline, uma única vez, os cards dos tipos informados com a URL do botão de ação.
+
+        Usado pela navegação direta: com as URLs em mãos, cada atividade é aberta com
+        driver.get, sem voltar para a timeline nem reaplicar filtros entre atividades.
+
+        Returns:
+            list: Cards do snapshot, ou None se algum card não expõe uma URL navegável
+                  (nesse caso o chamador deve usar o fluxo por clique)
+        """
+        atividades = self._atividades_do_tipo(*tipos)
+        rotulo = "+".join(tipos)
+        sem_url = [a['titulo'] for a in atividades if not (a.get('href') or '').startswith('http')]
+        if sem_url:
+            self.logger.warning(f"Navegação direta indisponível; cards {rotulo} sem URL: {sem_url}")
+            self.informar(f"⚠ Navegação direta indisponível para {rotulo}; usando o fluxo pela timeline")
+            return None
+
+        self.logger.info(f"Navegação direta: {len(atividades)} URLs de atividades {rotulo} coletadas")
+        return atividades
+
+    @medir_fase('abrir_atividade')
+    def acessar_atividade_por_url(self, atividade):
+        """Abre uma atividade diretamente pela URL coletada do card"""
+        try:
+            self.logger.info(f"Acessando atividade por URL: {atividade['titulo']} -> {atividade['href']}")
+            self.informar(f"\n→ Acessando atividade: {atividade['titulo']}")
+
+            tratador = TRATADORES_ATIVIDADE.get(atividade.get('tipo'))
+            self.aplicar_perfil_bloqueio(tratador.perfil_bloqueio if tratador else 'timeline')
+            self.driver.get(atividade['href'])
+            self.aguardar(documento_pronto(), "atividade carregada")
 
             self.logger.info("Atividade acessada com sucesso")
-            print(f"✓ Atividade acessada!")
+            self.informar("✓ Atividade acessada!")
             return True
 
         except Exception as e:
-            self.logger.error(f"Erro ao acessar atividade: {e}")
-            print(f"✗ Erro ao acessar atividade: {e}")
+            self.logger.error(f"Erro ao acessar atividade por URL: {e}")
+            self.informar(f"✗ Erro ao acessar atividade por URL: {e}")
             return False
 
-
+    @medir_fase('abrir_atividade')
     def acessar_teleaula(self, atividade):
         """Acessa uma Teleaula (TA) clicando no botão/link de VÍDEO (videoAnotacao).
 
@@ -941,7 +3316,7 @@ class PortalBot:
         """
         try:
             self.logger.info(f"Acessando Teleaula: {atividade['titulo']}")
-            print(f"\n→ Acessando Teleaula: {atividade['titulo']}")
+            self.informar(f"\n→ Acessando Teleaula: {atividade['titulo']}")
 
             card = atividade['elemento']
 
@@ -954,36 +3329,43 @@ class PortalBot:
 
             # Rolar até o botão
             self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", botao_video)
-            time.sleep(0.5)
+            self.aguardar(EC.element_to_be_clickable(botao_video), "botão de vídeo clicável", timeout=5)
 
+            self.aplicar_perfil_bloqueio('teleaula')
             botao_video.click()
 
             # Aguardar carregar a página de vídeos (normalmente /videoAnotacao/index)
             self.wait.until(lambda d: 'videoAnotacao' in d.current_url or 'video' in d.current_url.lower())
-            time.sleep(1)
+            self.aguardar(documento_pronto(), "página da Teleaula carregada")
 
             self.logger.info("Teleaula acessada com sucesso")
-            print("✓ Teleaula acessada!")
+            self.informar("✓ Teleaula acessada!")
             return True
 
         except Exception as e:
             self.logger.error(f"Erro ao acessar Teleaula: {e}")
-            print(f"✗ Erro ao acessar Teleaula: {e}")
+            self.informar(f"✗ Erro ao acessar Teleaula: {e}")
             return False
 
 
+    @medir_fase('descobrir_secoes')
     def obter_todas_secoes_material_externo(self):
         """
         Obtém TODAS as seções do material externo
 
         Returns:
-            list: Lista de dicionários com {'nome': str, 'elemento': WebElement}
+            list: Lista de dicionários com {'nome': str, 'elemento': WebElement,
+                  'concluida': motivo (str) se o portal já mostra a seção como concluída, senão None}
         """
         try:
             self.logger.info("Buscando todas as seções do material externo...")
 
-            # Aguardar carregar (reduzido de 2s para 1s)
-            time.sleep(1)
+            # Aguardar o material externo aparecer
+            self.aguardar(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "details#detalhe")),
+                "material externo carregado",
+                timeout=5
+            )
 
             # Expandir details se necessário
             try:
@@ -992,27 +3374,18 @@ class PortalBot:
                 details_element = self.driver.find_element(By.ID, "detalhe")
                 if 'open' not in details_element.get_attribute('outerHTML'):
                     summary.click()
-                    time.sleep(0.5)
+                    self.aguardar(
+                        lambda d: details_element.get_attribute('open') is not None,
+                        "material externo expandido",
+                        timeout=3
+                    )
                     self.logger.info("Material externo expandido")
             except:
                 self.logger.info("Material externo já expandido ou não encontrado")
                 pass
 
-            # Buscar TODOS os links das seções
-            secoes_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "details#detalhe a[target='_blank']"
-            )
-
-            secoes = []
-
-            for elemento in secoes_elements:
-                nome = elemento.text.strip()
-                if nome:
-                    secoes.append({
-                        'nome': nome,
-                        'elemento': elemento
-                    })
+            # Buscar TODOS os links das seções (com a marca de concluída, se o portal mostrar)
+            secoes = self.driver.execute_script(_JS_SECOES_MATERIAL, self.seletor_secao_concluida) or []
 
             self.logger.info(f"Encontradas {len(secoes)} seções: {[s['nome'] for s in secoes]}")
             return secoes
@@ -1021,6 +3394,135 @@ class PortalBot:
             self.logger.error(f"Erro ao obter seções do material externo: {e}")
             return []
 
+    @medir_fase('secoes_http')
+    def processar_secoes_via_http(self):
+        """
+        Registra as seções do material externo pelo MotorEngajamentoHTTP, sem abrir guias.
+
+        O navegador só descobre os links, os argumentos do onclick e a URL de
+        saveProgressoEngajamento; as chamadas saem de um requests.Session com os cookies
+        da sessão Selenium.
+
+        Um 2xx não prova que o portal contou a leitura: antes de concluir, o resultado é
+        relido no portal (`_confirmar_engajamento_http`). Só as seções confirmadas são
+        concluídas; as demais ficam pendentes para o fluxo pelo navegador.
+
+        Returns:
+            bool: True se todas as seções foram registradas e confirmadas; None se a
+                  descoberta falhou ou alguma seção não foi confirmada (o chamador deve
+                  usar o fluxo pelo navegador, que só refaz as pendentes)
+        """
+        try:
+            self.obter_todas_secoes_material_externo()
+            descoberta = self.driver.execute_script(_JS_SECOES_ENGAJAMENTO, self.seletor_secao_concluida) or {}
+        except Exception as e:
+            self.logger.warning(f"Engajamento HTTP: descoberta falhou ({e}); usando o navegador")
+            return None
+
+        url_base = descoberta.get('url_base') or self.driver.current_url
+        engajamento = parse_fonte_engajamento(descoberta.get('fonte'))
+        url_engajamento = os.getenv('PORTAL_URL_ENGAJAMENTO')
+        if url_engajamento:
+            engajamento = dict(engajamento or {'metodo': 'POST', 'parametros': []}, url=url_engajamento)
+        if not engajamento:
+            self.logger.warning("Engajamento HTTP: URL de saveProgressoEngajamento não encontrada; usando o navegador")
+            return None
+        engajamento['url'] = urljoin(url_base, engajamento['url'])
+
+        secoes = []
+        for s in descoberta.get('secoes') or []:
+            args = parse_args_onclick(s.get('onclick'))
+            if args is None:
+                self.logger.warning(f"Engajamento HTTP: seção sem onclick de engajamento ({s['nome']}); usando o navegador")
+                return None
+            secoes.append({
+                'nome': s['nome'], 'href': urljoin(url_base, s['href']) if s.get('href') else None,
+                'args': args, 'concluida': s.get('concluida'),
+            })
+
+        if not secoes:
+            return None
+
+        total_atividade = len(secoes)
+        secoes = self._secoes_pendentes(secoes)
+        if not secoes:
+            return True
+
+        self.informar(f"\n🌐 Registrando {len(secoes)} seções via HTTP ({engajamento['metodo']} {engajamento['url']})")
+        motor = MotorEngajamentoHTTP.a_partir_do_driver(
+            self.driver, engajamento=engajamento, max_workers=_env_int('PORTAL_HTTP_WORKERS', 4)
+        )
+        resultados = motor.engajar(secoes)
+        enviadas = [r['nome'] for r in resultados if r['ok']]
+        # O card da timeline só fala pela atividade inteira: vale se todas as seções dela foram enviadas agora
+        atividade_inteira = len(enviadas) == total_atividade
+        confirmadas = self._confirmar_engajamento_http(enviadas, atividade_inteira=atividade_inteira)
+
+        for r in resultados:
+            if r['ok'] and r['nome'] not in confirmadas:
+                r['ok'], r['erro'] = False, "engajamento não confirmado pelo portal"
+            simbolo = "✓" if r['ok'] else "✗"
+            self.informar(f"  {simbolo} {r['nome']} ({r['latencia_ms']:.0f}ms){'' if r['ok'] else ' - ' + r['erro']}")
+            if r['ok']:
+                chave = self._chave_unidade('secao', r['nome'])
+                self.registro.iniciar(chave, 'secao', titulo=r['nome'], pai=self.chave_atividade)
+                self.registro.concluir(chave)
+
+        ok = sum(r['ok'] for r in resultados)
+        self.logger.info(f"Engajamento HTTP: {ok}/{len(resultados)} seções confirmadas")
+        if ok < len(resultados):
+            self.informar(f"⚠ {len(resultados) - ok} seção(ões) sem confirmação via HTTP; refazendo pelo navegador")
+            return None
+        return True
+
+    def _confirmar_engajamento_http(self, nomes, atividade_inteira=False):
+        """Relê no portal quais seções o engajamento HTTP de fato registrou
+
+        Com PORTAL_SELETOR_SECAO_CONCLUIDA, recarrega a atividade e confere a marca de cada
+        seção. Sem ele, só há o que confirmar se a atividade inteira foi enviada agora
+        (`atividade_inteira`): volta à timeline, confere se o card chegou a 100% e reabre a
+        atividade. Em qualquer caso a página termina na atividade.
+
+        Returns:
+            set: Nomes das seções confirmadas
+        """
+        if not nomes:
+            return set()
+        url_atividade = self.driver.current_url
+        try:
+            if self.seletor_secao_concluida:
+                self.driver.refresh()
+                self.aguardar(documento_pronto(), "atividade recarregada")
+                marcadas = {s['nome'] for s in self.obter_todas_secoes_material_externo() if s.get('concluida')}
+                confirmadas = marcadas & set(nomes)
+            elif not atividade_inteira:
+                self.logger.info("Engajamento HTTP: envio parcial e sem seletor de seção concluída; nada a confirmar")
+                return set()
+            else:
+                atividade = self.atividade_atual
+                if not atividade or not self.voltar_para_timeline_salva():
+                    return set()
+                try:
+                    card = next(
+                        (c for c in self.obter_snapshot_timeline(forcar=True)
+                         if c['tipo'] == atividade.get('tipo') and c['titulo'] == atividade['titulo']),
+                        None
+                    )
+                finally:
+                    self.driver.get(url_atividade)
+                    self.aguardar(documento_pronto(), "atividade reaberta após a confirmação")
+                percent = card.get('percent') if card else None
+                self.logger.info(f"Engajamento HTTP: card de {atividade['titulo']} em {percent}% após o envio")
+                confirmadas = set(nomes) if percent == 100 else set()
+        except Exception as e:
+            self.logger.warning(f"Engajamento HTTP: não foi possível confirmar no portal ({e})")
+            return set()
+
+        if len(confirmadas) < len(nomes):
+            self.logger.warning(f"Engajamento HTTP: {len(nomes) - len(confirmadas)} seção(ões) sem confirmação do portal")
+        return confirmadas
+
+    @medir_fase('secoes_material')
     def processar_todas_secoes_material_externo(self):
         """
         Processa TODAS as seções do material externo sequencialmente
@@ -1030,90 +3532,112 @@ class PortalBot:
             bool: True se todas as seções foram processadas, False se houve erro
         """
         try:
+            # Motor HTTP opcional: só cai no navegador se a descoberta falhar
+            if self.engajamento_http:
+                resultado = self.processar_secoes_via_http()
+                if resultado is not None:
+                    return resultado
+
             # Obter todas as seções
             secoes = self.obter_todas_secoes_material_externo()
 
             if not secoes:
                 self.logger.warning("Nenhuma seção encontrada no material externo")
-                print("⚠ Nenhuma seção encontrada no material externo")
+                self.informar("⚠ Nenhuma seção encontrada no material externo")
                 return False
 
+            self.informar(f"\n📚 Encontradas {len(secoes)} seções no material externo")
+            secoes = self._secoes_pendentes(secoes)
+            if not secoes:
+                return True
+
             total_secoes = len(secoes)
             self.logger.info(f"Iniciando processamento de {total_secoes} seções")
-            print(f"\n📚 Encontradas {total_secoes} seções no material externo")
 
             # Guardar a guia principal (disciplina) - CRÍTICO
             guia_principal = self.driver.current_window_handle
             self.logger.info(f"Guia principal salva: {guia_principal}")
 
+            # Modo concorrente: várias guias de seção abertas e roladas de forma intercalada
+            if self.max_abas_secoes > 1:
+                return self._processar_secoes_concorrentes(secoes, guia_principal)
+
+            falhas = 0
+
             # Processar cada seção
             for i, secao in enumerate(secoes, 1):
-                print(f"\n📖 Processando seção {i}/{total_secoes}: {secao['nome']}")
-                self.logger.info(f"Processando seção {i}/{total_secoes}: {secao['nome']}")
+                self.progresso.emitir('secao_iniciada', secao=secao['nome'], indice=i, total=total_secoes)
+
+                # Governador de memória: após reciclar, a página da atividade foi reaberta
+                if self.verificar_memoria("entre seções"):
+                    guia_principal = self.driver.current_window_handle
+                    secao = next(s for s in self.obter_todas_secoes_material_externo() if s['nome'] == secao['nome'])
+
+                chave_secao = self._chave_unidade('secao', secao['nome'])
+                self.registro.iniciar(chave_secao, 'secao', titulo=secao['nome'], pai=self.chave_atividade)
+                self.fases.abrir_fase('secao', secao=secao['nome'])
 
                 try:
                     # ✅ ESTRATÉGIA SEGURA: Abrir em nova guia sem sair da atual
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", secao['elemento'])
-                    time.sleep(0.5)
 
                     # ✅ IMPORTANTE: não use window.open(href) aqui, pois isso NÃO dispara o onclick do link.
                     # No Colabora, o onclick geralmente chama saveProgressoEngajamento(...),
                     # que é o que registra a leitura/conclusão. Então clicamos no <a> e esperamos a nova guia.
-                    handles_antes = set(self.driver.window_handles)
-                    self.driver.execute_script("arguments[0].click();", secao['elemento'])
-
-                    # Aguardar abrir nova guia
-                    nova_guia = None
-                    for _ in range(40):  # ~10s
-                        handles_agora = set(self.driver.window_handles)
-                        diff = list(handles_agora - handles_antes)
-                        if diff:
-                            nova_guia = diff[0]
-                            break
-                        time.sleep(0.25)
+                    nova_guia = self.abrir_guia_secao(secao['elemento'])
 
                     if not nova_guia:
+                        self.fases.fechar_fase('secao', ok=False)
+                        self.registro.falhar(chave_secao, "nova guia não foi aberta")
                         self.logger.error("Nova guia não foi aberta!")
-                        print("✗ Nova guia não foi aberta!")
+                        self.informar("✗ Nova guia não foi aberta!")
+                        falhas += 1
                         continue
 
                     self.driver.switch_to.window(nova_guia)
-                    self.logger.info(f"Nova guia acessada para: {secao['nome']}")
+                    self.aplicar_perfil_bloqueio('secao')  # já aplicado se a guia foi preparada antes
+                    self.logger.debug(f"Nova guia acessada para: {secao['nome']}")
 
-                    # Aguardar carregamento
-                    self.logger.info("Aguardando carregamento da seção...")
-                    time.sleep(3)
+                    # Aguardar carregamento (a guia preparada começa em about:blank)
+                    self.logger.debug("Aguardando carregamento da seção...")
+                    self.aguardar(url_mudou('about:blank'), "navegação da seção", timeout=15)
+                    self.aguardar(documento_pronto(), "seção carregada", timeout=15)
 
                     # Verificar iframe
                     try:
                         iframes = self.driver.find_elements(By.TAG_NAME, "iframe")
                         if iframes:
-                            self.logger.info(f"Encontrados {len(iframes)} iframes. Mudando para o primeiro...")
-                            self.driver.switch_to.frame(iframes[0])
-                            time.sleep(1)
+                            self.logger.debug(f"Encontrados {len(iframes)} iframes. Mudando para o primeiro...")
+                            iframe = self.aguardar(iframe_carregado("iframe"), "iframe da seção carregado", timeout=5)
+                            self.driver.switch_to.frame(iframe or iframes[0])
+                            self.aguardar(documento_pronto(), "conteúdo do iframe carregado", timeout=5)
                     except Exception as e:
                         self.logger.info(f"Nenhum iframe encontrado ou erro: {e}")
 
                     # Rolar até o final
-                    self.rolar_pagina_automaticamente(intervalo=1)
+                    rolou = self.rolar_pagina_automaticamente(intervalo=1, secao=secao['nome'])
 
                     # ✅ FECHAR APENAS A GUIA DA SEÇÃO (mantém principal)
                     self.driver.close()
-                    self.logger.info(f"Guia da seção {i} fechada")
+                    self.logger.debug(f"Guia da seção {i} fechada")
 
                     # ✅ VOLTAR PARA GUIA PRINCIPAL IMEDIATAMENTE
                     self.driver.switch_to.window(guia_principal)
-                    self.logger.info(f"Voltou para guia principal após seção {i}")
+                    self.logger.debug(f"Voltou para guia principal após seção {i}")
 
-                    self.logger.info(f"Seção {i} concluída: {secao['nome']}")
-                    print(f"✓ Seção {i} concluída: {secao['nome']}")
-
-                    # Pequena pausa entre seções para estabilidade
-                    time.sleep(1)
+                    if rolou:
+                        self.registro.concluir(chave_secao)
+                    else:
+                        self.registro.falhar(chave_secao, "rolagem não chegou ao fim da página")
+                        falhas += 1
+                    self.fases.fechar_fase('secao', ok=rolou)
+                    self.progresso.emitir('secao_concluida', secao=secao['nome'], indice=i, ok=rolou)
 
                 except Exception as e:
+                    self.fases.fechar_fase('secao', ok=False)
+                    self.registro.falhar(chave_secao, str(e))
                     self.logger.error(f"Erro ao processar seção {i}: {e}")
-                    print(f"✗ Erro ao processar seção {i}: {e}")
+                    self.progresso.emitir('secao_concluida', secao=secao['nome'], indice=i, ok=False)
 
                     # ✅ RECUPERAÇÃO: Tentar voltar para guia principal mesmo com erro
                     try:
@@ -1124,13 +3648,20 @@ class PortalBot:
 
                     return False
 
+            if falhas:
+                self.logger.warning(f"{falhas} de {total_secoes} seções falharam")
+                self.informar(f"⚠ {falhas} de {total_secoes} seções falharam")
+                return False
+
             self.logger.info(f"Todas as {total_secoes} seções foram processadas com sucesso")
-            print(f"✅ Todas as {total_secoes} seções foram processadas!")
+            self.informar(f"✅ Todas as {total_secoes} seções foram processadas!")
             return True
 
+        except NavegadorPerdido:
+            raise
         except Exception as e:
             self.logger.error(f"Erro geral ao processar seções: {e}")
-            print(f"✗ Erro ao processar seções: {e}")
+            self.informar(f"✗ Erro ao processar seções: {e}")
 
             # Tentar voltar para guia principal em caso de erro geral
             try:
@@ -1139,11 +3670,215 @@ class PortalBot:
                 pass
             return False
 
-    def rolar_pagina_automaticamente(self, intervalo=1):
-        """Rola a página automaticamente até o final"""
+    def _processar_secoes_concorrentes(self, secoes, guia_principal, intervalo=1, limite=300, max_rolagens=600):
+        """
+        Processa as seções do material externo com até `self.max_abas_secoes` guias abertas ao mesmo tempo.
+
+        Cada seção continua sendo aberta pelo clique no próprio <a target=_blank>, para que o
+        onclick (saveProgressoEngajamento) dispare. As guias abertas são roladas em um único
+        laço intercalado: a cada rodada cada guia avança um passo e a pausa de permanência é
+        compartilhada por todas, então o tempo da atividade fica limitado pela seção mais longa.
+
+        Args:
+            limite (float): Tempo máximo de cada seção (desde a abertura), como na rolagem sequencial
+            max_rolagens (int): Passos de rolagem por seção; uma página que não para de crescer
+                (conteúdo lazy) falha a seção em vez de prender a atividade
+
+        Returns:
+            bool: True se todas as seções foram processadas, False se alguma falhou
+        """
+        total_secoes = len(secoes)
+        pendentes = list(enumerate(secoes, 1))
+        chave_secao = lambda nome: self._chave_unidade('secao', nome)
+        abertas = {}  # handle -> estado da seção
+        falhas = 0
+        pixels_por_rolagem = 500
+        permanencia_fim = max(intervalo, 1.0) + 2
+
+        self.logger.info(f"Modo concorrente: até {self.max_abas_secoes} guias de seção simultâneas")
+        self.informar(f"⚡ Processando seções em até {self.max_abas_secoes} guias simultâneas")
+
+        def fechar_guia(handle):
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception as e:
+                self.logger.warning(f"Erro ao fechar guia {handle}: {e}")
+            abertas.pop(handle, None)
+            self.driver.switch_to.window(guia_principal)
+
+        try:
+            while pendentes or abertas:
+                # 0) Governador de memória: acima do limite não abre guias novas; quando as
+                #    abertas terminam, recicla o navegador (as guias antigas deixam de existir)
+                acima_do_limite = bool(
+                    pendentes and len(abertas) < self.max_abas_secoes and self.memoria_max_mb
+                    and self.medir_memoria_navegador() > self.memoria_max_mb
+                )
+                if acima_do_limite:
+                    if abertas:
+                        self.logger.debug("Memória acima do limite; aguardando as guias abertas antes de abrir outras")
+                    else:
+                        self.driver.switch_to.window(guia_principal)
+                        if self.verificar_memoria("entre seções (concorrente)"):
+                            guia_principal = self.driver.current_window_handle
+                            atuais = {s['nome']: s for s in self.obter_todas_secoes_material_externo()}
+                            pendentes = [(i, atuais.get(s['nome'], s)) for i, s in pendentes]
+
+                # 1) Abrir novas seções até o limite (sempre a partir da guia principal)
+                while pendentes and len(abertas) < self.max_abas_secoes and not (acima_do_limite and abertas):
+                    i, secao = pendentes.pop(0)
+                    self.driver.switch_to.window(guia_principal)
+                    self.progresso.emitir('secao_iniciada', secao=secao['nome'], indice=i, total=total_secoes)
+
+                    self.driver.execute_script("arguments[0].scrollIntoView(true);", secao['elemento'])
+                    nova_guia = self.abrir_guia_secao(secao['elemento'])
+                    self.registro.iniciar(chave_secao(secao['nome']), 'secao', titulo=secao['nome'], pai=self.chave_atividade)
+                    if not nova_guia:
+                        self.registro.falhar(chave_secao(secao['nome']), "nova guia não foi aberta")
+                        self.logger.error(f"Nova guia não foi aberta para a seção {i}!")
+                        self.informar(f"✗ Nova guia não foi aberta para a seção {i}!")
+                        falhas += 1
+                        continue
+
+                    abertas[nova_guia] = {
+                        'indice': i,
+                        'nome': secao['nome'],
+                        'pronta': False,
+                        'aberta_em': time.monotonic(),
+                        'usa_iframe': False,
+                        'rolagens': 0,
+                        'fim_desde': None,
+                    }
+
+                # 2) Avançar um passo em cada guia aberta
+                for handle, estado in list(abertas.items()):
+                    i = estado['indice']
+                    try:
+                        self.driver.switch_to.window(handle)
+
+                        self.aplicar_perfil_bloqueio('secao')
+
+                        if not estado['pronta']:
+                            if self.driver.current_url == 'about:blank' or not documento_pronto()(self.driver):
+                                if time.monotonic() - estado['aberta_em'] > 30:
+                                    raise TimeoutException("seção não carregou em 30s")
+                                continue
+                            iframes = self.driver.find_elements(By.TAG_NAME, "iframe")
+                            estado['usa_iframe'] = bool(iframes)
+                            estado['pronta'] = True
+                            self.logger.debug(f"Seção {i} carregada (iframe: {estado['usa_iframe']})")
+
+                        # Trocar de guia volta ao contexto principal; reentrar no iframe
+                        if estado['usa_iframe']:
+                            self.driver.switch_to.frame(self.driver.find_element(By.TAG_NAME, "iframe"))
+
+                        if estado['fim_desde'] is not None:
+                            if time.monotonic() - estado['fim_desde'] >= permanencia_fim:
+                                fechar_guia(handle)
+                                self.registro.concluir(chave_secao(estado['nome']))
+                                self.fases.registrar_fase('secao', time.monotonic() - estado['aberta_em'], ok=True, secao=estado['nome'])
+                                self.logger.debug(f"Seção {i}: {estado['rolagens']} rolagens")
+                                self.progresso.emitir('secao_concluida', secao=estado['nome'], indice=i, ok=True)
+                            continue
+
+                        if time.monotonic() - estado['aberta_em'] > limite or estado['rolagens'] >= max_rolagens:
+                            raise TimeoutException(
+                                f"seção não chegou ao fim em {limite}s / {max_rolagens} rolagens "
+                                f"({estado['rolagens']} feitas)"
+                            )
+                        passo = self.driver.execute_script(_JS_PASSO_ROLAGEM, pixels_por_rolagem)
+                        estado['rolagens'] += 1
+                        self.logger.debug(f"Seção {i} - rolagem #{estado['rolagens']}")
+                        self.progresso.emitir('secao_progresso', secao=estado['nome'], percent=passo['percent'])
+
+                        if passo['fim']:
+                            estado['fim_desde'] = time.monotonic()
+                            self.logger.info(f"Seção {i}: fim da página alcançado após {estado['rolagens']} rolagens")
+
+                    except Exception as e:
+                        self.registro.falhar(chave_secao(estado['nome']), str(e))
+                        self.fases.registrar_fase('secao', time.monotonic() - estado['aberta_em'], ok=False, secao=estado['nome'])
+                        self.logger.error(f"Erro ao processar seção {i}: {e}")
+                        self.progresso.emitir('secao_concluida', secao=estado['nome'], indice=i, ok=False)
+                        falhas += 1
+                        fechar_guia(handle)
+
+                # 3) Permanência compartilhada por todas as guias da rodada
+                if abertas:
+                    self.pausar(intervalo, "permanência por rodada de rolagem")
+
+            self.driver.switch_to.window(guia_principal)
+
+            if falhas:
+                self.logger.warning(f"{falhas} de {total_secoes} seções falharam no modo concorrente")
+                self.informar(f"⚠ {falhas} de {total_secoes} seções falharam")
+                return False
+
+            self.logger.info(f"Todas as {total_secoes} seções foram processadas com sucesso")
+            self.informar(f"✅ Todas as {total_secoes} seções foram processadas!")
+            return True
+
+        except NavegadorPerdido:
+            raise
+        except Exception as e:
+            self.logger.error(f"Erro geral no processamento concorrente de seções: {e}")
+            self.informar(f"✗ Erro ao processar seções: {e}")
+            for handle in list(abertas):
+                fechar_guia(handle)
+            try:
+                self.driver.switch_to.window(guia_principal)
+            except Exception:
+                pass
+            return False
+
+    @medir_fase('rolagem')
+    def rolar_pagina_automaticamente(self, intervalo=1, limite=300, secao=None):
+        """Rola a página automaticamente até o final
+
+        Usa o motor assíncrono no navegador (um único execute_async_script que rola,
+        adapta passo/pausa ao crescimento do conteúdo e só resolve com a altura estável
+        no fim). Se ele falhar, usa o laço em Python (`_rolar_pagina_python`).
+
+        Args:
+            intervalo (float): Pausa base entre passos, em segundos
+            limite (float): Tempo máximo da rolagem no navegador, em segundos
+            secao (str): Nome da seção rolada; o andamento sai como 'secao_progresso'
+                em vez de 'rolagem'
+        """
+        try:
+            self.logger.info(f"Iniciando rolagem assíncrona no navegador (intervalo base: {intervalo}s)")
+            self.informar(f"\n→ Iniciando rolagem automática...")
+
+            with self.tempo_limite_script(limite + 10):
+                resultado = self.driver.execute_async_script(
+                    _JS_ROLAGEM_ASSINCRONA, 500, intervalo, max(intervalo, 1.0), limite
+                )
+
+            if resultado and resultado.get('ok'):
+                self.logger.info(
+                    f"Fim da página alcançado. Passos: {resultado['passos']} | Altura final: {resultado['altura']}px | "
+                    f"Crescimentos: {resultado['cresceu']} | Tempo: {resultado['ms'] / 1000:.1f}s"
+                )
+                self.informar(f"✓ Fim da página! {resultado['passos']} rolagens em {resultado['ms'] / 1000:.1f}s")
+                if secao:
+                    self.progresso.emitir('secao_progresso', secao=secao, percent=100)
+
+                # Linger no fim
+                self.pausar(2, "permanência no fim da página")
+                return True
+
+            self.logger.warning(f"Rolagem assíncrona não concluiu ({resultado}); usando o laço em Python")
+        except Exception as e:
+            self.logger.warning(f"Rolagem assíncrona falhou ({e}); usando o laço em Python")
+
+        return self._rolar_pagina_python(intervalo=intervalo, secao=secao)
+
+    def _rolar_pagina_python(self, intervalo=1, secao=None):
+        """Rola a página automaticamente até o final (laço em Python, um passo por ida ao navegador)"""
         try:
             self.logger.info(f"Iniciando rolagem automática (intervalo: {intervalo}s)")
-            print(f"\n→ Iniciando rolagem automática...")
+            self.informar(f"\n→ Iniciando rolagem automática...")
 
             rolagens = 0
             pixels_por_rolagem = 500
@@ -1154,14 +3889,16 @@ class PortalBot:
 
                 # Rolar
                 self.driver.execute_script(f"window.scrollBy(0, {pixels_por_rolagem}); window.dispatchEvent(new Event('scroll'));")
-                time.sleep(intervalo)
+                self.pausar(intervalo, "permanência por rolagem")
 
                 posicao = self.driver.execute_script("return window.pageYOffset;")
                 rolagens += 1
 
                 progresso = int(((posicao + altura_janela) / altura_total) * 100) if altura_total > 0 else 100
-                self.logger.info(f"Rolagem #{rolagens} - Progresso: {progresso}%")
-                print(f"  ✓ Rolagem #{rolagens} - {progresso}%")
+                if secao:
+                    self.progresso.emitir('secao_progresso', secao=secao, percent=progresso)
+                else:
+                    self.progresso.emitir('rolagem', rolagem=rolagens, percent=progresso)
 
                 # Verificar se chegou ao final (viewport encostou no fim)
                 if (posicao + altura_janela) >= (altura_total - 2):
@@ -1170,7 +3907,7 @@ class PortalBot:
                         "window.scrollTo(0, Math.max(document.body.scrollHeight, document.documentElement.scrollHeight));"
                         "window.dispatchEvent(new Event('scroll')); document.dispatchEvent(new Event('scroll'));"
                     )
-                    time.sleep(max(intervalo, 1.0))
+                    self.pausar(max(intervalo, 1.0), "contabilização do fim da página")
 
                     # Recalcula progresso final (garante 100% quando bateu no fim)
                     altura_total2 = self.driver.execute_script(
@@ -1185,26 +3922,29 @@ class PortalBot:
                     self.logger.info(
                         f"Fim da página alcançado. Total de rolagens: {rolagens} | Progresso final: {progresso2}%"
                     )
-                    print(f"✓ Fim da página! Total: {rolagens} rolagens | Progresso final: {progresso2}%")
+                    self.informar(f"✓ Fim da página! Total: {rolagens} rolagens | Progresso final: {progresso2}%")
 
                     # Linger no fim
-                    time.sleep(2)
+                    self.pausar(2, "permanência no fim da página")
                     break
 
             return True
 
         except Exception as e:
             self.logger.error(f"Erro durante rolagem: {e}")
-            print(f"✗ Erro durante rolagem: {e}")
+            self.informar(f"✗ Erro durante rolagem: {e}")
             return False
 
+    @medir_fase('voltar_timeline')
     def voltar_para_timeline_salva(self):
         """Volta para a timeline usando a URL salva (mais confiável que breadcrumb na TA)"""
+        self.invalidar_snapshot_timeline()
         try:
             if getattr(self, "timeline_url", None):
                 self.logger.info(f"Voltando para timeline via URL salva: {self.timeline_url}")
+                self.aplicar_perfil_bloqueio('timeline')
                 self.driver.get(self.timeline_url)
-                time.sleep(2)
+                self.aguardar(documento_pronto(), "timeline recarregada")
                 # Validar que chegamos numa página com filtros da timeline
                 if "timeline" in self.driver.current_url:
                     return True
@@ -1216,11 +3956,13 @@ class PortalBot:
             self.logger.error(f"Erro ao voltar para timeline salva: {e}")
             return self.voltar_para_disciplina()
 
+    @medir_fase('voltar_timeline')
     def voltar_para_disciplina(self):
         """Volta para a página da disciplina de forma segura"""
+        self.invalidar_snapshot_timeline()
         try:
             self.logger.info("Voltando para disciplina...")
-            print("\n→ Voltando para disciplina...")
+            self.informar("\n→ Voltando para disciplina...")
 
             # ✅ VERIFICAR SESSÃO ANTES DE QUALQUER OPERAÇÃO
             if not self.verificar_sessao_valida():
@@ -1234,7 +3976,7 @@ class PortalBot:
             # Se já estamos na timeline, não precisa fazer nada
             if "timeline" in current_url:
                 self.logger.info("Já está na timeline da disciplina")
-                print("✓ Já está na timeline da disciplina")
+                self.informar("✓ Já está na timeline da disciplina")
                 return True
 
             # Tentar voltar via breadcrumb
@@ -1242,8 +3984,9 @@ class PortalBot:
                 breadcrumb = self.driver.find_element(By.CSS_SELECTOR, ".breadcrumb li:nth-last-child(2) a")
                 breadcrumb.click()
                 self.logger.info("Retornou para a timeline da disciplina via breadcrumb")
-                print("✓ Retornou para a timeline da disciplina")
-                time.sleep(2)
+                self.informar("✓ Retornou para a timeline da disciplina")
+                self.aguardar(url_mudou(current_url), "navegação via breadcrumb")
+                self.aguardar(documento_pronto(), "timeline carregada")
                 return True
             except Exception as e:
                 self.logger.info(f"Breadcrumb não encontrado: {e}")
@@ -1252,48 +3995,990 @@ class PortalBot:
             try:
                 self.driver.back()
                 self.logger.info("Voltou via navegador back()")
-                time.sleep(2)
+                self.aguardar(url_mudou(current_url), "navegação via back()")
+                self.aguardar(documento_pronto(), "página anterior carregada")
 
                 # Verificar se voltou para timeline
                 if "timeline" in self.driver.current_url:
                     self.logger.info("Voltou com sucesso para timeline")
-                    print("✓ Voltou para timeline via navegador")
+                    self.informar("✓ Voltou para timeline via navegador")
                     return True
             except Exception as e:
                 self.logger.error(f"Erro ao voltar via navegador: {e}")
 
             self.logger.warning("Não foi possível voltar para timeline, mas continuando...")
-            print("⚠ Não foi possível voltar para timeline, continuando...")
+            self.informar("⚠ Não foi possível voltar para timeline, continuando...")
             return True
 
         except Exception as e:
             self.logger.error(f"Erro ao voltar para disciplina: {e}")
-            print(f"✗ Erro ao voltar: {e}")
+            self.informar(f"✗ Erro ao voltar: {e}")
             return False
 
     def fechar(self):
         """Fecha o navegador"""
         self.logger.info("Encerrando bot...")
-        print("\n→ Encerrando bot...")
+        self.informar("\n→ Encerrando bot...")
+
+        if self.contar_rede:
+            rede = self.contar_requisicoes_rede()
+            self.logger.info(f"Rede: {rede['bloqueadas']} requisições bloqueadas, {rede['permitidas']} permitidas")
 
         # Salvar log final
         self.logger.info("=== BOT ENCERRADO ===")
 
-        self.driver.quit()
-        print("✓ Bot encerrado!")
-        print(f"📄 Log salvo em: {self.log_filename}")
+        self._encerrar_driver()
+        if self._driver_reserva is not None:
+            try:
+                self._driver_reserva.result().quit()
+            except Exception:
+                pass
+            self._driver_reserva = None
+        self._executor_driver.shutdown(wait=False)
+        self.registro.fechar()
+        if self.capturas is not None:
+            self.capturas.fechar()
+            if self.capturas.gravadas:
+                self.informar(f"📸 {self.capturas.gravadas} captura(s) de depuração em: {self.capturas.pasta}")
+        try:
+            self.fases.salvar_relatorio(self.arquivo_relatorio, informar=self.informar)
+            if self.comandos:
+                self.comandos.salvar(self.arquivo_relatorio.replace('desempenho_', 'comandos_'), informar=self.informar)
+        except Exception as e:
+            self.logger.warning(f"Não foi possível gravar o relatório de desempenho: {e}")
+        self.informar("✓ Bot encerrado!")
+        self.informar(f"📄 Log salvo em: {self.log_filename}")
+        # Por último: o barramento entrega as mensagens acima antes de encerrar
+        if self._progresso_proprio:
+            self.progresso.fechar()
+        else:
+            self.progresso.esvaziar()
+
+
+# ============================================================
+# TRATADORES DE ATIVIDADE (um por tipo de card da timeline)
+# ============================================================
+
+TRATADORES_ATIVIDADE = {}
+
+
+def registrar_tratador(classe):
+    """Registra (decorador) o tratador de um tipo de atividade em TRATADORES_ATIVIDADE
+
+    A ordem de registro é a ordem em que os tratadores tentam reconhecer cada card. Um
+    tratador sem `tipo` ou sem algum método abstrato falha aqui, na importação.
+    """
+    if not classe.tipo:
+        raise ValueError(f"Tratador {classe.__name__} sem tipo")
+    TRATADORES_ATIVIDADE[classe.tipo] = classe()
+    return classe
+
+
+class TratadorAtividade(ABC):
+    """Como um tipo de atividade é reconhecido na timeline, aberto e processado
+
+    O snapshot da timeline usa `reconhece`, `href` e `titulo` para classificar cada card;
+    `processar_atividades` entrega cada card pendente ao tratador do seu tipo. Sessão,
+    memória, cancelamento e registro ficam no orquestrador, iguais para todos os tipos.
+    """
+
+    tipo = None                   # Código do tipo no snapshot, no registro e no --modo
+    nome = None                   # Nome legível (logs)
+    unidades = "atividade"        # O que `processar` percorre (mensagens e registro)
+    perfil_bloqueio = 'timeline'  # Perfil de PERFIS_BLOQUEIO ao abrir pela URL
+    filtro = None                 # Passado a configurar_filtros (None = o próprio tipo)
+
+    @abstractmethod
+    def reconhece(self, titulo, titulo_curto):
+        """True se o card (título completo e o `small` do título) é deste tipo"""
+
+    def href(self, card):
+        """URL do botão do card que abre a atividade (navegação direta)"""
+        return card.get('href_atividade')
+
+    def titulo(self, titulo, titulo_curto):
+        """Título usado no registro e nos logs"""
+        return titulo
+
+    @abstractmethod
+    def acessar(self, bot, atividade):
+        """Abre a atividade pelo card da timeline (fluxo por clique)"""
+
+    @abstractmethod
+    def processar(self, bot, atividade):
+        """Processa a atividade já aberta; True se tudo foi concluído"""
+
+
+@registrar_tratador
+class TratadorConteudoWeb(TratadorAtividade):
+    """Conteúdo WEB (CW): engaja todas as seções do material externo"""
+
+    tipo = 'CW'
+    nome = "Conteúdo WEB"
+    unidades = "seções"
+
+    def reconhece(self, titulo, titulo_curto):
+        return titulo_curto.lower().startswith('cw')
+
+    def titulo(self, titulo, titulo_curto):
+        return titulo_curto
+
+    def acessar(self, bot, atividade):
+        return bot.acessar_atividade(atividade)
+
+    def processar(self, bot, atividade):
+        bot.informar(f"\n🔍 Verificando seções do material externo...")
+        return bot.processar_todas_secoes_material_externo()
+
+
+@registrar_tratador
+class TratadorTeleaula(TratadorAtividade):
+    """Teleaula (TA): assiste os vídeos da página videoAnotacao em pulos de 55s"""
+
+    tipo = 'TA'
+    nome = "Teleaula"
+    unidades = "vídeos"
+    perfil_bloqueio = 'teleaula'
+    passo_segundos = 55
+
+    def reconhece(self, titulo, titulo_curto):
+        return re.search(r"\bta\s*\d+\b", titulo.lower()) is not None
+
+    def href(self, card):
+        return card.get('href_video')
+
+    def acessar(self, bot, atividade):
+        return bot.acessar_teleaula(atividade)
+
+    def processar(self, bot, atividade):
+        return bot.processar_videos_teleaula(passo_segundos=self.passo_segundos)
+
+
+def processar_atividades(bot, disciplina, modos):
+    """Processa, numa única passada pela timeline, as atividades dos tipos pedidos
+
+    Aplica um filtro só com os tipos pedidos, lê o snapshot uma vez e entrega cada card
+    pendente, na ordem da timeline, ao tratador do seu tipo (TRATADORES_ATIVIDADE).
+
+    Args:
+        bot (PortalBot): Bot com a timeline da disciplina aberta
+        disciplina (dict): {'nome', 'url', ...}
+        modos (list): Tipos de atividade ('CW', 'TA'...)
+
+    Returns:
+        bool: True se todas as atividades foram processadas, False se o processamento foi interrompido
+    """
+    rotulo = "+".join(modos)
+    filtros = [TRATADORES_ATIVIDADE[m].filtro or m for m in modos]
+    if not bot.configurar_filtros(*filtros):
+        return False
+
+    atividades = bot._atividades_do_tipo(*modos, forcar=True)
+    totais = {m: sum(1 for a in atividades if a['tipo'] == m) for m in modos}
+    bot.logger.info(f"Total de atividades {rotulo} encontradas: {totais}")
+
+    if not atividades:
+        bot.informar(f"\n✗ Nenhuma atividade {rotulo} encontrada")
+        return True
+
+    bot.informar(f"\n{'='*60}")
+    bot.informar(f"✓ Encontradas {len(atividades)} atividades {rotulo} "
+          f"({', '.join(f'{m}: {n}' for m, n in totais.items())})")
+    bot.informar(f"{'='*60}\n")
+
+    bot.total_atividades = len(atividades)
+    bot.disciplina_atual = disciplina['nome']
+
+    # Navegação direta: coletar as URLs de todas as atividades uma única vez
+    atividades_diretas = bot.listar_atividades_diretas(*modos) if bot.navegacao_direta else None
+
+    for i in bot.indices_pendentes(*modos):
+        card = atividades[i]
+        tratador = TRATADORES_ATIVIDADE[card['tipo']]
+        bot.informar(f"\n{'='*60}")
+        bot.informar(f"PROCESSANDO {card['tipo']} {card['indice'] + 1}/{totais[card['tipo']]} "
+              f"({i + 1}/{len(atividades)})")
+        bot.informar(f"{'='*60}")
+
+        bot.atividade_atual_index = i
+        bot.salvar_progresso()
+
+        if bot.cancelamento.is_set():
+            bot.informar("🛑 Cancelamento pedido; parando antes da próxima atividade")
+            return False
+
+        # Governador de memória: se reciclou o navegador, reaplicar o filtro
+        if bot.verificar_memoria(f"entre atividades {rotulo}") and atividades_diretas is None:
+            if not bot.configurar_filtros(*filtros):
+                bot.informar("✗ Erro ao reconfigurar filtros após reciclar o navegador!")
+                return False
+
+        if not bot.verificar_sessao_valida():
+            bot.informar("✗ Sessão perdida! Tentando recuperar...")
+            if bot.recuperar_sessao():
+                bot.informar("✅ Sessão recuperada! Continuando processamento...")
+            else:
+                bot.informar("✗ Falha ao recuperar sessão! Reinicie o bot.")
+                return False
+
+        if atividades_diretas is not None:
+            atividade = atividades_diretas[i]
+        else:
+            # A timeline foi re-renderizada desde o snapshot: buscar o card de novo
+            atividade = bot._obter_atividade_por_indice(card['tipo'], card['indice'])
+
+        if not atividade:
+            bot.informar(f"✗ Não foi possível encontrar a atividade {card['tipo']} #{card['indice'] + 1}")
+            return False
+
+        # Concluída no registro ou já 100%: pula para a próxima (economiza sessão/tempo)
+        if bot.atividade_ja_concluida(atividade):
+            continue
+
+        bot.iniciar_atividade(atividade)
+        if atividades_diretas is not None:
+            acessou = bot.acessar_atividade_por_url(atividade)
+        else:
+            acessou = tratador.acessar(bot, atividade)
+
+        if not acessou:
+            bot.registro.falhar(bot.chave_atividade, "não foi possível abrir a atividade")
+            continue
+
+        if not bot.verificar_sessao_valida():
+            bot.informar(f"✗ Sessão perdida antes de processar {tratador.unidades}!")
+            return False
+
+        # Só conclui a atividade se nenhuma seção/vídeo dela falhou ou ficou pela metade
+        if tratador.processar(bot, atividade) and not bot.registro.pendente(bot.chave_atividade):
+            bot.registro.concluir(bot.chave_atividade)
+            bot.informar(f"✓ {atividade['titulo']} concluída ({tratador.unidades})!")
+        else:
+            bot.registro.falhar(bot.chave_atividade, f"problema ao processar {tratador.unidades}")
+            bot.informar(f"⚠ Algum problema ao processar {tratador.unidades} de {atividade['titulo']}")
+
+        if not bot.verificar_sessao_valida():
+            bot.informar(f"✗ Sessão perdida após processar {tratador.unidades}!")
+            return False
+
+        # Na navegação direta a próxima atividade é aberta pela URL; sem volta à timeline
+        if atividades_diretas is None:
+            if not bot.voltar_para_timeline_salva():
+                bot.informar("✗ Erro ao voltar para disciplina! Sessão pode ter expirado.")
+                return False
+
+            if not bot.verificar_sessao_valida():
+                bot.informar("✗ Sessão perdida ao voltar!")
+                return False
+
+            # Reaplicar o filtro antes de buscar a próxima atividade
+            if not bot.configurar_filtros(*filtros):
+                bot.informar("✗ Erro ao reconfigurar filtros!")
+                return False
+
+        bot.salvar_progresso()
+        bot.concluir_atividade(atividade)
+
+    bot.informar(f"\n{'='*60}")
+    bot.informar(f"✅ TODAS AS {len(atividades)} ATIVIDADES {rotulo} FORAM PROCESSADAS!")
+    bot.informar(f"{'='*60}\n")
+    return True
+
+
+def processar_disciplina(bot, disciplina, modo):
+    """Acessa a disciplina e processa suas atividades do(s) modo(s) informado(s)
+
+    Com vários modos, todos são processados numa única passada pela timeline; cada modo
+    continua com a sua chave no registro ('CW|disciplina', 'TA|disciplina'). Uma disciplina
+    concluída só é pulada por `PORTAL_REVALIDAR_DISCIPLINA_H` horas; depois disso a timeline
+    é relida (as atividades já concluídas continuam sendo puladas pelo snapshot) para pegar
+    atividades publicadas depois.
+
+    Args:
+        bot (PortalBot): Bot já logado e dentro do curso
+        disciplina (dict): {'nome', 'url', 'elemento'} (sem 'elemento', a disciplina é aberta pela URL)
+        modo (str|list): 'CW' (Conteúdo WEB), 'TA' (Teleaula) ou uma lista de modos
+
+    Returns:
+        bool: True se todas as atividades foram processadas
+    """
+    modos = [modo] if isinstance(modo, str) else list(modo)
+    rotulo = "+".join(modos)
+    bot.chaves_disciplina = {m: RegistroExecucao.chave(m, disciplina['nome']) for m in modos}
+    bot.chave_atividade = None
+
+    concluidos = [
+        m for m in modos
+        if bot.registro.concluida(bot.chaves_disciplina[m], validade_s=bot.validade_disciplina_s)
+    ]
+    if concluidos:
+        bot.informar(f"✓ {disciplina['nome']} ({'+'.join(concluidos)}) já concluída no registro — pulando.")
+        bot.logger.info(f"Disciplina {disciplina['nome']} ({'+'.join(concluidos)}) já concluída no registro — pulando")
+        modos = [m for m in modos if m not in concluidos]
+        if not modos:
+            return True
+        rotulo = "+".join(modos)
+        bot.chaves_disciplina = {m: bot.chaves_disciplina[m] for m in modos}
+    bot.chave_disciplina = bot.chaves_disciplina[modos[0]]
+
+    with bot.fases.fase('disciplina', disciplina=disciplina['nome'], modo=rotulo) as span:
+        ok = _processar_disciplina_aberta(bot, disciplina, modos)
+        span['ok'] = ok
+    try:
+        bot.fases.salvar_relatorio(bot.arquivo_relatorio, imprimir=False)
+    except Exception as e:
+        bot.logger.warning(f"Não foi possível gravar o relatório de desempenho: {e}")
+    return ok
+
+
+def _processar_disciplina_aberta(bot, disciplina, modos):
+    """Corpo de `processar_disciplina`, medido como a fase 'disciplina'"""
+    rotulo = "+".join(modos)
+    for chave in bot.chaves_disciplina.values():
+        bot.registro.iniciar(chave, 'disciplina', titulo=disciplina['nome'])
+    bot.progresso.emitir('disciplina_iniciada', disciplina=disciplina['nome'], modo=rotulo)
+    if not bot.acessar_disciplina(disciplina):
+        for chave in bot.chaves_disciplina.values():
+            bot.registro.falhar(chave, "não foi possível acessar a disciplina")
+        return False
+
+    # Guardar URL da timeline da disciplina (para voltar após TA)
+    bot.timeline_url = bot.driver.current_url
+    bot.logger.info(f"Timeline URL salva: {bot.timeline_url}")
+    bot.modo_execucao = rotulo
+
+    ok = processar_atividades(bot, disciplina, modos)
+
+    # Só fecha a disciplina (em cada modo) no registro se nenhuma atividade, seção ou vídeo
+    # ficou pendente
+    for modo, chave in bot.chaves_disciplina.items():
+        resumo = bot.registro.resumo(pai=chave, recursivo=True)
+        if ok and not resumo.get('falhou') and not resumo.get('em_andamento'):
+            bot.registro.concluir(chave)
+        else:
+            bot.registro.falhar(chave, f"atividades pendentes: {resumo}")
+        bot.logger.info(f"Registro de {disciplina['nome']} ({modo}): {resumo}")
+    bot.progresso.emitir('disciplina_concluida', disciplina=disciplina['nome'], modo=rotulo, ok=ok)
+    return ok
+
+
+def calcular_tamanho_pool(solicitado=None, memoria_mb=None, mb_por_navegador=None):
+    """Calcula quantos navegadores cabem no orçamento de memória
+
+    Args:
+        solicitado (int): Workers pedidos (padrão: número de CPUs)
+        memoria_mb (int): Orçamento total em MB (padrão: env PORTAL_MEMORIA_MB ou 80% da RAM livre)
+        mb_por_navegador (int): Estimativa de RAM por navegador (padrão: env PORTAL_MB_POR_NAVEGADOR ou 700)
+
+    Returns:
+        int: Tamanho do pool (no mínimo 1)
+    """
+    if mb_por_navegador is None:
+        mb_por_navegador = _env_int('PORTAL_MB_POR_NAVEGADOR', 700)
+    if memoria_mb is None:
+        memoria_mb = _env_int('PORTAL_MEMORIA_MB', 0) or int(psutil.virtual_memory().available / 1024 ** 2 * 0.8)
+    if solicitado is None:
+        solicitado = os.cpu_count() or 1
+
+    limite = max(1, memoria_mb // max(1, mb_por_navegador))
+    return max(1, min(solicitado, limite))
+
+
+# Duração padrão de uma atividade (s) enquanto o registro não tem histórico do modo
+DURACAO_PADRAO_ATIVIDADE = {'CW': 240, 'TA': 600}
+
+
+def planejar_lote(bot, disciplinas, modos):
+    """Monta as unidades de trabalho (disciplina + modos) ordenadas pelo tempo restante estimado
+
+    Cada disciplina vira uma única unidade com os modos que ainda têm algo pendente,
+    processados numa só passada pela timeline. O tempo da unidade é a soma, por modo, de
+    atividades pendentes × duração média das atividades do modo no registro (ou
+    `DURACAO_PADRAO_ATIVIDADE`). As mais longas vão primeiro, o que encurta o tempo total
+    com vários workers; disciplinas sem nada pendente ficam de fora.
+
+    Returns:
+        list: [{'nome', 'url', 'modo' (lista), 'pendentes' (modo -> n), 'estimativa'}] em ordem de execução
+    """
+    medias = {
+        modo: bot.registro.duracao_media('atividade', prefixo=f"{modo}|") or DURACAO_PADRAO_ATIVIDADE[modo]
+        for modo in modos
+    }
+
+    unidades = []
+    for disciplina in disciplinas:
+        pendentes = bot.estimar_disciplina(disciplina, modos)
+        for modo in modos:
+            if pendentes[modo] == 0:
+                bot.logger.info(f"Lote: {disciplina['nome']} ({modo}) sem atividades pendentes — pulando")
+                bot.informar(f"⏭ {disciplina['nome']} ({modo}): nada pendente")
+        modos_pendentes = [m for m in modos if pendentes[m] != 0]
+        if not modos_pendentes:
+            continue
+        # Sem cards visíveis do modo: não dá para estimar, não soma nada
+        estimativa = sum(pendentes[m] * medias[m] for m in modos_pendentes if pendentes[m] is not None)
+        unidades.append({
+            'nome': disciplina['nome'], 'url': disciplina['url'], 'modo': modos_pendentes,
+            'pendentes': {m: pendentes[m] for m in modos_pendentes}, 'estimativa': estimativa,
+        })
+
+    unidades.sort(key=lambda u: u['estimativa'], reverse=True)
+
+    linhas = [f"\n🗓 Plano do lote ({len(unidades)} unidades):"]
+    for u in unidades:
+        pend = ", ".join(f"{m} {n if n is not None else '?'}" for m, n in u['pendentes'].items())
+        linhas.append(f"  • {u['nome']}: {pend} pendente(s), ~{u['estimativa'] / 60:.0f} min")
+    bot.informar("\n".join(linhas))
+    bot.logger.info(f"Plano do lote: {[(u['nome'], '+'.join(u['modo']), round(u['estimativa'])) for u in unidades]}")
+    return unidades
+
+
+class PoolDisciplinas:
+    """Processa várias disciplinas em paralelo, com um PortalBot (um navegador) por worker.
+
+    Cada worker faz o próprio login e pega a próxima unidade (disciplina + modos) livre da
+    fila; os modos de uma unidade são processados numa só passada pela timeline. O primeiro worker logado preenche a fila com `listar_disciplinas()` e, no modo
+    lote, ordena as unidades pelo tempo restante estimado (`planejar_lote`). Erros ficam
+    isolados na unidade (ou no worker) em que ocorreram e o progresso é agregado em
+    `resultados`. Todos os workers publicam num único barramento de progresso, então as
+    saídas (console, JSON-lines) recebem as mensagens do pool inteiro numa só thread.
+    """
+
+    def __init__(self, modo="CW", workers=None, headless=True, memoria_mb=None, mb_por_navegador=None,
+                 filtro=None, ordenar=False, prazo_min=None):
+        """
+        Args:
+            modo (str|list): 'CW', 'TA' ou uma lista de modos (ex.: ['CW', 'TA'])
+            workers (int): Navegadores desejados (limitado pelo orçamento de memória)
+            headless (bool): Executa os navegadores sem janela
+            memoria_mb (int): Orçamento de memória para o pool inteiro
+            mb_por_navegador (int): Estimativa de RAM por navegador
+            filtro (callable): Recebe o nome da disciplina e retorna True para processá-la
+            ordenar (bool): Estima o trabalho restante e processa as unidades mais longas primeiro
+            prazo_min (float): Janela em minutos; depois dela, unidades que não cabem no tempo
+                restante não são iniciadas (ficam 'adiada')
+        """
+        self.modos = [modo] if isinstance(modo, str) else list(modo)
+        self.headless = headless
+        self.filtro = filtro
+        self.ordenar = ordenar
+        self.prazo = time.monotonic() + prazo_min * 60 if prazo_min else None
+        self.workers = calcular_tamanho_pool(workers, memoria_mb, mb_por_navegador)
+        self.fila = queue.Queue()
+        self.resultados = {}
+        self.logger = logging.getLogger('PortalBot')
+        self._lock = threading.Lock()
+        self._lock_fila = threading.Lock()
+        self._fila_preenchida = False
+        self.progresso = BarramentoProgresso.a_partir_do_ambiente()
+
+    def informar(self, texto):
+        """Mensagem ao usuário pelo barramento do pool (o mesmo dos workers)"""
+        self.progresso.emitir('mensagem', texto=texto)
+
+    def executar(self):
+        """Inicia os workers e aguarda todos terminarem
+
+        Returns:
+            dict: 'disciplina [modos]' -> {'status', 'worker', 'duracao', 'erro'}
+        """
+        modos = "+".join(self.modos)
+        self.logger.info(f"Pool de disciplinas: {self.workers} worker(s), modo {modos}")
+        self.informar(f"\n🚀 Iniciando pool com {self.workers} navegador(es) - modo {modos}")
+
+        threads = [
+            threading.Thread(target=self._worker, args=(n,), name=f"worker-{n}", daemon=True)
+            for n in range(1, self.workers + 1)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self._imprimir_resumo(final=True)
+        self.progresso.fechar()
+        return self.resultados
+
+    def _preencher_fila(self, bot):
+        """Lista as disciplinas (uma única vez, pelo primeiro worker logado) e enfileira"""
+        with self._lock_fila:
+            if self._fila_preenchida:
+                return
+            # O WebElement só vale no navegador que listou; os workers abrem pela URL
+            disciplinas = [
+                {'nome': d['nome'], 'url': d['url']} for d in bot.listar_disciplinas()
+                if not self.filtro or self.filtro(d['nome'])
+            ]
+            if self.ordenar:
+                unidades = planejar_lote(bot, disciplinas, self.modos)
+            else:
+                unidades = [dict(d, modo=self.modos, estimativa=0) for d in disciplinas]
+
+            for unidade in unidades:
+                self.fila.put(unidade)
+                self._registrar(self._rotulo(unidade), 'pendente')
+            self._fila_preenchida = True
+            self.logger.info(f"Pool: {self.fila.qsize()} unidade(s) na fila")
+
+    @staticmethod
+    def _rotulo(unidade):
+        return f"{unidade['nome']} [{'+'.join(unidade['modo'])}]"
+
+    def _worker(self, n):
+        """Loop de um worker: login, depois disciplinas da fila até esvaziar"""
+        nome_worker = f"worker-{n}"
+        bot = None
+        try:
+            bot = PortalBot(headless=self.headless, progresso=self.progresso)
+            if not (bot.iniciar_sessao() and bot.entrar_curso_agronomia()):
+                raise RuntimeError("falha no login/acesso ao curso")
+
+            self._preencher_fila(bot)
+
+            while True:
+                try:
+                    unidade = self.fila.get_nowait()
+                except queue.Empty:
+                    break
+
+                rotulo = self._rotulo(unidade)
+                # Janela de execução: não começar o que não cabe no tempo restante
+                if self.prazo is not None and time.monotonic() + unidade['estimativa'] > self.prazo:
+                    self._registrar(rotulo, 'adiada', nome_worker, erro="não cabe no prazo")
+                    self.fila.task_done()
+                    continue
+
+                inicio = time.monotonic()
+                self._registrar(rotulo, 'em_andamento', nome_worker)
+                try:
+                    if not bot.verificar_sessao_valida() and not bot.recuperar_sessao():
+                        raise RuntimeError("sessão perdida e não recuperada")
+                    ok = processar_disciplina(bot, unidade, unidade['modo'])
+                    self._registrar(rotulo, 'ok' if ok else 'incompleta', nome_worker,
+                                    duracao=time.monotonic() - inicio)
+                except Exception as e:
+                    self.logger.error(f"[{nome_worker}] Erro em {rotulo}: {e}")
+                    bot.capturar_depuracao(f"erro_{'_'.join(unidade['modo'])}", erro=e)
+                    self._registrar(rotulo, 'erro', nome_worker,
+                                    duracao=time.monotonic() - inicio, erro=str(e))
+                finally:
+                    self.fila.task_done()
+
+        except Exception as e:
+            self.logger.error(f"[{nome_worker}] Worker encerrado por erro: {e}")
+            self.informar(f"✗ [{nome_worker}] Worker encerrado por erro: {e}")
+        finally:
+            if bot:
+                try:
+                    bot.fechar()
+                except Exception:
+                    pass
+
+    def _registrar(self, nome, status, worker=None, duracao=None, erro=None):
+        """Atualiza o progresso agregado de uma unidade"""
+        with self._lock:
+            self.resultados[nome] = {'status': status, 'worker': worker, 'duracao': duracao, 'erro': erro}
+        if status != 'pendente':
+            self.logger.info(f"Pool: [{worker}] {nome} -> {status}")
+            self._imprimir_resumo()
+
+    def _imprimir_resumo(self, final=False):
+        """Mostra o progresso agregado de todos os workers"""
+        with self._lock:
+            status = [r['status'] for r in self.resultados.values()]
+        total = len(status)
+        concluidas = sum(s in ('ok', 'incompleta', 'erro', 'adiada') for s in status)
+        linhas = [
+            f"📊 Pool: {concluidas}/{total} unidades finalizadas | "
+            f"{status.count('em_andamento')} em andamento | {status.count('ok')} ok | "
+            f"{status.count('incompleta')} incompletas | {status.count('erro')} com erro | "
+            f"{status.count('adiada')} adiadas"
+        ]
+        if final:
+            for nome, r in self.resultados.items():
+                duracao = f"{r['duracao']:.0f}s" if r['duracao'] is not None else "-"
+                linhas.append(f"  • {nome}: {r['status']} ({r['worker'] or '-'}, {duracao}){' - ' + r['erro'] if r['erro'] else ''}")
+        self.informar("\n".join(linhas))
+
+
+def codigo_saida(resultados):
+    """Código de saída de uma execução do pool/lote
+
+    0 = tudo ok; 1 = alguma unidade com erro, incompleta ou cancelada (ou nada foi
+    processado); 2 = só ficaram unidades adiadas pelo prazo.
+    """
+    status = [r['status'] for r in resultados.values()]
+    if not status or any(s in ('erro', 'incompleta', 'cancelada', 'pendente', 'em_andamento') for s in status):
+        return 1
+    if 'adiada' in status:
+        return 2
+    return 0
+
+
+def filtro_disciplinas(texto):
+    """Monta o filtro do pool a partir de trechos separados por vírgula (sem diferenciar maiúsculas)
+
+    Returns:
+        callable: nome -> bool, ou None se `texto` estiver vazio
+    """
+    trechos = [t.strip().lower() for t in (texto or '').split(',') if t.strip()]
+    if not trechos:
+        return None
+    return lambda nome: any(t in nome.lower() for t in trechos)
+
+
+# ============================================================
+# FRENTE TELEGRAM (asyncio + executor limitado)
+# ============================================================
+
+def executar_job_telegram(job):
+    """Executa um job pedido pelo Telegram numa thread do executor (nunca no event loop)
+
+    Faz login, percorre as disciplinas filtradas (todos os modos numa só passada por
+    disciplina) e deixa o andamento em `job` (fase, unidade atual, resultados), de onde a
+    frente Telegram monta a mensagem.
+
+    Returns:
+        int: Código de saída, como em `codigo_saida`
+    """
+    bot = None
+    resultados = job['resultados']
+    try:
+        job['fase'] = 'login'
+        bot = PortalBot(headless=True)
+        bot.cancelamento = job['cancelamento']
+        bot.progresso.adicionar_saida(SaidaChat(lambda texto: job.__setitem__('ultimo_evento', texto)))
+        job['bot'] = bot
+        if not (bot.iniciar_sessao() and bot.entrar_curso_agronomia()):
+            job['fase'] = 'falha no login'
+            return 1
+
+        job['fase'] = 'listando disciplinas'
+        filtro = filtro_disciplinas(job['disciplinas'])
+        disciplinas = [
+            {'nome': d['nome'], 'url': d['url']} for d in bot.listar_disciplinas()
+            if not filtro or filtro(d['nome'])
+        ]
+        unidades = [dict(d, modo=job['modos']) for d in disciplinas]
+        job['total'] = len(unidades)
+
+        job['fase'] = 'processando'
+        for n, unidade in enumerate(unidades, 1):
+            rotulo = PoolDisciplinas._rotulo(unidade)
+            if job['cancelamento'].is_set():
+                resultados[rotulo] = {'status': 'cancelada'}
+                continue
+            job['atual'] = (n, rotulo)
+            try:
+                ok = processar_disciplina(bot, unidade, unidade['modo'])
+                resultados[rotulo] = {'status': 'ok' if ok else 'incompleta'}
+            except Exception as e:
+                bot.logger.error(f"Telegram: erro em {rotulo}: {e}")
+                resultados[rotulo] = {'status': 'erro', 'erro': str(e)}
+
+        job['atual'] = None
+        job['fase'] = 'cancelado' if job['cancelamento'].is_set() else 'concluído'
+        return codigo_saida(resultados)
+
+    except Exception as e:
+        job['fase'] = f'erro: {e}'
+        return 1
+    finally:
+        if bot:
+            try:
+                bot.fechar()
+            except Exception:
+                pass
+
+
+class FrenteTelegram:
+    """Interface do bot pelo Telegram (/iniciar, /status, /cancelar) sobre python-telegram-bot.
+
+    O event loop só recebe comandos e edita mensagens; o trabalho com Selenium roda em um
+    ThreadPoolExecutor. Cada chat tem a sua fila (jobs do mesmo chat rodam em ordem) e um
+    semáforo limita quantos jobs rodam ao mesmo tempo no total (cada job = um navegador).
+    O andamento vai numa única mensagem por job, editada no máximo a cada
+    `intervalo_edicao` segundos. `base_url` permite apontar para um servidor local que
+    imita a Bot API.
+    """
+
+    MODOS = {'CW': ['CW'], 'TA': ['TA'], 'TODOS': ['CW', 'TA']}
+
+    def __init__(self, token, chats_autorizados=None, max_jobs=1, max_fila_por_chat=3,
+                 intervalo_edicao=3.0, base_url=None):
+        """
+        Args:
+            token (str): Token do bot (BotFather)
+            chats_autorizados (set): IDs de chat que podem usar o bot (vazio = nenhum)
+            max_jobs (int): Jobs (navegadores) simultâneos no total
+            max_fila_por_chat (int): Jobs aguardando por chat
+            intervalo_edicao (float): Intervalo mínimo entre edições da mensagem de progresso (s)
+            base_url (str): Base da Bot API, sem o token (padrão: https://api.telegram.org/bot)
+        """
+        if Application is None:
+            raise RuntimeError("python-telegram-bot não está instalado (pip install -r requirements.txt)")
+
+        self.chats_autorizados = set(chats_autorizados or ())
+        self.max_jobs = max(1, max_jobs)
+        self.max_fila_por_chat = max(1, max_fila_por_chat)
+        self.intervalo_edicao = intervalo_edicao
+        self.logger = logging.getLogger('PortalBot')
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="telegram-job")
+        self._semaforo = None  # criado dentro do event loop (post_init)
+        self._filas = {}       # chat_id -> asyncio.Queue de jobs
+        self._consumidores = {}  # chat_id -> asyncio.Task que consome a fila
+        self._atuais = {}      # chat_id -> job em execução
+        self._proximo_id = 1
+
+        construtor = Application.builder().token(token).post_init(self._ao_iniciar).post_shutdown(self._ao_encerrar)
+        if base_url:
+            # Mesmo formato do padrão do PTB: o token é concatenado ao final (ex.: http://127.0.0.1:8081/bot)
+            construtor = construtor.base_url(base_url)
+        self.app = construtor.build()
+
+        for comando, handler in (
+            ('start', self.cmd_ajuda), ('ajuda', self.cmd_ajuda), ('iniciar', self.cmd_iniciar),
+            ('status', self.cmd_status), ('cancelar', self.cmd_cancelar),
+        ):
+            self.app.add_handler(CommandHandler(comando, handler))
+
+    @classmethod
+    def a_partir_do_ambiente(cls):
+        """Cria a frente com TELEGRAM_TOKEN, TELEGRAM_CHAT_ID (lista separada por vírgula),
+        TELEGRAM_MAX_JOBS, TELEGRAM_INTERVALO_EDICAO e TELEGRAM_BASE_URL"""
+        token = os.getenv('TELEGRAM_TOKEN')
+        if not token:
+            raise ValueError("Configure TELEGRAM_TOKEN para usar o modo Telegram")
+        chats = {int(c) for c in os.getenv('TELEGRAM_CHAT_ID', '').split(',') if c.strip().lstrip('-').isdigit()}
+        return cls(
+            token,
+            chats_autorizados=chats,
+            max_jobs=_env_int('TELEGRAM_MAX_JOBS', 1),
+            intervalo_edicao=float(os.getenv('TELEGRAM_INTERVALO_EDICAO') or 3),
+            base_url=os.getenv('TELEGRAM_BASE_URL') or None,
+        )
+
+    def executar(self):
+        """Roda o polling até Ctrl+C / SIGTERM"""
+        self.logger.info("🤖 Bot iniciado! Aguardando comandos no Telegram...")
+        self.logger.info(f"Frente Telegram: até {self.max_jobs} job(s) simultâneo(s), chats {sorted(self.chats_autorizados)}")
+        self.app.run_polling(allowed_updates=Update.ALL_TYPES)
+
+    async def _ao_iniciar(self, app):
+        self._semaforo = asyncio.Semaphore(self.max_jobs)
+
+    async def _ao_encerrar(self, app):
+        for job in self._atuais.values():
+            job['cancelamento'].set()
+        for tarefa in self._consumidores.values():
+            tarefa.cancel()
+        await asyncio.gather(*self._consumidores.values(), return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _autorizado(self, update):
+        chat_id = update.effective_chat.id
+        if chat_id in self.chats_autorizados:
+            return True
+        self.logger.warning(f"Telegram: comando recusado do chat {chat_id}")
+        await update.effective_message.reply_text(
+            f"⛔ Chat não autorizado (id {chat_id}). Adicione-o em TELEGRAM_CHAT_ID."
+        )
+        return False
+
+    async def cmd_ajuda(self, update, context):
+        if not await self._autorizado(update):
+            return
+        await update.effective_message.reply_text(
+            "🤖 Bot ColaboraRead\n\n"
+            "/iniciar [CW|TA|TODOS] [trecho do nome da disciplina, ...] - Processar atividades\n"
+            "/status - Andamento do job atual e da fila\n"
+            "/cancelar - Cancelar o job atual (ao fim da atividade em andamento) e limpar a fila\n"
+            "/ajuda - Esta ajuda"
+        )
+
+    async def cmd_iniciar(self, update, context):
+        if not await self._autorizado(update):
+            return
+        chat_id = update.effective_chat.id
+        args = list(context.args or [])
+        modo = args.pop(0).upper() if args and args[0].upper() in self.MODOS else 'CW'
+
+        fila = self._filas.get(chat_id)
+        if fila is None:
+            fila = self._filas[chat_id] = asyncio.Queue(maxsize=self.max_fila_por_chat)
+            # Tarefa do asyncio e não application.create_task: o Application.stop() espera
+            # todas as suas tarefas terminarem, e este consumidor nunca termina sozinho.
+            self._consumidores[chat_id] = asyncio.create_task(self._consumir_fila(chat_id, fila))
+        if fila.full():
+            await update.effective_message.reply_text(f"⚠ Fila cheia ({self.max_fila_por_chat} jobs). Tente mais tarde.")
+            return
+
+        job = {
+            'id': self._proximo_id, 'chat_id': chat_id, 'modos': self.MODOS[modo],
+            'disciplinas': " ".join(args), 'fase': 'na fila', 'atual': None, 'total': 0,
+            'resultados': {}, 'cancelamento': threading.Event(), 'bot': None,
+            'inicio': None, 'mensagem': None,
+        }
+        self._proximo_id += 1
+        job['mensagem'] = await update.effective_message.reply_text(
+            f"⏳ Job #{job['id']} ({modo}) na fila - posição {fila.qsize() + 1}"
+        )
+        fila.put_nowait(job)
+        self.logger.info(f"Telegram: job #{job['id']} do chat {chat_id} enfileirado ({modo}, '{job['disciplinas']}')")
+
+    async def cmd_status(self, update, context):
+        if not await self._autorizado(update):
+            return
+        chat_id = update.effective_chat.id
+        job = self._atuais.get(chat_id)
+        fila = self._filas.get(chat_id)
+        na_fila = fila.qsize() if fila else 0
+        texto = self.texto_progresso(job) if job else "💤 Nenhum job em execução."
+        await update.effective_message.reply_text(f"{texto}\n\n📥 Na fila: {na_fila}")
+
+    async def cmd_cancelar(self, update, context):
+        if not await self._autorizado(update):
+            return
+        chat_id = update.effective_chat.id
+        removidos = 0
+        fila = self._filas.get(chat_id)
+        while fila and not fila.empty():
+            fila.get_nowait()
+            fila.task_done()
+            removidos += 1
+        job = self._atuais.get(chat_id)
+        if job:
+            job['cancelamento'].set()
+        await update.effective_message.reply_text(
+            f"🛑 Cancelamento pedido{' para o job #' + str(job['id']) if job else ''}; {removidos} job(s) removido(s) da fila."
+        )
+
+    async def _consumir_fila(self, chat_id, fila):
+        """Roda os jobs de um chat em ordem, respeitando o limite global de jobs"""
+        while True:
+            job = await fila.get()
+            try:
+                async with self._semaforo:
+                    self._atuais[chat_id] = job
+                    await self._rodar_job(job)
+            except Exception as e:
+                self.logger.error(f"Telegram: job #{job['id']} falhou: {e}")
+            finally:
+                self._atuais.pop(chat_id, None)
+                fila.task_done()
+
+    async def _rodar_job(self, job):
+        """Executa o job no executor e edita a mensagem de progresso enquanto ele roda"""
+        job['inicio'] = time.monotonic()
+        job['fase'] = 'iniciando'
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self.executor, executar_job_telegram, job)
+
+        ultimo_texto = None
+        while not futuro.done():
+            ultimo_texto = await self._editar_progresso(job, ultimo_texto)
+            await asyncio.wait({futuro}, timeout=self.intervalo_edicao)
+
+        codigo = await futuro
+        if job['cancelamento'].is_set():
+            job['fase'] = 'cancelado ⏹'
+        else:
+            job['fase'] = {0: 'concluído ✅', 2: 'concluído (com adiamentos)'}.get(codigo, job['fase'] + ' ⚠')
+        await self._editar_progresso(job, ultimo_texto)
+        self.logger.info(f"Telegram: job #{job['id']} terminou com código {codigo}")
+
+    async def _editar_progresso(self, job, ultimo_texto):
+        """Edita a mensagem do job se o texto mudou; respeita RetryAfter do Telegram"""
+        texto = self.texto_progresso(job)
+        if texto == ultimo_texto:
+            return ultimo_texto
+        try:
+            await job['mensagem'].edit_text(texto)
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            return ultimo_texto
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                self.logger.warning(f"Telegram: não consegui editar o progresso: {e}")
+        except TelegramError as e:
+            self.logger.warning(f"Telegram: erro ao editar o progresso: {e}")
+            return ultimo_texto
+        return texto
+
+    @staticmethod
+    def texto_progresso(job):
+        """Monta o texto da mensagem de progresso a partir do estado do job"""
+        linhas = [f"🤖 Job #{job['id']} - {'+'.join(job['modos'])} - {job['fase']}"]
+        if job.get('atual'):
+            n, rotulo = job['atual']
+            linhas.append(f"📚 {rotulo} ({n}/{job['total']})")
+            bot = job.get('bot')
+            if bot is not None and bot.total_atividades:
+                linhas.append(f"📊 Atividade {bot.atividade_atual_index + 1}/{bot.total_atividades}")
+            if job.get('ultimo_evento'):
+                linhas.append(job['ultimo_evento'])
+        simbolos = {'ok': '✓', 'incompleta': '⚠', 'erro': '✗', 'cancelada': '⏹'}
+        for rotulo, r in job['resultados'].items():
+            linhas.append(f"{simbolos.get(r['status'], '•')} {rotulo}")
+        if job.get('inicio') is not None:
+            linhas.append(f"⏱ {(time.monotonic() - job['inicio']) / 60:.1f} min")
+        return "\n".join(linhas)
 
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Bot ColaboraRead")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processa todas as disciplinas em paralelo com N navegadores")
+    parser.add_argument("--modo", choices=("CW", "TA", "TODOS"), default=os.getenv('PORTAL_MODO') or None,
+                        help="Tipo de atividade processado pelo pool/lote (padrão: CW; no lote, TODOS = "
+                             "CW e TA numa só passada por disciplina)")
+    parser.add_argument("--memoria-mb", type=int, default=None,
+                        help="Orçamento de memória que limita o tamanho do pool")
+    parser.add_argument("--lote", action="store_true", default=_env_bool('PORTAL_LOTE'),
+                        help="Modo lote sem interação: todas as disciplinas, ordenadas pelo tempo restante")
+    parser.add_argument("--disciplinas", default=os.getenv('PORTAL_DISCIPLINAS'),
+                        help="Só disciplinas cujo nome contém um destes trechos (separados por vírgula)")
+    parser.add_argument("--prazo-min", type=float, default=_env_int('PORTAL_PRAZO_MIN', 0) or None,
+                        help="Janela do lote em minutos: unidades que não cabem no tempo restante são adiadas")
+    parser.add_argument("--telegram", action="store_true", default=_env_bool('PORTAL_TELEGRAM'),
+                        help="Atende comandos pelo Telegram (/iniciar, /status, /cancelar)")
+    parser.add_argument("-v", "--verbose", action="store_const", const="DEBUG", dest="log_nivel",
+                        help="Log detalhado (esperas, passos de rolagem, guias) - o mesmo que PORTAL_LOG_NIVEL=DEBUG")
+    parser.add_argument("-q", "--quiet", action="store_const", const="WARNING", dest="log_nivel",
+                        help="Só avisos e erros no log")
+    args = parser.parse_args()
+    configurar_logging(args.log_nivel)
+
+    # `kill -USR1 <pid>` mostra a contagem de comandos WebDriver sem parar o bot
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, ContadorComandos.despejar_todos)
+
+    if args.telegram:
+        FrenteTelegram.a_partir_do_ambiente().executar()
+        return 0
+
+    if args.lote or args.workers:
+        modo = args.modo or ("TODOS" if args.lote else "CW")
+        pool = PoolDisciplinas(
+            modo=["CW", "TA"] if modo == "TODOS" else modo,
+            workers=args.workers or (_env_int('PORTAL_WORKERS', 1) if args.lote else None),
+            memoria_mb=args.memoria_mb,
+            filtro=filtro_disciplinas(args.disciplinas),
+            ordenar=args.lote,
+            prazo_min=args.prazo_min,
+        )
+        return codigo_saida(pool.executar())
+
     bot = None
 
     try:
         # Inicializar bot
         bot = PortalBot(headless=False)
 
-        # Fazer login
-        if bot.fazer_login():
+        # Fazer login (ou restaurar a sessão salva)
+        if bot.iniciar_sessao():
             # Entrar no curso
             if bot.entrar_curso_agronomia():
                 # Listar disciplinas
@@ -1304,208 +4989,13 @@ def main():
                     disciplina_escolhida = bot.escolher_disciplina(disciplinas)
 
                     if disciplina_escolhida:
-                        # Acessar a disciplina
-                        if bot.acessar_disciplina(disciplina_escolhida):
-                             # Guardar URL da timeline da disciplina (para voltar após TA)
-                            bot.timeline_url = bot.driver.current_url
-                            bot.logger.info(f"Timeline URL salva: {bot.timeline_url}")
-
-                            # ============================================================
-                            # Escolha do modo: CW (Conteúdo WEB) ou TA (Teleaula)
-                            # ============================================================
-                            modo = input("\n▶ O que você quer processar? [1] Conteúdo WEB (CW)  |  [2] Teleaula (TA)  (padrão: 1) : ").strip()
-                            if modo not in ("1", "2"):
-                                modo = "1"
-                            bot.modo_execucao = "CW" if modo == "1" else "TA"
-
-                            if modo == "2":
-                                # ------------------------------------------------------------
-                                # TELEAULA (TA)
-                                # ------------------------------------------------------------
-                                if bot.configurar_filtros_teleaula():
-
-                                    # SALVAR HTML PARA DEBUG (opcional)
-                                    bot.salvar_html_pagina("debug_antes_processamento_ta.html")
-
-                                    total_ta = bot.contar_atividades_ta()
-
-                                    if total_ta > 0:
-                                        print(f"\n{'='*60}")
-                                        print(f"✓ Encontradas {total_ta} atividades TA")
-                                        print(f"{'='*60}\n")
-
-                                        bot.total_atividades = total_ta
-                                        bot.disciplina_atual = disciplina_escolhida['nome']
-
-                                        for i in range(total_ta):
-                                            print(f"\n{'='*60}")
-                                            print(f"PROCESSANDO TA {i+1}/{total_ta}")
-                                            print(f"{'='*60}")
-
-                                            bot.atividade_atual_index = i
-                                            bot.salvar_progresso()
-
-                                            if not bot.verificar_sessao_valida():
-                                                print("✗ Sessão perdida! Tentando recuperar...")
-                                                if bot.recuperar_sessao():
-                                                    print("✅ Sessão recuperada! Continuando processamento...")
-                                                else:
-                                                    print("✗ Falha ao recuperar sessão! Reinicie o bot.")
-                                                    break
-
-                                            atividade = bot.obter_atividade_ta_por_indice(i)
-
-                                            if atividade:
-                                                print(f"→ Atividade encontrada: {atividade['titulo']}")
-                                                # Se já estiver 100%, pula para a próxima TA (economiza sessão/tempo)
-                                                try:
-                                                    if atividade.get('percent') == 100:
-                                                        msg_skip = f"✓ TA já está 100%: {atividade['titulo']} — pulando."
-                                                        print(msg_skip)
-                                                        bot.logger.info(msg_skip)
-                                                        continue
-                                                except Exception:
-                                                    pass
-
-
-                                                if bot.acessar_teleaula(atividade):
-
-                                                    if not bot.verificar_sessao_valida():
-                                                        print("✗ Sessão perdida antes de processar vídeos!")
-                                                        break
-
-                                                    # Assistir todos os vídeos (pulos de 55s)
-                                                    if bot.processar_videos_teleaula(passo_segundos=55):
-                                                        print(f"✓ Vídeos de {atividade['titulo']} processados!")
-                                                    else:
-                                                        print(f"⚠ Algum problema ao processar vídeos de {atividade['titulo']}")
-
-                                                    if not bot.verificar_sessao_valida():
-                                                        print("✗ Sessão perdida após processar vídeos!")
-                                                        break
-
-                                                    if not bot.voltar_para_timeline_salva():
-                                                        print("✗ Erro ao voltar para disciplina! Sessão pode ter expirado.")
-                                                        break
-
-                                                    if not bot.verificar_sessao_valida():
-                                                        print("✗ Sessão perdida ao voltar!")
-                                                        break
-
-                                                    # Reaplicar filtro Teleaula antes de buscar a próxima TA
-                                                    if not bot.configurar_filtros_teleaula():
-                                                        print("✗ Erro ao reconfigurar filtros Teleaula!")
-                                                        break
-
-                                                    bot.salvar_progresso()
-                                                    print(f"\n✓ {atividade['titulo']} concluída!")
-                                            else:
-                                                print(f"✗ Não foi possível encontrar a atividade TA #{i+1}")
-                                                break
-
-                                        print(f"\n{'='*60}")
-                                        print(f"✅ TODAS AS {total_ta} ATIVIDADES TA FORAM PROCESSADAS!")
-                                        print(f"{'='*60}\n")
-
-                                    else:
-                                        print("\n✗ Nenhuma atividade TA encontrada")
-
-                            else:
-                                # ------------------------------------------------------------
-                                # CONTEÚDO WEB (CW) - MANTIDO INTACTO
-                                # ------------------------------------------------------------
-                                # Configurar filtros para Conteúdo WEB
-                                if bot.configurar_filtros_conteudo_web():
-
-                                    # SALVAR HTML PARA DEBUG
-                                    bot.salvar_html_pagina("debug_antes_processamento.html")
-
-                                    # Contar quantas atividades CW existem
-                                    total_cw = bot.contar_atividades_cw()
-
-                                    if total_cw > 0:
-                                        print(f"\n{'='*60}")
-                                        print(f"✓ Encontradas {total_cw} atividades CW")
-                                        print(f"{'='*60}\n")
-
-                                        # NOVO: Inicializar rastreamento de progresso (Baby Step 2)
-                                        bot.total_atividades = total_cw
-                                        bot.disciplina_atual = disciplina_escolhida['nome']
-
-                                        # PROCESSAR CADA ATIVIDADE CW POR ÍNDICE
-                                        for i in range(total_cw):  # 0, 1, 2, 3 (índices)
-                                            print(f"\n{'='*60}")
-                                            print(f"PROCESSANDO {i+1}/{total_cw}")
-                                            print(f"{'='*60}")
-
-                                            # NOVO: Atualizar progresso atual
-                                            bot.atividade_atual_index = i
-                                            bot.salvar_progresso()
-
-                                            # ✅ VERIFICAR SESSÃO ANTES DE CADA OPERAÇÃO
-                                            if not bot.verificar_sessao_valida():
-                                                print("✗ Sessão perdida! Tentando recuperar...")
-                                                if bot.recuperar_sessao():
-                                                    print("✅ Sessão recuperada! Continuando processamento...")
-                                                    # Por enquanto apenas continuamos - próximo baby step tratará de voltar para a disciplina
-                                                else:
-                                                    print("✗ Falha ao recuperar sessão! Reinicie o bot.")
-                                                    break
-
-                                            # Buscar atividade por índice específico
-                                            atividade = bot.obter_atividade_cw_por_indice(i)
-
-                                            if atividade:
-                                                print(f"→ Atividade encontrada: {atividade['titulo']}")
-
-                                                # Acessar atividade
-                                                if bot.acessar_atividade(atividade):
-
-                                                    # ✅ VERIFICAR SESSÃO ANTES DE PROCESSAR SEÇÕES
-                                                    if not bot.verificar_sessao_valida():
-                                                        print("✗ Sessão perdida antes de processar seções!")
-                                                        break
-
-                                                    # Processar TODAS as seções do material externo
-                                                    print(f"\n🔍 Verificando seções do material externo...")
-                                                    if bot.processar_todas_secoes_material_externo():
-                                                        print(f"✓ Todas as seções de {atividade['titulo']} concluídas!")
-                                                    else:
-                                                        print(f"⚠ Algum problema ao processar seções de {atividade['titulo']}")
-
-                                                    # ✅ VERIFICAR SESSÃO ANTES DE VOLTAR
-                                                    if not bot.verificar_sessao_valida():
-                                                        print("✗ Sessão perdida após processar seções!")
-                                                        break
-
-                                                    # Voltar para a disciplina
-                                                    if not bot.voltar_para_timeline_salva():
-                                                        print("✗ Erro ao voltar para disciplina! Sessão pode ter expirado.")
-                                                        break
-
-                                                    # ✅ VERIFICAR SESSÃO ANTES DE RECONFIGURAR
-                                                    if not bot.verificar_sessao_valida():
-                                                        print("✗ Sessão perdida ao voltar!")
-                                                        break
-
-                                                    # Reconfigurar filtros
-                                                    if not bot.configurar_filtros_conteudo_web():
-                                                        print("✗ Erro ao reconfigurar filtros!")
-                                                        break
-
-                                                    # NOVO: Salvar progresso após cada atividade concluída
-                                                    bot.salvar_progresso()
-                                                    print(f"\n✓ {atividade['titulo']} concluída!")
-                                            else:
-                                                print(f"✗ Não foi possível encontrar a atividade CW #{i+1}")
-                                                break  # Parar se não encontrar atividade esperada
-
-                                        print(f"\n{'='*60}")
-                                        print(f"✅ TODAS AS {total_cw} ATIVIDADES CW FORAM PROCESSADAS!")
-                                        print(f"{'='*60}\n")
-
-                                    else:
-                                        print("\n✗ Nenhuma atividade CW encontrada")
+                        # ============================================================
+                        # Escolha do modo: CW (Conteúdo WEB), TA (Teleaula) ou os dois
+                        # ============================================================
+                        modo = input("\n▶ O que você quer processar? [1] Conteúdo WEB (CW)  |  [2] Teleaula (TA)  |  [3] Os dois  (padrão: 1) : ").strip()
+                        modo = {"2": "TA", "3": ["CW", "TA"]}.get(modo, "CW")
+
+                        processar_disciplina(bot, disciplina_escolhida, modo)
                 else:
                     print("\n✗ Não foi possível listar as disciplinas")
 
@@ -1518,13 +5008,15 @@ def main():
         print(f"\n✗ Erro: {e}")
         if bot:
             bot.logger.error(f"Erro não tratado: {e}")
+            bot.capturar_depuracao("erro_nao_tratado", erro=e)
 
     finally:
         if bot:
+            bot.progresso.esvaziar()
             print(f"\n📄 Log completo salvo em: {bot.log_filename}")
             input("\n⏸ Pressione ENTER para fechar o navegador...")
             bot.fechar()
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,588 @@
+"""Portal ColaboraRead simulado, para rodar o bot e o benchmark sem acessar o portal real.
+
+Reproduz só a marcação de que o bot.py depende: formulário de login (#username/#password),
+botão `button.entrar` do curso, disciplinas em `a.atividadeNome`, timeline com filtros
+`input.filters-tipo` e cards `li.atividades`, material externo em `details#detalhe` com
+`saveProgressoEngajamento` no onclick de cada seção e a Teleaula com um player mdstrm falso
+(botões play/forward) que avisa a página pelos campos hidden do portal.
+
+Uso:
+    python mock_portal.py --porta 8765 --cw 4 --ta 2 --secoes 5 --latencia-ms 80
+    PORTAL_URL_BASE=http://127.0.0.1:8765 python bot.py
+"""
+import argparse
+import html
+import json
+import secrets
+import threading
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+NOMES_DISCIPLINAS = (
+    "Fisiologia Vegetal", "Ciência do Solo", "Botânica Aplicada", "Entomologia Agrícola",
+    "Hidráulica e Irrigação", "Mecanização Agrícola", "Fitopatologia", "Zootecnia Geral",
+)
+
+# Tipos de card da timeline: (data-filter, rótulo do filtro)
+TIPOS_FILTRO = (
+    ('tipo-cw', 'Conteúdo WEB'),
+    ('tipo-ta', 'Teleaula'),
+    ('tipo-av', 'Avaliação Virtual'),
+)
+
+_ESTILO = """
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 960px; padding: 16px; }
+li.atividades { border: 1px solid #ccc; margin: 8px 0; padding: 8px; list-style: none; }
+.conteudo p { line-height: 1.6; }
+</style>
+"""
+
+
+def _pagina(titulo, corpo, script=""):
+    """Documento HTML completo com o título, o corpo e um script opcional"""
+    return (
+        "<!DOCTYPE html><html lang='pt-br'><head><meta charset='utf-8'>"
+        f"<title>{html.escape(titulo)}</title>{_ESTILO}</head><body>{corpo}"
+        f"{'<script>' + script + '</script>' if script else ''}</body></html>"
+    )
+
+
+class PortalSimulado:
+    """Servidor HTTP local que imita as páginas do ColaboraRead usadas pelo bot.
+
+    O tamanho do portal (disciplinas, atividades CW/TA, seções, parágrafos por seção,
+    vídeos) e a latência de cada resposta são configuráveis. O servidor guarda o que foi
+    registrado (engajamento das seções e vídeos assistidos), então os cards da timeline
+    mostram o percentual real e `estatisticas()` diz se o bot concluiu tudo.
+    """
+
+    def __init__(self, host="127.0.0.1", porta=0, disciplinas=1, cw=3, ta=2, outros=2, secoes=4,
+                 paragrafos=40, videos=2, duracao_video=60, latencia_ms=0, usuario=None, senha=None):
+        """
+        Args:
+            porta (int): Porta do servidor (0 = uma porta livre qualquer)
+            disciplinas (int): Quantidade de disciplinas no curso
+            cw (int): Atividades de Conteúdo WEB por disciplina
+            ta (int): Teleaulas por disciplina
+            outros (int): Cards de outros tipos na timeline (só aumentam a página)
+            secoes (int): Seções do material externo por atividade CW
+            paragrafos (int): Parágrafos do conteúdo de cada seção (altura da página rolada)
+            videos (int): Vídeos por Teleaula
+            duracao_video (int): Duração de cada vídeo em segundos
+            latencia_ms (float): Atraso de cada resposta e da re-renderização dos filtros
+            usuario, senha (str): Credenciais aceitas (None aceita qualquer par não vazio)
+        """
+        self.disciplinas = max(1, disciplinas)
+        self.cw = max(0, cw)
+        self.ta = max(0, ta)
+        self.outros = max(0, outros)
+        self.secoes = max(1, secoes)
+        self.paragrafos = max(1, paragrafos)
+        self.videos = max(1, videos)
+        self.duracao_video = max(10, duracao_video)
+        self.latencia_ms = max(0, latencia_ms)
+        self.usuario = usuario
+        self.senha = senha
+
+        self._lock = threading.Lock()
+        self.reiniciar_estado()
+
+        self._servidor = ThreadingHTTPServer((host, porta), _Manipulador)
+        self._servidor.daemon_threads = True
+        self._servidor.portal = self
+        self._thread = None
+
+    @property
+    def url_base(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def parametros(self):
+        """Parâmetros que definem o tamanho do portal (chave de comparação do benchmark)"""
+        return {
+            'disciplinas': self.disciplinas, 'cw': self.cw, 'ta': self.ta, 'outros': self.outros,
+            'secoes': self.secoes, 'paragrafos': self.paragrafos, 'videos': self.videos,
+            'duracao_video': self.duracao_video, 'latencia_ms': self.latencia_ms,
+        }
+
+    def iniciar(self):
+        """Sobe o servidor numa thread em segundo plano"""
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="portal-simulado", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *_):
+        self.parar()
+
+    def reiniciar_estado(self):
+        """Esquece sessões, engajamentos e vídeos registrados (portal 'zerado')"""
+        with self._lock:
+            self.sessoes = set()
+            self.engajados = set()
+            self.videos_registrados = set()
+            self.requisicoes = Counter()
+
+    # ------------------------------------------------------------
+    # Conteúdo (ids estáveis: d1, d1-cw2, d1-cw2-s3, d1-ta1, d1-ta1-v2)
+    # ------------------------------------------------------------
+
+    def _ids_disciplinas(self):
+        return [f"d{n}" for n in range(1, self.disciplinas + 1)]
+
+    def _nome_disciplina(self, disciplina):
+        n = int(disciplina[1:])
+        nome = NOMES_DISCIPLINAS[(n - 1) % len(NOMES_DISCIPLINAS)]
+        return nome if n <= len(NOMES_DISCIPLINAS) else f"{nome} {n}"
+
+    def _secoes_de(self, atividade):
+        return [f"{atividade}-s{j}" for j in range(1, self.secoes + 1)]
+
+    def _videos_de(self, atividade):
+        return [f"{atividade}-v{k}" for k in range(1, self.videos + 1)]
+
+    def _percentual(self, atividade):
+        if '-cw' in atividade:
+            unidades, feitas = self._secoes_de(atividade), self.engajados
+        else:
+            unidades, feitas = self._videos_de(atividade), self.videos_registrados
+        with self._lock:
+            return int(100 * sum(1 for u in unidades if u in feitas) / len(unidades))
+
+    def _todas_secoes(self):
+        return {
+            secao for d in self._ids_disciplinas() for n in range(1, self.cw + 1)
+            for secao in self._secoes_de(f"{d}-cw{n}")
+        }
+
+    def _todos_videos(self):
+        return {
+            video for d in self._ids_disciplinas() for n in range(1, self.ta + 1)
+            for video in self._videos_de(f"{d}-ta{n}")
+        }
+
+    def estatisticas(self):
+        """Requisições por rota e o que foi registrado, comparado com o esperado
+
+        'secoes_completas'/'videos_completos' comparam os conjuntos de ids (não só a contagem).
+        """
+        secoes, videos = self._todas_secoes(), self._todos_videos()
+        with self._lock:
+            return {
+                'requisicoes': dict(self.requisicoes),
+                'total_requisicoes': sum(self.requisicoes.values()),
+                'secoes_engajadas': len(self.engajados),
+                'secoes_esperadas': len(secoes),
+                'secoes_completas': self.engajados == secoes,
+                'videos_registrados': len(self.videos_registrados),
+                'videos_esperados': len(videos),
+                'videos_completos': self.videos_registrados == videos,
+            }
+
+    # ------------------------------------------------------------
+    # Páginas
+    # ------------------------------------------------------------
+
+    def pagina_login(self, erro=False):
+        aviso = "<div class='alert alert-danger'>Usuário ou senha inválidos</div>" if erro else ""
+        corpo = f"""
+<h1>Colaborar - Login</h1>{aviso}
+<form method="post" action="/login/auth">
+  <input type="text" id="username" name="username" placeholder="Login">
+  <input type="password" id="password" name="password" placeholder="Senha">
+  <button type="submit" class="btn btn-primary btn-lg btn-block">Acessar</button>
+</form>"""
+        return _pagina("Login", corpo)
+
+    def credenciais_validas(self, usuario, senha):
+        if self.usuario is None and self.senha is None:
+            return bool(usuario and senha)
+        return usuario == self.usuario and senha == self.senha
+
+    def pagina_dashboard(self):
+        corpo = """
+<h1>Meus cursos</h1>
+<div class="curso"><h3>Agronomia - Bacharelado</h3>
+  <button class="btn btn-primary entrar" onclick="location.href='/aluno/curso/index'">Entrar</button>
+</div>"""
+        return _pagina("Dashboard", corpo)
+
+    def pagina_curso(self):
+        itens = "".join(
+            f"<li><a class='atividadeNome' href='/aluno/timeline/index?disciplina={d}'>"
+            f"{html.escape(self._nome_disciplina(d))}</a></li>"
+            for d in self._ids_disciplinas()
+        )
+        return _pagina("Agronomia", f"<h1>Agronomia - Bacharelado</h1><ul class='disciplinas'>{itens}</ul>")
+
+    def _card(self, disciplina, tipo, n):
+        atividade = f"{disciplina}-{tipo}{n}"
+        if tipo == 'cw':
+            titulo = f"Conteúdo WEB <small>CW {n} - Unidade {n}</small>"
+            botao = f"<a class='btn btn-primary' title='Atividade' href='/aluno/atividade/index?id={atividade}'>Atividade</a>"
+            percent = f"<small class='progresso'>{self._percentual(atividade)}%</small>"
+        elif tipo == 'ta':
+            titulo = f"TA {n} - Teleaula <small>Unidade {n}</small>"
+            botao = f"<a class='btn btn-default colorVideos' href='/aluno/videoAnotacao/index?id={atividade}'>VÍDEO</a>"
+            percent = f"<small class='progresso'>{self._percentual(atividade)}%</small>"
+        else:
+            titulo = f"Avaliação Virtual <small>AV {n}</small>"
+            botao = "<a class='btn btn-default' href='#'>Avaliação</a>"
+            percent = ""
+        return (
+            f"<li class='atividades' id='card-{atividade}' data-show='true' data-tipo='tipo-{tipo}'>"
+            f"<div class='timeline-panel'><h4 class='timeline-title'>{titulo}</h4>"
+            f"<p>Prazo: 30/12</p>{percent} {botao}</div></li>"
+        )
+
+    def pagina_timeline(self, disciplina):
+        if disciplina not in self._ids_disciplinas():
+            return None
+        cards = []
+        # Intercala os tipos, como na timeline real (ordem por data)
+        for n in range(1, max(self.cw, self.ta, self.outros) + 1):
+            if n <= self.cw:
+                cards.append(self._card(disciplina, 'cw', n))
+            if n <= self.ta:
+                cards.append(self._card(disciplina, 'ta', n))
+            if n <= self.outros:
+                cards.append(self._card(disciplina, 'av', n))
+
+        filtros = "<label><input type='checkbox' id='todos' checked> Todos</label>" + "".join(
+            f"<label><input type='checkbox' class='filters-tipo' data-filter='{tipo}' checked> {rotulo}</label>"
+            for tipo, rotulo in TIPOS_FILTRO
+        )
+        corpo = f"""
+<ol class="breadcrumb"><li><a href="/aluno/curso/index">Agronomia</a></li><li>{html.escape(self._nome_disciplina(disciplina))}</li></ol>
+<div class="filtros">{filtros}</div>
+<ul class="timeline">{''.join(cards)}</ul>"""
+        script = f"""
+var LATENCIA = {self.latencia_ms};
+var todos = document.getElementById('todos');
+var tipos = document.querySelectorAll('input.filters-tipo');
+function aplicarFiltros() {{
+    var marcados = [];
+    for (var i = 0; i < tipos.length; i++) if (tipos[i].checked) marcados.push(tipos[i].getAttribute('data-filter'));
+    setTimeout(function () {{
+        var cards = document.querySelectorAll('li.atividades');
+        for (var j = 0; j < cards.length; j++) {{
+            var mostrar = marcados.indexOf(cards[j].getAttribute('data-tipo')) >= 0;
+            cards[j].setAttribute('data-show', mostrar ? 'true' : 'false');
+            cards[j].style.display = mostrar ? '' : 'none';
+        }}
+    }}, LATENCIA);
+}}
+todos.addEventListener('change', function () {{
+    for (var i = 0; i < tipos.length; i++) tipos[i].checked = todos.checked;
+    aplicarFiltros();
+}});
+for (var i = 0; i < tipos.length; i++) tipos[i].addEventListener('change', function () {{
+    var todosMarcados = true;
+    for (var k = 0; k < tipos.length; k++) todosMarcados = todosMarcados && tipos[k].checked;
+    todos.checked = todosMarcados;
+    aplicarFiltros();
+}});
+"""
+        return _pagina(self._nome_disciplina(disciplina), corpo, script)
+
+    def _breadcrumb(self, atividade, rotulo):
+        disciplina = atividade.split('-')[0]
+        return (
+            "<ol class='breadcrumb'><li><a href='/aluno/curso/index'>Agronomia</a></li>"
+            f"<li><a href='/aluno/timeline/index?disciplina={disciplina}'>{html.escape(self._nome_disciplina(disciplina))}</a></li>"
+            f"<li>{html.escape(rotulo)}</li></ol>"
+        )
+
+    def _atividade_valida(self, atividade, tipo):
+        try:
+            disciplina, resto = atividade.split('-')
+            n = int(resto[len(tipo):])
+        except ValueError:
+            return False
+        limite = self.cw if tipo == 'cw' else self.ta
+        return disciplina in self._ids_disciplinas() and resto.startswith(tipo) and 1 <= n <= limite
+
+    def pagina_atividade(self, atividade):
+        if not self._atividade_valida(atividade, 'cw'):
+            return None
+        itens = []
+        for j, secao in enumerate(self._secoes_de(atividade), 1):
+            with self._lock:
+                marca = " <span class='secao-status' data-lida='1'>✔</span>" if secao in self.engajados else ""
+            itens.append(
+                f"<li class='secao-item'><a href='/aluno/secao/index?id={secao}' target='_blank' "
+                f"onclick=\"saveProgressoEngajamento('{atividade}', '{secao}'); return true;\">Seção {j}</a>{marca}</li>"
+            )
+        corpo = f"""
+{self._breadcrumb(atividade, atividade.upper())}
+<h2>Conteúdo WEB</h2>
+<details id="detalhe"><summary>Material externo</summary><ul>{''.join(itens)}</ul></details>"""
+        script = """
+function saveProgressoEngajamento(atividadeId, secaoId) {
+    fetch('/aluno/engajamento/salvar', {
+        method: 'POST', credentials: 'same-origin',
+        headers: {'Content-Type': 'application/x-www-form-urlencoded'},
+        body: new URLSearchParams({atividadeId: atividadeId, secaoId: secaoId})
+    });
+}
+"""
+        return _pagina("Atividade", corpo, script)
+
+    def pagina_secao(self, secao):
+        corpo = (
+            f"<h3>{html.escape(secao)}</h3>"
+            f"<iframe src='/aluno/secao/conteudo?id={secao}' style='width:100%;height:85vh;border:0'></iframe>"
+        )
+        return _pagina("Seção", corpo)
+
+    def pagina_conteudo_secao(self, secao):
+        texto = ("Conteúdo simulado da seção para rolagem. " * 12).strip()
+        paragrafos = "".join(f"<h4>Tópico {i}</h4><p>{texto}</p>" for i in range(1, self.paragrafos + 1))
+        return _pagina(secao, f"<div class='conteudo'>{paragrafos}</div>")
+
+    def pagina_teleaula(self, atividade):
+        if not self._atividade_valida(atividade, 'ta'):
+            return None
+        videos = self._videos_de(atividade)
+        itens = "".join(
+            f"<li><a href='javascript:void(0)' onclick=\"playVideosMensagem('{v}', {self.duracao_video})\">Vídeo - {k}</a></li>"
+            for k, v in enumerate(videos, 1)
+        )
+        corpo = f"""
+{self._breadcrumb(atividade, atividade.upper())}
+<h2>Teleaula</h2>
+<input type="hidden" id="duracao-video-mediastream" value="{self.duracao_video}">
+<input type="hidden" id="current-time-video" value="false">
+<input type="hidden" id="current-time-video-em-tempo" value="0">
+<iframe id="player-mdstrm" src="/mdstrm.com/embed/{videos[0]}?duracao={self.duracao_video}" width="640" height="360" allow="autoplay"></iframe>
+<ul class="lista-videos">{itens}</ul>"""
+        script = f"""
+var videoAtual = '{videos[0]}';
+function playVideosMensagem(id, duracao) {{
+    videoAtual = id;
+    document.getElementById('duracao-video-mediastream').value = duracao;
+    document.getElementById('current-time-video').value = 'false';
+    document.getElementById('current-time-video-em-tempo').value = '0';
+    document.getElementById('player-mdstrm').src = '/mdstrm.com/embed/' + id + '?duracao=' + duracao + '&t=' + Date.now();
+}}
+window.addEventListener('message', function (e) {{
+    var d = e.data || {{}};
+    if (d.tipo !== 'mdstrm-progresso' || d.video !== videoAtual) return;
+    document.getElementById('current-time-video-em-tempo').value = String(Math.floor(d.tempo));
+    var flag = document.getElementById('current-time-video');
+    if (d.tempo >= d.duracao - 5 && flag.value !== 'true') {{
+        flag.value = 'true';
+        fetch('/aluno/videoAnotacao/registrar', {{
+            method: 'POST', credentials: 'same-origin',
+            headers: {{'Content-Type': 'application/x-www-form-urlencoded'}},
+            body: new URLSearchParams({{videoId: d.video}})
+        }});
+    }}
+}});
+"""
+        return _pagina("Teleaula", corpo, script)
+
+    def pagina_player(self, video, duracao):
+        corpo = """
+<div class="player">
+  <button id="play" class="controls__btn--play" aria-label="Play">&#9654;</button>
+  <button id="forward" class="controls__btn--forward" aria-label="Forward 10s">&#9193;</button>
+  <span id="tempo">0</span>
+</div>"""
+        script = f"""
+var video = {json.dumps(video)}, duracao = {int(duracao)}, tempo = 0, relogio = null;
+var play = document.getElementById('play');
+function avisar() {{
+    document.getElementById('tempo').textContent = tempo + ' / ' + duracao;
+    parent.postMessage({{tipo: 'mdstrm-progresso', video: video, tempo: tempo, duracao: duracao}}, '*');
+}}
+play.addEventListener('click', function () {{
+    if (relogio === null) {{
+        play.setAttribute('aria-label', 'Pause');
+        relogio = setInterval(function () {{ if (tempo < duracao) {{ tempo++; avisar(); }} }}, 1000);
+    }} else {{
+        clearInterval(relogio);
+        relogio = null;
+        play.setAttribute('aria-label', 'Play');
+    }}
+}});
+document.getElementById('forward').addEventListener('click', function () {{
+    tempo = Math.min(tempo + 10, duracao);
+    avisar();
+}});
+"""
+        return _pagina("mdstrm player", corpo, script)
+
+    # ------------------------------------------------------------
+    # Ações
+    # ------------------------------------------------------------
+
+    def registrar_engajamento(self, atividade, secao):
+        """Registra a leitura de uma seção; False se a seção não existe nessa atividade"""
+        if not self._atividade_valida(atividade, 'cw') or secao not in self._secoes_de(atividade):
+            return False
+        with self._lock:
+            self.engajados.add(secao)
+        return True
+
+    def registrar_video(self, video):
+        """Registra um vídeo assistido; False se o id não é de um vídeo de Teleaula"""
+        atividade = video.rsplit('-v', 1)[0]
+        if not self._atividade_valida(atividade, 'ta') or video not in self._videos_de(atividade):
+            return False
+        with self._lock:
+            self.videos_registrados.add(video)
+        return True
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """Rotas do portal simulado; tudo sob /aluno exige o cookie de sessão"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def portal(self):
+        return self.server.portal
+
+    def log_message(self, *_):
+        pass
+
+    def _responder(self, status, corpo="", tipo="text/html; charset=utf-8", cabecalhos=None):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(dados)
+
+    def _redirecionar(self, destino, cabecalhos=None):
+        self._responder(302, "", cabecalhos=dict(cabecalhos or {}, Location=destino))
+
+    def _sessao_valida(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return "SESSAO_SIMULADA" in cookie and cookie["SESSAO_SIMULADA"].value in self.portal.sessoes
+
+    def _formulario(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        corpo = self.rfile.read(tamanho).decode("utf-8") if tamanho else ""
+        return {k: v[0] for k, v in parse_qs(corpo).items()}
+
+    def _atender(self):
+        url = urlsplit(self.path)
+        rota = url.path.rstrip("/") or "/"
+        args = {k: v[0] for k, v in parse_qs(url.query).items()}
+        portal = self.portal
+
+        chave = '/mdstrm.com/embed' if rota.startswith('/mdstrm.com/embed/') else rota
+        with portal._lock:
+            portal.requisicoes[f"{self.command} {chave}"] += 1
+        if portal.latencia_ms:
+            time.sleep(portal.latencia_ms / 1000)
+
+        if rota in ("/", "/login/auth") and self.command == "GET":
+            return self._responder(200, portal.pagina_login(erro='erro' in args))
+
+        if rota == "/login/auth" and self.command == "POST":
+            dados = self._formulario()
+            if not portal.credenciais_validas(dados.get("username"), dados.get("password")):
+                return self._redirecionar("/login/auth?erro=1")
+            token = secrets.token_hex(16)
+            with portal._lock:
+                portal.sessoes.add(token)
+            return self._redirecionar("/aluno/dashboard", {"Set-Cookie": f"SESSAO_SIMULADA={token}; Path=/; HttpOnly"})
+
+        if rota.startswith("/mdstrm.com/embed/"):
+            return self._responder(200, portal.pagina_player(rota.rsplit("/", 1)[-1], args.get("duracao", portal.duracao_video)))
+
+        if rota.startswith("/aluno") and not self._sessao_valida():
+            return self._redirecionar("/login/auth")
+
+        if self.command == "POST":
+            dados = self._formulario()
+            if rota == "/aluno/engajamento/salvar" and \
+                    portal.registrar_engajamento(dados.get("atividadeId", ""), dados.get("secaoId", "")):
+                return self._responder(200, json.dumps({'ok': True}), "application/json")
+            if rota == "/aluno/videoAnotacao/registrar" and portal.registrar_video(dados.get("videoId", "")):
+                return self._responder(200, json.dumps({'ok': True}), "application/json")
+            return self._responder(400, json.dumps({'ok': False}), "application/json")
+
+        paginas = {
+            "/aluno/dashboard": lambda: portal.pagina_dashboard(),
+            "/aluno/curso/index": lambda: portal.pagina_curso(),
+            "/aluno/timeline/index": lambda: portal.pagina_timeline(args.get("disciplina")),
+            "/aluno/atividade/index": lambda: portal.pagina_atividade(args.get("id", "")),
+            "/aluno/secao/index": lambda: portal.pagina_secao(args.get("id", "")),
+            "/aluno/secao/conteudo": lambda: portal.pagina_conteudo_secao(args.get("id", "")),
+            "/aluno/videoAnotacao/index": lambda: portal.pagina_teleaula(args.get("id", "")),
+        }
+        pagina = paginas[rota]() if rota in paginas else None
+        if pagina is None:
+            return self._responder(404, _pagina("Não encontrado", "<h1>404</h1>"))
+        return self._responder(200, pagina)
+
+    def do_GET(self):
+        self._atender()
+
+    def do_HEAD(self):
+        self._atender()
+
+    def do_POST(self):
+        self._atender()
+
+
+def argumentos_portal(parser):
+    """Acrescenta ao parser as opções de tamanho e latência do portal simulado"""
+    parser.add_argument("--disciplinas", type=int, default=1, help="Disciplinas no curso")
+    parser.add_argument("--cw", type=int, default=3, help="Atividades de Conteúdo WEB por disciplina")
+    parser.add_argument("--ta", type=int, default=2, help="Teleaulas por disciplina")
+    parser.add_argument("--outros", type=int, default=2, help="Cards de outros tipos na timeline")
+    parser.add_argument("--secoes", type=int, default=4, help="Seções do material externo por CW")
+    parser.add_argument("--paragrafos", type=int, default=40, help="Parágrafos por seção (altura da página)")
+    parser.add_argument("--videos", type=int, default=2, help="Vídeos por Teleaula")
+    parser.add_argument("--duracao-video", type=int, default=60, help="Duração de cada vídeo (s)")
+    parser.add_argument("--latencia-ms", type=float, default=0, help="Atraso de cada resposta e dos filtros (ms)")
+    return parser
+
+
+def portal_dos_argumentos(args, porta=0):
+    return PortalSimulado(
+        porta=porta, disciplinas=args.disciplinas, cw=args.cw, ta=args.ta, outros=args.outros,
+        secoes=args.secoes, paragrafos=args.paragrafos, videos=args.videos,
+        duracao_video=args.duracao_video, latencia_ms=args.latencia_ms,
+    )
+
+
+def main():
+    parser = argumentos_portal(argparse.ArgumentParser(description="Portal ColaboraRead simulado"))
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    portal = portal_dos_argumentos(args, porta=args.porta).iniciar()
+    print(f"🧪 Portal simulado em {portal.url_base} (qualquer usuário/senha)")
+    print(f"   PORTAL_URL_BASE={portal.url_base} python bot.py")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n{json.dumps(portal.estatisticas(), ensure_ascii=False, indent=1)}")
+    finally:
+        portal.parar()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""MotorEngajamentoHTTP e parse_fonte_engajamento contra o portal simulado
+
+Sem navegador: a sessão é aberta com requests, a página da atividade é lida como HTML e
+a descoberta (fonte de saveProgressoEngajamento, onclick e href de cada seção) é feita
+por regex, no lugar do _JS_SECOES_ENGAJAMENTO.
+"""
+
+import os
+import re
+import sys
+import html
+from urllib.parse import urljoin
+
+import pytest
+
+pytest.importorskip("selenium")
+requests = pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot as modulo_bot  # noqa: E402
+from mock_portal import PortalSimulado  # noqa: E402
+
+ATIVIDADE = "d1-cw1"
+
+
+@pytest.fixture
+def portal():
+    with PortalSimulado(disciplinas=1, cw=1, ta=0, secoes=4, paragrafos=2) as portal:
+        yield portal
+
+
+def _cookies_da_sessao(portal):
+    """Login como o bot faria; devolve os cookies no formato de driver.get_cookies()"""
+    sessao = requests.Session()
+    r = sessao.post(urljoin(portal.url_base, "/login/auth"), data={'username': 'aluno', 'password': 'senha'})
+    assert r.ok and "/aluno/dashboard" in r.url
+    return [{'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path} for c in sessao.cookies], sessao
+
+
+def _descobrir(sessao, portal):
+    url_atividade = urljoin(portal.url_base, f"/aluno/atividade/index?id={ATIVIDADE}")
+    pagina = sessao.get(url_atividade).text
+    fonte = re.search(r"function saveProgressoEngajamento\(.*?\n}", pagina, re.S).group(0)
+    secoes = [
+        {'nome': html.unescape(nome), 'href': urljoin(url_atividade, html.unescape(href)),
+         'args': modulo_bot.parse_args_onclick(html.unescape(onclick))}
+        for href, onclick, nome in re.findall(r"<a href='([^']+)' target='_blank' onclick=\"([^\"]+)\">([^<]+)</a>", pagina)
+    ]
+    return url_atividade, fonte, secoes
+
+
+def test_motor_http_engaja_todas_as_secoes(portal):
+    cookies, sessao = _cookies_da_sessao(portal)
+    url_atividade, fonte, secoes = _descobrir(sessao, portal)
+
+    engajamento = modulo_bot.parse_fonte_engajamento(fonte)
+    assert engajamento == {'url': '/aluno/engajamento/salvar', 'metodo': 'POST',
+                           'parametros': ['atividadeId', 'secaoId']}
+    engajamento['url'] = urljoin(url_atividade, engajamento['url'])
+    assert [s['args'] for s in secoes] == [[ATIVIDADE, f"{ATIVIDADE}-s{j}"] for j in range(1, 5)]
+
+    motor = modulo_bot.MotorEngajamentoHTTP(engajamento=engajamento, cookies=cookies, max_workers=2)
+    resultados = motor.engajar(secoes)
+
+    assert [r['nome'] for r in resultados] == [s['nome'] for s in secoes]
+    assert all(r['ok'] and r['status'] == [200, 200] for r in resultados)
+    estatisticas = portal.estatisticas()
+    assert estatisticas['secoes_completas']
+    assert estatisticas['requisicoes']['POST /aluno/engajamento/salvar'] == 4
+
+
+def test_motor_http_reporta_secao_recusada(portal):
+    cookies, sessao = _cookies_da_sessao(portal)
+    url_atividade, fonte, secoes = _descobrir(sessao, portal)
+    engajamento = dict(modulo_bot.parse_fonte_engajamento(fonte))
+    engajamento['url'] = urljoin(url_atividade, engajamento['url'])
+
+    desconhecida = {'nome': 'Seção inexistente', 'href': None, 'args': [ATIVIDADE, f"{ATIVIDADE}-s99"]}
+    motor = modulo_bot.MotorEngajamentoHTTP(engajamento=engajamento, cookies=cookies)
+    resultados = motor.engajar(secoes[:1] + [desconhecida])
+
+    assert resultados[0]['ok']
+    assert not resultados[1]['ok'] and resultados[1]['status'] == [400]
+    estatisticas = portal.estatisticas()
+    assert estatisticas['secoes_engajadas'] == 1 and not estatisticas['secoes_completas']
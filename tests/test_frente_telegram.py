@@ -0,0 +1,200 @@
+"""FrenteTelegram contra um servidor local que imita a Bot API
+
+Sobe um HTTP server em 127.0.0.1 que responde getMe / sendMessage / editMessageText,
+aponta a frente para ele com `base_url` e entrega os comandos direto ao Application
+(sem polling). O trabalho com Selenium é trocado por um PortalBot falso.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("telegram")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot as modulo_bot  # noqa: E402
+from telegram import Update  # noqa: E402
+
+TOKEN = "123:TESTE"
+CHAT = 42
+
+
+class BotApiFalsa:
+    """Bot API mínima: guarda cada chamada (método, parâmetros) em `chamadas`"""
+
+    def __init__(self):
+        self.chamadas = []
+        self._proximo_id = 100
+        self._trava = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                tamanho = int(self.headers.get('Content-Length') or 0)
+                corpo = self.rfile.read(tamanho).decode('utf-8') if tamanho else ''
+                if 'json' in (self.headers.get('Content-Type') or ''):
+                    params = json.loads(corpo or '{}')
+                else:
+                    params = {k: v[0] for k, v in parse_qs(corpo).items()}
+                metodo = self.path.rsplit('/', 1)[-1]
+                resposta = json.dumps({'ok': True, 'result': api.responder(metodo, params)}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(resposta)))
+                self.end_headers()
+                self.wfile.write(resposta)
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}/bot"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def responder(self, metodo, params):
+        with self._trava:
+            self.chamadas.append((metodo, params))
+            if metodo == 'getMe':
+                return {'id': 1, 'is_bot': True, 'first_name': 'Teste', 'username': 'teste_bot'}
+            if metodo in ('sendMessage', 'editMessageText'):
+                if metodo == 'sendMessage':
+                    self._proximo_id += 1
+                    message_id = self._proximo_id
+                else:
+                    message_id = int(params['message_id'])
+                return {
+                    'message_id': message_id, 'date': 0, 'text': params.get('text', ''),
+                    'chat': {'id': int(params['chat_id']), 'type': 'private'},
+                }
+            return True
+
+    def textos(self, metodo):
+        with self._trava:
+            return [p.get('text', '') for m, p in self.chamadas if m == metodo]
+
+    def fechar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class ProgressoFalso:
+    def adicionar_saida(self, saida):
+        pass
+
+
+class PortalBotFalso:
+    """Faz o papel do PortalBot dentro de executar_job_telegram, sem navegador"""
+
+    def __init__(self, headless=True):
+        self.cancelamento = None
+        self.progresso = ProgressoFalso()
+        self.logger = modulo_bot.logging.getLogger('PortalBot')
+        self.total_atividades = 0
+        self.atividade_atual_index = 0
+
+    def iniciar_sessao(self):
+        return True
+
+    def entrar_curso_agronomia(self):
+        return True
+
+    def listar_disciplinas(self):
+        return [{'nome': 'Disciplina A', 'url': '/a'}, {'nome': 'Disciplina B', 'url': '/b'}]
+
+    def fechar(self):
+        pass
+
+
+def _comando(texto, chat_id=CHAT, update_id=1):
+    comando = texto.split()[0]
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 0, 'text': texto,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Aluno'},
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(comando)}],
+        },
+    }
+
+
+@pytest.fixture
+def api():
+    api = BotApiFalsa()
+    yield api
+    api.fechar()
+
+
+async def _com_frente(api, corpo):
+    frente = modulo_bot.FrenteTelegram(TOKEN, chats_autorizados={CHAT}, intervalo_edicao=0.05,
+                                       base_url=api.base_url)
+    app = frente.app
+    await app.initialize()
+    await frente._ao_iniciar(app)
+    await app.start()
+    try:
+        await corpo(frente, app)
+    finally:
+        await app.stop()
+        await frente._ao_encerrar(app)
+        await app.shutdown()
+
+
+def test_cancelar_job_termina_como_cancelado(api, monkeypatch):
+    iniciou = threading.Event()
+    processadas = []
+
+    def processar_disciplina(bot, unidade, modo):
+        processadas.append(unidade['nome'])
+        iniciou.set()
+        bot.cancelamento.wait(10)  # fica "processando" até o /cancelar chegar
+        return True
+
+    monkeypatch.setattr(modulo_bot, 'PortalBot', PortalBotFalso)
+    monkeypatch.setattr(modulo_bot, 'processar_disciplina', processar_disciplina)
+
+    async def corpo(frente, app):
+        await app.process_update(Update.de_json(_comando('/iniciar TODOS', update_id=1), app.bot))
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, iniciou.wait, 10)
+        await app.process_update(Update.de_json(_comando('/cancelar', update_id=2), app.bot))
+        await asyncio.wait_for(frente._filas[CHAT].join(), timeout=10)
+
+    asyncio.run(_com_frente(api, corpo))
+
+    assert processadas == ['Disciplina A']
+    enviados = api.textos('sendMessage')
+    assert any('Job #1' in t and 'na fila' in t for t in enviados)
+    assert any(t.startswith('🛑 Cancelamento pedido para o job #1') for t in enviados)
+
+    final = api.textos('editMessageText')[-1]
+    assert 'cancelado ⏹' in final
+    assert 'concluído' not in final
+    assert '✓ Disciplina A [CW+TA]' in final
+    assert '⏹ Disciplina B [CW+TA]' in final
+
+
+def test_chat_nao_autorizado_nao_enfileira(api, monkeypatch):
+    monkeypatch.setattr(modulo_bot, 'PortalBot', PortalBotFalso)
+
+    async def corpo(frente, app):
+        await app.process_update(Update.de_json(_comando('/iniciar CW', chat_id=7), app.bot))
+        assert frente._filas == {}
+
+    asyncio.run(_com_frente(api, corpo))
+
+    enviados = api.textos('sendMessage')
+    assert len(enviados) == 1 and enviados[0].startswith('⛔ Chat não autorizado (id 7)')
+
+
+def test_codigo_saida_cancelada_nao_e_sucesso():
+    assert modulo_bot.codigo_saida({'A': {'status': 'ok'}, 'B': {'status': 'cancelada'}}) == 1
+    assert modulo_bot.codigo_saida({'A': {'status': 'ok'}}) == 0